@@ -0,0 +1,253 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import random
+import datetime
+from typing import Dict, List
+
+
+class FixturePages(object):
+    """
+    Class that generates stand-in versions of the comunio.de pages used by the scraper.
+
+    The generated pages contain exactly the elements that ComunioSession and ComunioFetcher look for,
+    surrounded by a configurable amount of unrelated markup to approximate the size of the real pages.
+    They are used to benchmark the parsers and to replay a complete refresh without contacting comunio.de
+    """
+
+    positions = ["Torhüter", "Abwehr", "Mittelfeld", "Sturm"]
+    """
+    The positions a player may have
+    """
+
+    @staticmethod
+    def generate_squad(size: int, seed: int = 0) -> List[Dict[str, str or int]]:
+        """
+        Generates a squad of players in the format returned by ComunioFetcher.get_own_player_list()
+
+        :param size: the amount of players in the squad
+        :param seed: the seed used to generate the market values and points
+        :return:     the list of player dictionaries
+        """
+        generator = random.Random(seed)
+        squad = []
+        for index in range(0, size):
+            squad.append({"name": "Player " + str(index).zfill(3),
+                          "value": generator.randint(1, 200) * 50000,
+                          "points": generator.randint(-20, 150),
+                          "position": FixturePages.positions[index % len(FixturePages.positions)]})
+        return squad
+
+    @staticmethod
+    def generate_league(clubs: int, players_per_club: int, seed: int = 1) -> List[Dict[str, str or int]]:
+        """
+        Generates the players of a league, in the format returned by ComunioFetcher.parse_club_page()
+
+        :param clubs:            the amount of clubs
+        :param players_per_club: the amount of players per club
+        :param seed:             the seed used to generate the market values and points
+        :return:                 the list of player dictionaries, ordered by club
+        """
+        generator = random.Random(seed)
+        league = []
+        for index in range(0, clubs * players_per_club):
+            league.append({"name": "League Player " + str(index).zfill(4),
+                           "club": "Club " + str(index // players_per_club + 1).zfill(2),
+                           "value": generator.randint(1, 200) * 50000,
+                           "points": generator.randint(-20, 150),
+                           "position": FixturePages.positions[index % len(FixturePages.positions)]})
+        return league
+
+    @staticmethod
+    def asking_price(player: Dict[str, str or int]) -> int:
+        """
+        Calculates the asking price of a player on the exchange market. It differs from the market value,
+        so that parsers reading the wrong column of the exchange market rows are noticed
+
+        :param player: the player
+        :return:       the asking price
+        """
+        return player["value"] + player["value"] // 10
+
+    @staticmethod
+    def format_amount(amount: int) -> str:
+        """
+        Formats an amount of money the way comunio.de does, for example 1.250.000
+
+        :param amount: the amount to format
+        :return:       the formatted amount
+        """
+        return "{:,}".format(amount).replace(",", ".")
+
+    @staticmethod
+    def __wrap(body: str, filler: int) -> str:
+        """
+        Wraps the page content in a HTML document containing unrelated markup
+
+        :param body:   the page content
+        :param filler: the amount of unrelated blocks of markup to add before and after the content
+        :return:       the complete HTML document
+        """
+        block = "<div class=\"navigation\"><ul>" + \
+                "".join("<li><a href=\"/page" + str(i) + ".phtml\">Link " + str(i) + "</a></li>" for i in range(10)) + \
+                "</ul><p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p></div>\n"
+        return "<!DOCTYPE html><html><head><title>Comunio</title></head><body>\n" + \
+               block * filler + body + block * filler + "</body></html>"
+
+    @staticmethod
+    def login_page(filler: int = 20) -> str:
+        """
+        :param filler: the amount of unrelated markup blocks
+        :return:       the page returned after logging in
+        """
+        return FixturePages.__wrap("<div id=\"login\"><p>Login</p></div>", filler)
+
+    @staticmethod
+    def news_page(comunio_id: str, cash: int, team_value: int, articles: List[Dict[str, str]],
+                  filler: int = 50) -> str:
+        """
+        Generates the team news page
+
+        :param comunio_id: the user's comunio ID
+        :param cash:       the user's cash
+        :param team_value: the user's team value
+        :param articles:   the news articles as dictionaries with the keys date, type and content
+        :param filler:     the amount of unrelated markup blocks
+        :return:           the page's HTML
+        """
+        body = "<div id=\"userid\"><p>User: " + comunio_id + "</p></div>\n" + \
+               "<div id=\"manager_money\"><p>Kontostand: " + FixturePages.format_amount(cash) + " €</p></div>\n" + \
+               "<div id=\"teamvalue\"><p>Mannschaftswert: " + FixturePages.format_amount(team_value) + \
+               " €</p></div>\n"
+
+        for index, article in enumerate(articles):
+            suffix = str(index % 2 + 1)
+            body += "<div class=\"article_header" + suffix + "\">" + article["date"] + " - Comunio > " + \
+                    article["type"] + "</div>\n" + \
+                    "<div class=\"article_content" + suffix + "\">" + article["content"] + "</div>\n"
+
+        return FixturePages.__wrap(body, filler)
+
+    @staticmethod
+    def transfer_articles(screen_name: str, bought: List[Dict[str, str or int]],
+                          sold: List[Dict[str, str or int]]) -> List[Dict[str, str]]:
+        """
+        Generates today's transfer news articles
+
+        :param screen_name: the user's screen name
+        :param bought:      the players bought by the user today, as dictionaries with the keys name and value
+        :param sold:        the players sold by the user today, as dictionaries with the keys name and value
+        :return:            the articles, in the format expected by news_page()
+        """
+        today = datetime.datetime.utcnow()
+        date = str(today.day).zfill(2) + "." + str(today.month).zfill(2) + "." + str(today.year)[2:4]
+
+        content = ""
+        for player in bought:
+            content += player["name"] + " wechselt für " + FixturePages.format_amount(player["value"]) + \
+                       " von Computer zu " + screen_name + "."
+        for player in sold:
+            content += player["name"] + " wechselt für " + FixturePages.format_amount(player["value"]) + \
+                       " von " + screen_name + " zu Computer."
+
+        return [] if len(content) == 0 else [{"date": date, "type": "Transfers", "content": content}]
+
+    @staticmethod
+    def player_info_page(screen_name: str, filler: int = 30) -> str:
+        """
+        :param screen_name: the user's screen name
+        :param filler:      the amount of unrelated markup blocks
+        :return:            the user's profile page
+        """
+        return FixturePages.__wrap("<div id=\"title\"><h1>" + screen_name + "\xa0(Fixture)</h1></div>", filler)
+
+    @staticmethod
+    def sell_page(players: List[Dict[str, str or int]], filler: int = 40) -> str:
+        """
+        Generates the page listing the players that are not on the exchange market
+
+        :param players: the players to list
+        :param filler:  the amount of unrelated markup blocks
+        :return:        the page's HTML
+        """
+        rows = ""
+        for index, player in enumerate(players):
+            rows += "<tr class=\"tr" + str(index % 2 + 1) + "\"><td>" + player["name"] + "</td><td>Club</td>" + \
+                    "<td>" + FixturePages.format_amount(player["value"]) + "</td>" + \
+                    "<td>" + str(player["points"]) + "</td><td>" + player["position"] + "</td>" + \
+                    "<td><input type=\"checkbox\"/></td></tr>\n"
+        return FixturePages.__wrap("<table>" + rows + "</table>", filler)
+
+    @staticmethod
+    def on_sale_page(players: List[Dict[str, str or int]], filler: int = 40) -> str:
+        """
+        Generates the page listing the players that are currently on the exchange market
+
+        :param players: the players to list
+        :param filler:  the amount of unrelated markup blocks
+        :return:        the page's HTML
+        """
+        rows = ""
+        for index, player in enumerate(players):
+            rows += "<tr class=\"tr" + str(index % 2 + 1) + "\"><td></td><td>" + player["name"] + "</td>" + \
+                    "<td>Club</td><td>" + FixturePages.format_amount(FixturePages.asking_price(player)) + "</td>" + \
+                    "<td>" + FixturePages.format_amount(player["value"]) + "</td>" + \
+                    "<td>" + str(player["points"]) + "</td><td>Computer</td><td>" + player["position"] + "</td></tr>\n"
+        return FixturePages.__wrap("<table>" + rows + "</table>", filler)
+
+    @staticmethod
+    def club_page(players: List[Dict[str, str or int]], filler: int = 40) -> str:
+        """
+        Generates the page listing the players of a club
+
+        :param players: the players to list, as dictionaries including the player's club
+        :param filler:  the amount of unrelated markup blocks
+        :return:        the page's HTML
+        """
+        rows = ""
+        for index, player in enumerate(players):
+            rows += "<tr class=\"tr" + str(index % 2 + 1) + "\"><td>" + player["name"] + "</td>" + \
+                    "<td>" + player["club"] + "</td><td>" + FixturePages.format_amount(player["value"]) + "</td>" + \
+                    "<td>" + str(player["points"]) + "</td><td>" + player["position"] + "</td></tr>\n"
+        return FixturePages.__wrap("<table>" + rows + "</table>", filler)
+
+    @staticmethod
+    def market_page(players: List[Dict[str, str or int]], filler: int = 40) -> str:
+        """
+        Generates a page of the exchange market listing
+
+        :param players: the players to list, as dictionaries including the player's club
+        :param filler:  the amount of unrelated markup blocks
+        :return:        the page's HTML
+        """
+        rows = ""
+        for index, player in enumerate(players):
+            rows += "<tr class=\"tr" + str(index % 2 + 1) + "\"><td></td><td>" + player["name"] + "</td>" + \
+                    "<td>" + player["club"] + "</td>" + \
+                    "<td>" + FixturePages.format_amount(FixturePages.asking_price(player)) + "</td>" + \
+                    "<td>" + FixturePages.format_amount(player["value"]) + "</td>" + \
+                    "<td>" + str(player["points"]) + "</td><td>Computer</td><td>" + player["position"] + "</td></tr>\n"
+        return FixturePages.__wrap("<table>" + rows + "</table>", filler)
@@ -0,0 +1,245 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import time
+import threading
+from urllib.parse import urlparse
+from socketserver import ThreadingMixIn
+from typing import Dict, List
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from comunio.scraper.ComunioFetcher import ComunioFetcher
+from comunio.scraper.MarketCrawler import MarketCrawler
+from comunio.benchmark.FixturePages import FixturePages
+
+
+class FixtureServer(object):
+    """
+    A local HTTP server that stands in for comunio.de.
+
+    It answers the login request and serves the pages downloaded during a refresh, generated by FixturePages.
+    Optionally, it also serves the club and exchange market pages of a generated league for the MarketCrawler.
+    Every response can be delayed by a configurable latency to simulate a remote server.
+    """
+
+    comunio_id = "123456"
+    """
+    The comunio ID of the fixture user
+    """
+
+    screen_name = "Fixture"
+    """
+    The screen name of the fixture user
+    """
+
+    session_cookie = "fixture-session"
+    """
+    The value of the session cookie handed out on login
+    """
+
+    def __init__(self, squad_size: int = 20, on_sale: int = 2, latency: float = 0.0, port: int = 0,
+                 players_per_club: int = 0, market_size: int = 0, market_page_size: int = 25) -> None:
+        """
+        Initializes the fixture server. The pages are generated once and served from memory
+
+        :param squad_size:       the amount of players in the fixture user's squad
+        :param on_sale:          how many of those players are currently on the exchange market
+        :param latency:          the time in seconds every response is delayed by
+        :param port:             the port to listen on. 0 picks a free port
+        :param players_per_club: the amount of players of each of the league's clubs
+        :param market_size:      how many of the league's players are listed on the exchange market
+        :param market_page_size: the amount of players per page of the exchange market listing
+        """
+        self.latency = latency
+        self.squad = FixturePages.generate_squad(squad_size)
+        self.pages = self.__generate_pages(on_sale)
+        self.league = FixturePages.generate_league(len(MarketCrawler.club_ids), players_per_club)
+        self.market_pages = self.__generate_market_pages(players_per_club, market_size, market_page_size)
+
+        self.__server = _ThreadingHTTPServer(("127.0.0.1", port), _FixtureRequestHandler)
+        self.__server.fixture = self
+        self.__thread = None
+
+    def __generate_pages(self, on_sale: int) -> Dict[str, str]:
+        """
+        Generates the served pages
+
+        :param on_sale: the amount of players on the exchange market
+        :return:        the pages, keyed by their path without query string
+        """
+        cash = 5000000
+        team_value = sum(player["value"] for player in self.squad)
+        articles = FixturePages.transfer_articles(FixtureServer.screen_name, self.squad[0:2], [])
+
+        return {
+            urlparse(ComunioFetcher.login_page).path: FixturePages.login_page(),
+            urlparse(ComunioFetcher.news_page).path:
+                FixturePages.news_page(FixtureServer.comunio_id, cash, team_value, articles),
+            urlparse(ComunioFetcher.player_info_page).path: FixturePages.player_info_page(FixtureServer.screen_name),
+            urlparse(ComunioFetcher.sell_page).path: FixturePages.sell_page(self.squad[on_sale:]),
+            urlparse(ComunioFetcher.on_sale_page).path: FixturePages.on_sale_page(self.squad[0:on_sale])
+        }
+
+    def __generate_market_pages(self, players_per_club: int, market_size: int, market_page_size: int) \
+            -> Dict[str, str]:
+        """
+        Generates the club pages and the pages of the exchange market listing
+
+        :param players_per_club: the amount of players of each club
+        :param market_size:      the amount of players on the exchange market
+        :param market_page_size: the amount of players per page of the exchange market listing
+        :return:                 the pages, keyed by their path including the query string
+        """
+        pages = {}
+        for index, club_id in enumerate(MarketCrawler.club_ids):
+            club_players = self.league[index * players_per_club:(index + 1) * players_per_club]
+            pages[ComunioFetcher.club_page + str(club_id)] = FixturePages.club_page(club_players)
+
+        market = self.league[0:market_size]
+        for start in range(0, len(market), market_page_size):
+            page_number = start // market_page_size + 1
+            pages[ComunioFetcher.exchange_market_page + str(page_number)] = \
+                FixturePages.market_page(market[start:start + market_page_size])
+        return pages
+
+    def get_base_url(self) -> str:
+        """
+        :return: the base URL of the server, to be used in place of ComunioFetcher.base_url
+        """
+        return "http://127.0.0.1:" + str(self.__server.server_address[1]) + "/"
+
+    def start(self) -> str:
+        """
+        Starts serving requests in a background thread
+
+        :return: the base URL of the server
+        """
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self.get_base_url()
+
+    def stop(self) -> None:
+        """
+        Stops the server
+
+        :return: None
+        """
+        self.__server.shutdown()
+        self.__server.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __enter__(self) -> "FixtureServer":
+        """
+        Starts the server when used as a context manager
+
+        :return: the running server
+        """
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        """
+        Stops the server when the context is left
+
+        :return: None
+        """
+        self.stop()
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """
+    HTTP server that answers every request in its own thread, like the concurrent requests of a real refresh
+    """
+
+    daemon_threads = True
+
+
+class _FixtureRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler serving the pages of the FixtureServer
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        """
+        Serves a page. Without a session cookie, the news page is served without the user's info,
+        which ComunioSession treats as rejected credentials
+
+        :return: None
+        """
+        fixture = self.server.fixture
+        path = urlparse(self.path).path.lstrip("/")
+        logged_in = FixtureServer.session_cookie in self.headers.get("Cookie", "")
+
+        if path == urlparse(ComunioFetcher.news_page).path and not logged_in:
+            self.__respond(200, FixturePages.login_page())
+        elif self.path.lstrip("/") in fixture.market_pages:
+            self.__respond(200, fixture.market_pages[self.path.lstrip("/")])
+        elif self.path.lstrip("/").startswith(ComunioFetcher.exchange_market_page):
+            self.__respond(200, FixturePages.market_page([]))  # Pages past the end of the listing are empty
+        elif path in fixture.pages:
+            self.__respond(200, fixture.pages[path])
+        else:
+            self.__respond(404, "Not Found")
+
+    def do_POST(self) -> None:
+        """
+        Handles the login request. Every username and password is accepted
+
+        :return: None
+        """
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.__respond(200, self.server.fixture.pages[ComunioFetcher.login_page],
+                       ["session=" + FixtureServer.session_cookie + "; Path=/"])
+
+    def __respond(self, status: int, body: str, cookies: List[str] = None) -> None:
+        """
+        Sends a response after waiting for the configured latency
+
+        :param status:  the HTTP status code
+        :param body:    the response body
+        :param cookies: cookies to set
+        :return:        None
+        """
+        time.sleep(self.server.fixture.latency)
+
+        content = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        for cookie in cookies or []:
+            self.send_header("Set-Cookie", cookie)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *_) -> None:
+        """
+        Suppresses the request logging
+
+        :return: None
+        """
+        pass
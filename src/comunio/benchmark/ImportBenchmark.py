@@ -0,0 +1,132 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+
+class ImportBenchmark(object):
+    """
+    Class that measures the import time of a module using python's -X importtime option
+    """
+
+    heavy_modules = ["PyQt5", "matplotlib", "tkinter", "raven", "requests", "bs4"]
+    """
+    Modules that take a long time to load and must not be imported by headless code paths on startup
+    """
+
+    def __init__(self, module: str = "comunio.main") -> None:
+        """
+        Initializes the benchmark
+
+        :param module: the module whose import time is measured
+        """
+        self.__module = module
+
+    def measure(self) -> List[Tuple[str, int, int]]:
+        """
+        Imports the module in a fresh interpreter and records the import times
+
+        :return: the imported modules as tuples of module name, own import time and cumulative import time,
+                 both in microseconds
+        """
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + self.__module],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if process.returncode != 0:
+            raise ImportError(process.stderr)
+
+        results = []
+        for line in process.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            own, cumulative, name = line[len("import time:"):].split("|")
+            results.append((name.strip(), int(own), int(cumulative)))
+        return results
+
+    def run(self, runs: int) -> Dict[str, object]:
+        """
+        Measures the import time multiple times
+
+        :param runs: the amount of measurements
+        :return:     a dictionary with the keys 'total' (the fastest cumulative import time of the module in seconds),
+                     'slowest' (the ten slowest modules of that run as tuples of name and seconds)
+                     and 'heavy' (the heavy modules that were imported)
+        """
+        fastest = None
+        for _ in range(0, runs):
+            results = self.measure()
+            total = [cumulative for name, _, cumulative in results if name == self.__module][0]
+            if fastest is None or total < fastest[0]:
+                fastest = (total, results)
+
+        total, results = fastest
+        imported = set(name.split(".")[0] for name, _, _ in results)
+        slowest = sorted(results, key=lambda result: -result[1])[0:10]
+
+        return {"total": total / 1000000,
+                "slowest": [(name, own / 1000000) for name, own, _ in slowest],
+                "heavy": [module for module in ImportBenchmark.heavy_modules if module in imported]}
+
+
+def main() -> None:
+    """
+    Measures the import time of a module and prints the results.
+    Exits with a non-zero exit code if the import takes longer than the given budget or if a heavy module
+    was imported
+
+    :return: None
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--module", default="comunio.main",
+                        help="The module whose import time is measured")
+    parser.add_argument("-n", "--runs", type=int, default=5,
+                        help="The amount of measurements, the fastest one is reported")
+    parser.add_argument("-b", "--budget", type=float,
+                        help="The maximum import time in seconds")
+    args = parser.parse_args()
+
+    result = ImportBenchmark(args.module).run(args.runs)
+
+    print("Importing {} took {:.2f} ms\n".format(args.module, result["total"] * 1000))
+    for name, duration in result["slowest"]:
+        print("{:<50} {:>9.2f} ms".format(name, duration * 1000))
+
+    failed = False
+    if len(result["heavy"]) > 0:
+        print("\nHeavy modules imported on startup: " + ", ".join(result["heavy"]))
+        failed = True
+    if args.budget is not None and result["total"] > args.budget:
+        print("\nThe import exceeded the budget of {:.2f} ms".format(args.budget * 1000))
+        failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import os
+import time
+import argparse
+from typing import Dict, Tuple
+from comunio.scraper.HtmlParser import HtmlParser
+from comunio.scraper.ComunioFetcher import ComunioFetcher
+from comunio.benchmark.FixturePages import FixturePages
+
+
+class ParserBenchmark(object):
+    """
+    Class that compares the performance of the HTML parser configurations on the pages parsed during a refresh
+    """
+
+    def __init__(self, pages: Dict[str, str]) -> None:
+        """
+        Initializes the benchmark
+
+        :param pages: the pages to parse, with the keys news, sell and on_sale
+        """
+        self.__pages = pages
+
+    @staticmethod
+    def load_pages(directory: str) -> Dict[str, str]:
+        """
+        Loads previously saved pages from a directory. The directory has to contain the files
+        news.html, sell.html and on_sale.html
+
+        :param directory: the directory containing the saved pages
+        :return:          the pages, in the format expected by the constructor
+        """
+        pages = {}
+        for page in ["news", "sell", "on_sale"]:
+            with open(os.path.join(directory, page + ".html"), encoding="utf-8") as html_file:
+                pages[page] = html_file.read()
+        return pages
+
+    @staticmethod
+    def generate_pages(squad_size: int) -> Dict[str, str]:
+        """
+        Generates fixture pages
+
+        :param squad_size: the amount of players in the generated squad
+        :return:           the pages, in the format expected by the constructor
+        """
+        squad = FixturePages.generate_squad(squad_size)
+        articles = FixturePages.transfer_articles("Fixture", squad[0:3], [])
+        return {"news": FixturePages.news_page("123456", 1000000, 20000000, articles * 10),
+                "sell": FixturePages.sell_page(squad[2:]),
+                "on_sale": FixturePages.on_sale_page(squad[0:2])}
+
+    @staticmethod
+    def verify_fixture_layout() -> None:
+        """
+        Makes sure that the parsers read the generated fixture pages correctly, which pins down the
+        column layout of the player tables. The exchange market rows contain both the asking price and the
+        market value, only the market value may be parsed
+
+        :raises ValueError: if a parser does not reproduce the generated players
+        :return:            None
+        """
+        squad = FixturePages.generate_squad(4)
+        league = FixturePages.generate_league(2, 3)
+        columns = ["name", "value", "points", "position"]
+
+        own_players = ComunioFetcher.parse_own_player_list(FixturePages.sell_page(squad[2:]),
+                                                           FixturePages.on_sale_page(squad[0:2]))
+        if sorted(own_players, key=lambda player: player["name"]) != \
+                [{column: player[column] for column in columns} for player in squad]:
+            raise ValueError("The player list parser does not match the layout of the fixture pages")
+
+        if ComunioFetcher.parse_market_page(FixturePages.market_page(league)) != league \
+                or ComunioFetcher.parse_club_page(FixturePages.club_page(league)) != league:
+            raise ValueError("The market parsers do not match the layout of the fixture pages")
+
+    def run_configuration(self, backend: str, use_strainers: bool, iterations: int) -> float:
+        """
+        Parses the pages repeatedly using a specific parser configuration
+
+        :param backend:       the parser backend to use
+        :param use_strainers: whether or not only the relevant parts of the pages are parsed
+        :param iterations:    the amount of times the pages are parsed
+        :return:              the average time in seconds it took to parse all pages once
+        """
+        previous = HtmlParser.backend, HtmlParser.use_strainers
+        HtmlParser.set_backend(backend)
+        HtmlParser.use_strainers = use_strainers
+
+        try:
+            start = time.perf_counter()
+            for _ in range(0, iterations):
+                ComunioFetcher.parse_own_player_list(self.__pages["sell"], self.__pages["on_sale"])
+                ComunioFetcher.parse_recent_news_articles(self.__pages["news"])
+            return (time.perf_counter() - start) / iterations
+        finally:
+            HtmlParser.backend, HtmlParser.use_strainers = previous
+
+    def run(self, iterations: int) -> Dict[Tuple[str, bool], float]:
+        """
+        Runs the benchmark for every available parser configuration
+
+        :param iterations: the amount of times the pages are parsed per configuration
+        :return:           the average parse times, keyed by tuples of backend, use_strainers
+        """
+        results = {}
+        for backend in HtmlParser.get_available_backends():
+            for use_strainers in [False, True]:
+                results[(backend, use_strainers)] = self.run_configuration(backend, use_strainers, iterations)
+        return results
+
+
+def main() -> None:
+    """
+    Runs the parser benchmark and prints the results
+
+    :return: None
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--directory",
+                        help="A directory containing saved news.html, sell.html and on_sale.html pages")
+    parser.add_argument("-s", "--squad-size", type=int, default=20,
+                        help="The squad size of the generated fixture pages")
+    parser.add_argument("-i", "--iterations", type=int, default=20,
+                        help="The amount of times the pages are parsed per configuration")
+    args = parser.parse_args()
+
+    if args.directory:
+        pages = ParserBenchmark.load_pages(args.directory)
+    else:
+        ParserBenchmark.verify_fixture_layout()
+        pages = ParserBenchmark.generate_pages(args.squad_size)
+
+    results = ParserBenchmark(pages).run(args.iterations)
+    baseline = results[("html.parser", False)]
+
+    for (backend, use_strainers), duration in sorted(results.items(), key=lambda result: -result[1]):
+        configuration = backend + (" + SoupStrainer" if use_strainers else "")
+        print("{:<28} {:>9.2f} ms  {:>6.1f}x".format(configuration, duration * 1000, baseline / duration))
+
+
+if __name__ == "__main__":
+    main()
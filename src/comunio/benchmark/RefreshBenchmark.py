@@ -0,0 +1,153 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import os
+import sys
+import time
+import shutil
+import argparse
+import requests
+import tempfile
+import statistics
+from typing import Dict, List
+from comunio.scraper.FetchPlanner import FetchPlanner
+from comunio.scraper.ComunioSession import ComunioSession
+from comunio.scraper.ComunioFetcher import ComunioFetcher
+from comunio.database.DatabaseManager import DatabaseManager
+from comunio.benchmark.FixtureServer import FixtureServer
+
+
+class RefreshBenchmark(object):
+    """
+    Class that measures the individual stages of a refresh against a FixtureServer
+    """
+
+    stages = ["login", "fetch", "parse", "session", "database"]
+    """
+    The measured stages. 'session' is the complete ComunioSession construction (login, fetch and parse),
+    'database' is the construction of a DatabaseManager writing the session's data into an empty database
+    """
+
+    def __init__(self, server: FixtureServer) -> None:
+        """
+        Initializes the benchmark
+
+        :param server: the running fixture server to benchmark against
+        """
+        self.__base_url = server.get_base_url()
+
+    def run_once(self) -> Dict[str, float]:
+        """
+        Runs every stage once
+
+        :return: the duration of every stage in seconds
+        """
+        timings = {}
+
+        start = time.perf_counter()
+        session = requests.session()
+        session.post(self.__base_url + ComunioFetcher.login_page, data={"login": "fixture", "pass": "fixture"})
+        timings["login"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fetch_planner = FetchPlanner(session)
+        news = fetch_planner.get(self.__base_url + ComunioFetcher.news_page)
+        pages = fetch_planner.fetch([self.__base_url + ComunioFetcher.player_info_page + FixtureServer.comunio_id,
+                                     self.__base_url + ComunioFetcher.sell_page,
+                                     self.__base_url + ComunioFetcher.on_sale_page])
+        timings["fetch"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ComunioFetcher.parse_own_player_list(pages[self.__base_url + ComunioFetcher.sell_page],
+                                             pages[self.__base_url + ComunioFetcher.on_sale_page])
+        ComunioFetcher.get_today_transfers(FixtureServer.screen_name, ComunioFetcher.parse_recent_news_articles(news))
+        timings["parse"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        comunio_session = ComunioSession("fixture", "fixture", self.__base_url)
+        timings["session"] = time.perf_counter() - start
+
+        database_directory = tempfile.mkdtemp()
+        try:
+            start = time.perf_counter()
+            DatabaseManager(comunio_session, os.path.join(database_directory, "history.db"))
+            timings["database"] = time.perf_counter() - start
+        finally:
+            shutil.rmtree(database_directory)
+
+        return timings
+
+    def run(self, runs: int) -> Dict[str, List[float]]:
+        """
+        Runs every stage multiple times
+
+        :param runs: the amount of runs
+        :return:     the durations of every stage in seconds, keyed by the stage names
+        """
+        results = {stage: [] for stage in RefreshBenchmark.stages}
+        for _ in range(0, runs):
+            for stage, duration in self.run_once().items():
+                results[stage].append(duration)
+        return results
+
+
+def main() -> None:
+    """
+    Runs the refresh benchmark against a local fixture server and prints the results.
+    Exits with a non-zero exit code if the median duration of a complete refresh exceeds the given budget
+
+    :return: None
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--squad-size", type=int, default=20,
+                        help="The amount of players in the fixture squad")
+    parser.add_argument("-l", "--latency", type=float, default=0.05,
+                        help="The latency of every response of the fixture server in seconds")
+    parser.add_argument("-n", "--runs", type=int, default=5,
+                        help="The amount of benchmark runs")
+    parser.add_argument("-b", "--budget", type=float,
+                        help="The maximum median duration of a complete refresh (session + database) in seconds")
+    args = parser.parse_args()
+
+    with FixtureServer(squad_size=args.squad_size, latency=args.latency) as server:
+        results = RefreshBenchmark(server).run(args.runs)
+
+    for stage in RefreshBenchmark.stages:
+        print("{:<10} median {:>9.2f} ms   min {:>9.2f} ms".format(stage,
+                                                                   statistics.median(results[stage]) * 1000,
+                                                                   min(results[stage]) * 1000))
+
+    refreshes = [session + database for session, database in zip(results["session"], results["database"])]
+    total = statistics.median(refreshes)
+    print("{:<10} median {:>9.2f} ms".format("refresh", total * 1000))
+
+    if args.budget is not None and total > args.budget:
+        print("Refresh exceeded the budget of {:.2f} ms".format(args.budget * 1000))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
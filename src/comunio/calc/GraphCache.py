@@ -0,0 +1,163 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import os
+import hashlib
+import datetime
+import threading
+from typing import List
+from collections import OrderedDict
+
+
+class GraphCache(object):
+    """
+    Class that stores rendered graphs on disk, so that graphs don't have to be rendered again on the
+    next program start if the underlying data did not change.
+
+    Graphs are identified by the player, the graph mode, the graph style and a fingerprint of the
+    data points. The cache's size is bounded, once it grows too large the least recently used graphs
+    are removed. The sizes and the order of use of the cached graphs are kept in memory, the cache directory
+    is only scanned once per program run.
+    """
+
+    def __init__(self, cache_directory: str = "", max_size: int = 50 * 1024 * 1024) -> None:
+        """
+        Initializes the graph cache
+
+        :param cache_directory: the directory in which the graphs are stored. Defaults to ~/.comunio/graphs
+        :param max_size:        the maximum size of all cached graphs in bytes
+        """
+        if not cache_directory:
+            cache_directory = os.path.join(os.path.expanduser("~"), ".comunio", "graphs")
+
+        self.__cache_directory = cache_directory
+        self.__max_size = max_size
+        self.__lock = threading.Lock()
+        self.__index = None  # The sizes of the cached graphs by key, ordered from least to most recently used
+        self.__total_size = 0
+
+    @staticmethod
+    def create_key(player: str, mode: str, xkcd_mode: bool,
+                   x_values: List[datetime.date], y_values: List[int]) -> str:
+        """
+        Creates the key identifying a graph
+
+        :param player:    the name of the player
+        :param mode:      the graph mode, 'value' or 'points'
+        :param xkcd_mode: whether the graph is drawn in an XKCD style
+        :param x_values:  the dates on the x-axis
+        :param y_values:  the values on the y-axis
+        :return:          the key
+        """
+        fingerprint = hashlib.sha256()
+        fingerprint.update("\0".join([player, mode, str(xkcd_mode)]).encode("utf-8"))
+        for x_value, y_value in zip(x_values, y_values):
+            fingerprint.update((x_value.isoformat() + "=" + str(y_value) + ";").encode("utf-8"))
+        fingerprint.update(str(len(y_values)).encode("utf-8"))
+        return fingerprint.hexdigest()
+
+    def __get_path(self, key: str) -> str:
+        """
+        :param key: the key of a graph
+        :return:    the path of the file in which the graph is stored
+        """
+        return os.path.join(self.__cache_directory, key + ".png")
+
+    def get(self, key: str) -> bytes or None:
+        """
+        Loads a cached graph and marks it as recently used
+
+        :param key: the key of the graph
+        :return:    the graph as PNG image data, or None if the graph is not cached
+        """
+        path = self.__get_path(key)
+        try:
+            with open(path, "rb") as graph_file:
+                graph = graph_file.read()
+            os.utime(path, None)  # Keeps the order of use across program runs
+        except OSError:
+            return None
+
+        with self.__lock:
+            if self.__index is not None and key in self.__index:
+                self.__index.move_to_end(key)
+        return graph
+
+    def put(self, key: str, graph: bytes) -> None:
+        """
+        Stores a graph in the cache. Removes the least recently used graphs if the cache grows too large
+
+        :param key:   the key of the graph
+        :param graph: the graph as PNG image data
+        :return:      None
+        """
+        with self.__lock:
+            if not os.path.isdir(self.__cache_directory):
+                os.makedirs(self.__cache_directory)
+
+            index = self.__get_index()
+
+            path = self.__get_path(key)
+            with open(path + ".tmp", "wb") as graph_file:
+                graph_file.write(graph)
+            os.replace(path + ".tmp", path)
+
+            self.__total_size += len(graph) - index.pop(key, 0)
+            index[key] = len(graph)
+            self.__evict()
+
+    def __get_index(self) -> OrderedDict:
+        """
+        Provides the in-memory index of the cached graphs, scanning the cache directory on first use.
+        Must be called while holding the lock
+
+        :return: the sizes of the cached graphs by key, ordered from least to most recently used
+        """
+        if self.__index is None:
+            graphs = []
+            for file_name in os.listdir(self.__cache_directory):
+                if file_name.endswith(".png"):
+                    status = os.stat(os.path.join(self.__cache_directory, file_name))
+                    graphs.append((status.st_mtime, file_name[:-len(".png")], status.st_size))
+
+            self.__index = OrderedDict((key, size) for _, key, size in sorted(graphs))
+            self.__total_size = sum(self.__index.values())
+        return self.__index
+
+    def __evict(self) -> None:
+        """
+        Removes the least recently used graphs until the cache's size is within its bounds.
+        Must be called while holding the lock
+
+        :return: None
+        """
+        while self.__total_size > self.__max_size and len(self.__index) > 0:
+            key, size = self.__index.popitem(last=False)
+            self.__total_size -= size
+            try:
+                os.remove(self.__get_path(key))
+            except OSError:
+                pass
@@ -0,0 +1,102 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import io
+import datetime
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+
+
+class GraphRenderer(object):
+    """
+    Class that renders time graphs into in-memory PNG images.
+
+    It uses matplotlib's object oriented Figure API with an Agg canvas that is reused for every graph,
+    so no global pyplot state and no temporary files are involved. Matplotlib's style settings are global
+    however, which is why rendering is serialized using a lock shared by all renderers. This makes
+    it safe to render graphs from worker threads.
+    """
+
+    render_lock = threading.RLock()
+    """
+    Lock that is held while a graph is rendered, since matplotlib's rcParams are shared by all threads
+    """
+
+    def __init__(self, xkcd_mode: bool = False, width: float = 6.4, height: float = 4.8, dpi: int = 50) -> None:
+        """
+        Initializes the renderer. Matplotlib is only imported at this point, since it takes a long time to load
+
+        :param xkcd_mode: if set, the graphs are drawn in an XKCD style
+        :param width:     the width of the graphs in inches
+        :param height:    the height of the graphs in inches
+        :param dpi:       the resolution of the graphs in dots per inch
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.__xkcd_mode = xkcd_mode
+        self.__dpi = dpi
+        self.__figure = Figure(figsize=(width, height), dpi=dpi)
+        self.__canvas = FigureCanvasAgg(self.__figure)
+
+    @contextmanager
+    def __style(self) -> Iterator[None]:
+        """
+        Applies the renderer's style while the context is active
+
+        :return: None
+        """
+        if self.__xkcd_mode:
+            import matplotlib.pyplot as pyplot
+            with pyplot.xkcd():
+                yield
+        else:
+            yield
+
+    def render(self, x_values: List[datetime.date], y_values: List[int]) -> bytes:
+        """
+        Renders a time graph
+
+        :param x_values: the dates on the x-axis
+        :param y_values: the values on the y-axis
+        :return:         the graph as PNG image data, which can for example be loaded using QPixmap.loadFromData()
+        """
+        from matplotlib.dates import DateFormatter, DayLocator
+
+        with GraphRenderer.render_lock, self.__style():
+            self.__figure.clear()
+            axes = self.__figure.add_subplot(1, 1, 1)
+            axes.xaxis.set_major_formatter(DateFormatter("%Y-%m-%d"))
+            axes.xaxis.set_major_locator(DayLocator())
+            axes.plot(x_values, y_values, "-o")
+            self.__figure.autofmt_xdate()
+
+            image = io.BytesIO()
+            self.__canvas.print_png(image)
+            self.__figure.clear()
+
+        return image.getvalue()
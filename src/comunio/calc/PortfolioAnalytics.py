@@ -0,0 +1,319 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import numpy
+import datetime
+import warnings
+from typing import Dict, List, Tuple
+from comunio.database.HistoryCache import HistoryCache
+from comunio.database.DatabaseManager import DatabaseManager
+
+
+class PortfolioAnalytics(object):
+    """
+    Class that calculates statistics for all players over a window of days at once.
+
+    The player history is loaded into two matrices with one row per player and one column per day, which
+    contain the players' values and points. Days without an entry are filled with the previously
+    recorded entry, days before a player's first entry and after a player's last entry are NaN, so players
+    that left the squad don't get made-up values. All statistics are calculated on these matrices using NumPy
+    instead of iterating over players and days in Python.
+    """
+
+    metrics = ["profit", "points_per_million", "volatility", "max_drawdown", "average_return"]
+    """
+    The metrics calculated for every player by get_player_metrics()
+    """
+
+    def __init__(self, database_manager: DatabaseManager, oldest_day: int = None, newest_day: int = 0) -> None:
+        """
+        Loads the player history and the manager's assets of the given window of days
+
+        :param database_manager: the database manager to read the history from
+        :param oldest_day:       the oldest day to consider, relative to the current date.
+                                 If None, the window starts at the first recorded entry
+        :param newest_day:       the newest day to consider, relative to the current date. Defaults to today
+        """
+        today = datetime.datetime.utcnow().date()
+        history_cache = database_manager.get_history_cache()
+        end_ordinal = (today + datetime.timedelta(days=newest_day)).toordinal()
+
+        if oldest_day is not None:
+            start_ordinal = (today + datetime.timedelta(days=oldest_day)).toordinal()
+        else:
+            first_dates = [history_cache.get_columns(name)[0][0] for name in history_cache.get_player_names()]
+            start_ordinal = min(first_dates) if len(first_dates) > 0 else end_ordinal
+
+        self.__start_ordinal = start_ordinal
+        days = max(end_ordinal - start_ordinal + 1, 0)
+
+        players = []
+        values = []
+        points = []
+        last_columns = []
+        for name in history_cache.get_player_names():
+            dates, _, player_values, player_points = history_cache.get_columns(name, None, end_ordinal)
+            if len(dates) == 0 or dates[-1] < start_ordinal:
+                continue
+
+            ordinals = numpy.frombuffer(dates, dtype=numpy.dtype(dates.typecode))
+            first = int(numpy.searchsorted(ordinals, start_ordinal))
+
+            # The last entry before the window is placed in the first column, so that it can be carried forward
+            if first == len(ordinals) or ordinals[first] != start_ordinal:
+                first = max(first - 1, 0)
+            columns = numpy.clip(ordinals[first:] - start_ordinal, 0, None)
+
+            value_row = numpy.full(days, numpy.nan)
+            point_row = numpy.full(days, numpy.nan)
+            value_row[columns] = numpy.frombuffer(player_values, dtype=numpy.dtype(player_values.typecode))[first:]
+            point_row[columns] = numpy.frombuffer(player_points, dtype=numpy.dtype(player_points.typecode))[first:]
+
+            players.append(name)
+            values.append(value_row)
+            points.append(point_row)
+            last_columns.append(columns[-1])
+
+        self.__players = players
+        self.__last_columns = numpy.array(last_columns, dtype=int)
+        self.__values = self.__forward_fill(numpy.array(values).reshape(len(players), days), self.__last_columns)
+        self.__points = self.__forward_fill(numpy.array(points).reshape(len(players), days), self.__last_columns)
+
+        buy_values = database_manager.get_player_buy_values()
+        self.__buy_values = numpy.array([buy_values.get(name, numpy.nan) for name in players], dtype=float)
+
+        assets = numpy.full(days, numpy.nan)
+        last_asset_column = -1
+        for entry in database_manager.get_manager_stats_history():
+            column = HistoryCache.to_ordinal(entry["date"]) - start_ordinal
+            if 0 <= column < days:
+                assets[column] = entry["cash"] + entry["team_value"]
+                last_asset_column = max(last_asset_column, column)
+        self.__assets = self.__forward_fill(assets.reshape(1, days), numpy.array([last_asset_column]))[0]
+
+    @staticmethod
+    def __forward_fill(matrix: numpy.ndarray, last_columns: numpy.ndarray) -> numpy.ndarray:
+        """
+        Replaces NaN entries with the last previous entry in the same row that is not NaN,
+        up to the last observed column of every row
+
+        :param matrix:       the matrix to fill
+        :param last_columns: the column of the last real entry of every row
+        :return:             the filled matrix. Entries without a previous entry and entries after a row's
+                             last observed column stay NaN
+        """
+        if matrix.size == 0:
+            return matrix
+        indexes = numpy.where(numpy.isnan(matrix), 0, numpy.arange(matrix.shape[1]))
+        numpy.maximum.accumulate(indexes, axis=1, out=indexes)
+        filled = matrix[numpy.arange(matrix.shape[0])[:, None], indexes]
+        filled[numpy.arange(matrix.shape[1]) > last_columns[:, None]] = numpy.nan
+        return filled
+
+    @staticmethod
+    def __returns(matrix: numpy.ndarray) -> numpy.ndarray:
+        """
+        :param matrix: a matrix with one time series per row
+        :return:       the relative changes from one column to the next, one column less than the matrix
+        """
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            return matrix[:, 1:] / matrix[:, :-1] - 1
+
+    @staticmethod
+    def __drawdowns(matrix: numpy.ndarray) -> numpy.ndarray:
+        """
+        :param matrix: a matrix with one time series per row
+        :return:       the largest relative decline from a previous peak of every row, as a negative fraction
+        """
+        if matrix.shape[1] == 0:
+            return numpy.full(matrix.shape[0], numpy.nan)
+        peaks = numpy.fmax.accumulate(matrix, axis=1)
+        with numpy.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return numpy.nanmin(matrix / peaks - 1, axis=1)
+
+    def get_players(self) -> List[str]:
+        """
+        :return: the names of the players, in the order of the rows of all calculated matrices
+        """
+        return list(self.__players)
+
+    def get_dates(self) -> List[datetime.date]:
+        """
+        :return: the dates of the window, in the order of the columns of the value and points matrices
+        """
+        return [datetime.date.fromordinal(self.__start_ordinal + i) for i in range(self.__values.shape[1])]
+
+    def get_values(self) -> numpy.ndarray:
+        """
+        :return: the players' values, one row per player and one column per day
+        """
+        return self.__values
+
+    def get_points(self) -> numpy.ndarray:
+        """
+        :return: the players' points, one row per player and one column per day
+        """
+        return self.__points
+
+    def get_daily_returns(self) -> numpy.ndarray:
+        """
+        :return: the relative daily changes of the players' values, one row per player and one column per day
+                 except the first one
+        """
+        return self.__returns(self.__values)
+
+    def get_rolling_averages(self, window: int) -> numpy.ndarray:
+        """
+        Calculates the moving averages of the players' values
+
+        :param window:      the amount of days that are averaged
+        :raises ValueError: if the window is smaller than one day
+        :return:            the averages, one row per player and one column per day.
+                            Days without a full window of entries are NaN
+        """
+        if window < 1:
+            raise ValueError("The window must contain at least one day")
+
+        sums = numpy.cumsum(numpy.nan_to_num(self.__values), axis=1)
+        counts = numpy.cumsum(~numpy.isnan(self.__values), axis=1)
+        sums[:, window:] = sums[:, window:] - sums[:, :-window]
+        counts[:, window:] = counts[:, window:] - counts[:, :-window]
+
+        averages = numpy.full(self.__values.shape, numpy.nan)
+        full = counts == window
+        averages[full] = sums[full] / window
+        return averages
+
+    def get_volatilities(self) -> numpy.ndarray:
+        """
+        :return: the standard deviation of every player's daily returns
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return numpy.nanstd(self.get_daily_returns(), axis=1)
+
+    def get_average_returns(self) -> numpy.ndarray:
+        """
+        :return: the mean of every player's daily returns
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return numpy.nanmean(self.get_daily_returns(), axis=1)
+
+    def get_max_drawdowns(self) -> numpy.ndarray:
+        """
+        :return: the largest relative decline of every player's value from a previous peak, as a negative fraction
+        """
+        return self.__drawdowns(self.__values)
+
+    def get_points_per_million(self) -> numpy.ndarray:
+        """
+        :return: every player's points on the player's last recorded day of the window per million of the
+                 player's value on that day
+        """
+        if self.__values.shape[1] == 0:
+            return numpy.full(len(self.__players), numpy.nan)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            return self.__get_last_entries(self.__points) / (self.__get_last_entries(self.__values) / 1000000)
+
+    def get_profits(self) -> numpy.ndarray:
+        """
+        :return: the difference between every player's value on the player's last recorded day of the window and
+                 the player's buy value. NaN for players that are not part of the squad
+        """
+        if self.__values.shape[1] == 0:
+            return numpy.full(len(self.__players), numpy.nan)
+        return self.__get_last_entries(self.__values) - self.__buy_values
+
+    def __get_last_entries(self, matrix: numpy.ndarray) -> numpy.ndarray:
+        """
+        :param matrix: the value or points matrix
+        :return:       the entry of every player's last recorded day in the window
+        """
+        return matrix[numpy.arange(len(self.__players)), self.__last_columns]
+
+    def get_total_assets(self) -> numpy.ndarray:
+        """
+        :return: the manager's cash and team value combined, one entry per day
+        """
+        return self.__assets
+
+    def get_total_assets_returns(self) -> numpy.ndarray:
+        """
+        :return: the relative daily changes of the manager's total assets
+        """
+        return self.__returns(self.__assets.reshape(1, -1))[0]
+
+    def get_total_assets_max_drawdown(self) -> float:
+        """
+        :return: the largest relative decline of the manager's total assets from a previous peak
+        """
+        return float(self.__drawdowns(self.__assets.reshape(1, -1))[0])
+
+    def get_metric(self, metric: str) -> numpy.ndarray:
+        """
+        Calculates a metric for every player
+
+        :param metric:      the name of the metric, one of PortfolioAnalytics.metrics
+        :raises ValueError: if the metric does not exist
+        :return:            the metric's values, in the order of get_players()
+        """
+        if metric == "profit":
+            return self.get_profits()
+        elif metric == "points_per_million":
+            return self.get_points_per_million()
+        elif metric == "volatility":
+            return self.get_volatilities()
+        elif metric == "max_drawdown":
+            return self.get_max_drawdowns()
+        elif metric == "average_return":
+            return self.get_average_returns()
+        else:
+            raise ValueError("Unknown metric " + metric)
+
+    def get_player_metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Calculates all metrics for every player
+
+        :return: a dictionary mapping the players' names to dictionaries of their metrics
+        """
+        columns = {metric: self.get_metric(metric) for metric in PortfolioAnalytics.metrics}
+        return {name: {metric: float(columns[metric][i]) for metric in PortfolioAnalytics.metrics}
+                for i, name in enumerate(self.__players)}
+
+    def rank_players(self, metric: str, descending: bool = True) -> List[Tuple[str, float]]:
+        """
+        Ranks the players by one of the metrics. Players for whom the metric is unknown are omitted
+
+        :param metric:      the name of the metric, one of PortfolioAnalytics.metrics
+        :param descending:  sorts the largest values first if set, the smallest ones otherwise
+        :raises ValueError: if the metric does not exist
+        :return:            the players' names and their metric values, sorted
+        """
+        column = self.get_metric(metric)
+        order = numpy.argsort(-column if descending else column, kind="stable")
+        return [(self.__players[i], float(column[i])) for i in order if not numpy.isnan(column[i])]
@@ -25,33 +25,49 @@ LICENSE
 # imports
 import os
 import datetime
-import matplotlib.dates as dates
-import matplotlib.pyplot as pyplot
-from comunio.scraper.ComunioSession import ComunioSession
+from typing import List, Tuple, TYPE_CHECKING
+from comunio.calc.GraphCache import GraphCache
+from comunio.calc.GraphRenderer import GraphRenderer
 from comunio.database.DatabaseManager import DatabaseManager
 
+if TYPE_CHECKING:
+    from comunio.scraper.ComunioSession import ComunioSession
+
 
 class StatisticsCalculator(object):
     """
     Class that calculates various statistics based on the current comunio data and the local database
     """
 
-    def __init__(self, comunio_session: ComunioSession, database_manager: DatabaseManager, xkcd_mode: bool =False)\
-            -> None:
+    def __init__(self, comunio_session: "ComunioSession", database_manager: DatabaseManager, xkcd_mode: bool =False,
+                 graph_cache: GraphCache = None) -> None:
         """
         Initializes the statistics calculator with a running comunio session and a database manager
         to interface with the local database
 
-        :param comunio_session:  the comunio session
+        :param comunio_session:  the comunio session, may be None if working offline
         :param database_manager: the database manager
         :param xkcd_mode:        if set, the graphs generated by this class will be drawn in an XKCD style
+        :param graph_cache:      if provided, rendered graphs are stored in and loaded from this cache
         """
         self.__comunio_session = comunio_session
         self.__database_manager = database_manager
-        self.__pyplot_figure = pyplot.figure()
+        self.__xkcd_mode = xkcd_mode
+        self.__renderer = None
+        self.__graph_cache = graph_cache
+
+    def __get_renderer(self) -> GraphRenderer:
+        """
+        Creates the renderer used to draw the graphs on first use.
+        Matplotlib is only loaded at this point, since it takes a long time to load and is not needed
+        for calculations that don't involve graphs
 
-        if xkcd_mode:
-            pyplot.xkcd()
+        :return: the graph renderer
+        """
+        with GraphRenderer.render_lock:
+            if self.__renderer is None:
+                self.__renderer = GraphRenderer(self.__xkcd_mode)
+        return self.__renderer
 
     def calculate_total_assets_delta(self) -> int:
         """
@@ -60,51 +76,86 @@ class StatisticsCalculator(object):
 
         :return: the difference between the values
         """
-        assets = self.__database_manager.get_last_cash_amount() + self.__database_manager.get_last_team_value_amount()
-        return assets - 40000000
+        assets = self.__database_manager.get_latest_assets()
+        total_assets = 0 if assets is None else assets["cash"] + assets["team_value"]
+        return total_assets - 40000000
 
-    def generate_time_graph(self, player: str, mode: str) -> str:
+    def get_time_graph_data(self, player: str, mode: str) -> Tuple[List[datetime.date], List[int]]:
         """
-        Generates a value/time or a points/time graph for a given player's history as an image file,
-        later to be integrated into a GUI.
+        Collects the data points of a value/time or a points/time graph for a given player's history.
+        In 'value' mode, the graph starts with the player's buy value one day before the first recorded value,
+        if the buy value is known
 
         :param player: the name of the player for whom the graph will be generated
         :param mode:   the type of value on the y-axis, can be 'points' or 'value'
-        :return:       the path to the image in which the graph is stored
+        :return:       the dates on the x-axis and the values on the y-axis, chronologically sorted
         """
-        historic_data = self.__database_manager.get_historic_data_for_player(player)
+        dates, values, points = self.__database_manager.get_player_time_series(player)
 
-        x_values = []
-        y_values = [] if mode == "points" else [self.__database_manager.get_player_buy_value(player)]
+        if mode == "points":
+            return dates, points
 
-        smallest_date = datetime.datetime.utcnow()
-        i = len(historic_data) - 1
-        while i > -1:
-            data_point = historic_data[i]
-            data_date = datetime.datetime.strptime(data_point["date"], "%Y-%m-%d")
+        buy_value = self.__database_manager.get_player_buy_value(player)
+        if buy_value is None:
+            return dates, values
+
+        # The buy value is shown one day before the first recorded value
+        first_date = dates[0] if len(dates) > 0 else datetime.datetime.utcnow().date()
+        x_values = [first_date - datetime.timedelta(days=1)] + dates
+        y_values = [buy_value] + values
+        return x_values, y_values
+
+    def render_time_graph(self, player: str, mode: str) -> bytes:
+        """
+        Renders a value/time or a points/time graph for a given player's history into an in-memory PNG image
+
+        :param player: the name of the player for whom the graph will be generated
+        :param mode:   the type of value on the y-axis, can be 'points' or 'value'
+        :return:       the graph as PNG image data
+        """
+        x_values, y_values = self.get_time_graph_data(player, mode)
+        return self.render_graph(player, mode, x_values, y_values)
 
-            x_values.append(data_date.date())
-            y_values.append(data_point[mode])
+    def render_graph(self, player: str, mode: str, x_values: List[datetime.date], y_values: List[int]) -> bytes:
+        """
+        Renders previously collected graph data into an in-memory PNG image, or loads it from the graph cache
+        if the same data was rendered before.
+        Unlike the other methods, this method does not access the database and may be called from any thread
+
+        :param player:   the name of the player for whom the graph will be generated
+        :param mode:     the type of value on the y-axis, can be 'points' or 'value'
+        :param x_values: the dates on the x-axis
+        :param y_values: the values on the y-axis
+        :return:         the graph as PNG image data
+        """
+        if self.__graph_cache is None:
+            return self.__get_renderer().render(x_values, y_values)
 
-            if mode == "value":
-                smallest_date = smallest_date if smallest_date < data_date else data_date
+        key = GraphCache.create_key(player, mode, self.__xkcd_mode, x_values, y_values)
+        graph = self.__graph_cache.get(key)
 
-            i -= 1
+        if graph is None:
+            graph = self.__get_renderer().render(x_values, y_values)
+            self.__graph_cache.put(key, graph)
 
-        if mode == "value":
-            x_values = [(smallest_date - datetime.timedelta(days=1)).date()] + x_values
+        return graph
 
-        pyplot.gca().xaxis.set_major_formatter(dates.DateFormatter("%Y-%m-%d"))
-        pyplot.gca().xaxis.set_major_locator(dates.DayLocator())
-        pyplot.plot(x_values, y_values, "-o")
-        pyplot.gcf().autofmt_xdate()
+    def generate_time_graph(self, player: str, mode: str) -> str:
+        """
+        Generates a value/time or a points/time graph for a given player's history as an image file.
+        Use render_time_graph() to avoid writing the image to disk
 
-        image_name = (player + "-" + mode).replace(".", "_").replace(" ", "_")
+        :param player: the name of the player for whom the graph will be generated
+        :param mode:   the type of value on the y-axis, can be 'points' or 'value'
+        :return:       the path to the image in which the graph is stored
+        """
+        image_name = (player + "-" + mode).replace(".", "_").replace(" ", "_") + ".png"
         image_path = os.path.join(os.path.expanduser("~"), ".comunio", "images", image_name)
 
         if not os.path.isdir(os.path.dirname(image_path)):
             os.makedirs(os.path.dirname(image_path))
 
-        self.__pyplot_figure.savefig(image_path, dpi=self.__pyplot_figure.dpi / 2)
-        self.__pyplot_figure.clear()
-        return image_path + ".png"
+        with open(image_path, "wb") as image_file:
+            image_file.write(self.render_time_graph(player, mode))
+
+        return image_path
@@ -25,7 +25,7 @@ LICENSE
 # imports
 import os
 import configparser
-from typing import Tuple
+from typing import Dict, List, Tuple
 
 
 class CredentialsManager(object):
@@ -53,20 +53,21 @@ class CredentialsManager(object):
 
     def get_credentials_from_config(self) -> Tuple[str, str]:
         """
-        Parses the local config file for a username and password
+        Parses the local config file for a username and password.
+        If there is no config file yet, an empty one is created. An existing config file is never modified,
+        even if it contains no credentials, since it may still contain other sections like account profiles
 
         :return: username, password
         """
-        try:
-            parser = configparser.ConfigParser()
-            parser.read(self.config_file_location)
-            self.username = parser.get("credentials", "username")
-            self.password = parser.get("credentials", "password")
-        except (KeyError, configparser.NoSectionError, FileNotFoundError):
+        if not os.path.isfile(self.config_file_location):
             with open(self.config_file_location, 'w') as config:
                 config.write("[credentials]\nusername=\npassword=\n")
-            self.username = ""
-            self.password = ""
+
+        parser = configparser.ConfigParser(interpolation=None)
+        parser.read(self.config_file_location)
+        self.username = parser.get("credentials", "username", fallback="")
+        self.password = parser.get("credentials", "password", fallback="")
+        return self.username, self.password
 
     def get_credentials(self) -> Tuple[str, str]:
         """
@@ -95,5 +96,50 @@ class CredentialsManager(object):
 
         :return: None
         """
+        # Other sections, like account profiles, are preserved
+        parser = configparser.ConfigParser(interpolation=None)
+        parser.read(self.config_file_location)
+        if not parser.has_section("credentials"):
+            parser.add_section("credentials")
+        parser.set("credentials", "username", self.username)
+        parser.set("credentials", "password", self.password)
+
         with open(self.config_file_location, 'w') as config:
-            config.write("[credentials]\nusername=" + self.username + "\npassword=" + self.password + "\n")
+            parser.write(config)
+
+    def get_account_profiles(self) -> List[Dict[str, str]]:
+        """
+        Parses the account profiles from the local config file. Every profile is defined in its own section,
+        whose name starts with 'account ':
+
+            [account alice]
+            username=alice
+            password=hunter2
+            database=/path/to/alice.db
+
+        The database entry is optional, by default every account uses ~/.comunio/accounts/<profile>.db
+
+        :raises ValueError: if a profile does not define a username or password
+        :return:            the profiles as dictionaries with the keys 'name', 'username', 'password' and 'database'
+        """
+        parser = configparser.ConfigParser(interpolation=None)
+        parser.read(self.config_file_location)
+        accounts_dir = os.path.join(os.path.dirname(self.config_file_location), "accounts")
+
+        profiles = []
+        for section in parser.sections():
+            if not section.startswith("account "):
+                continue
+
+            name = section[len("account "):].strip()
+            username = parser.get(section, "username", fallback="")
+            password = parser.get(section, "password", fallback="")
+            if not username or not password:
+                raise ValueError("The account profile " + name + " does not define a username and a password")
+
+            profiles.append({"name": name,
+                             "username": username,
+                             "password": password,
+                             "database": parser.get(section, "database",
+                                                    fallback=os.path.join(accounts_dir, name + ".db"))})
+        return profiles
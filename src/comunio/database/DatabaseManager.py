@@ -27,9 +27,15 @@ LICENSE
 import os
 import sqlite3
 import datetime
-from typing import Dict, List
+from typing import Dict, List, Tuple, TYPE_CHECKING
 from comunio.database.SqlQueries import SqlQueries
-from comunio.scraper.ComunioSession import ComunioSession
+from comunio.database.HistoryCache import HistoryCache
+from comunio.database.HistoryImporter import HistoryImporter
+from comunio.database.HistoryExporter import HistoryExporter
+from comunio.scraper.TokenBucket import TokenBucket
+
+if TYPE_CHECKING:
+    from comunio.scraper.ComunioSession import ComunioSession
 
 
 class DatabaseManager(object):
@@ -37,13 +43,21 @@ class DatabaseManager(object):
     Class that manages the local comunio database
     """
 
-    def __init__(self, comunio_session: ComunioSession, database_location_override: str = "") -> None:
+    def __init__(self, comunio_session: "ComunioSession" = None, database_location_override: str = "",
+                 journal_mode: str = "WAL", synchronous: str = "NORMAL", use_history_cache: bool = False) -> None:
         """
-        Initializes the DatabaseManager object using a previously established comunio session
+        Initializes the DatabaseManager object using a previously established comunio session.
+        If a session is provided, the database is updated right away.
 
-        :param comunio_session:             A previously established comunio session
-                                            The database won't be able to update in offline mode
+        :param comunio_session:             A previously established comunio session. If None, the database is
+                                            opened in offline mode, in which it can only be read until a session
+                                            is provided using set_comunio_session()
         :param database_location_override:  Overrules the standard database location. Useful for testing
+        :param journal_mode:                The sqlite journal mode to use
+        :param synchronous:                 The sqlite synchronous setting to use. NORMAL is safe in WAL mode,
+                                            FULL additionally makes every refresh durable on power loss
+        :param use_history_cache:           If set, the player history is loaded into a HistoryCache on first use
+                                            and read from memory afterwards
         """
         self.__date = self.__create_sqlite_date(0)
 
@@ -58,10 +72,39 @@ class DatabaseManager(object):
             database_path = database_location_override
 
         self.__comunio_session = comunio_session
+        self.__database_path = database_path
+        self.__history_cache = HistoryCache() if use_history_cache else None
+        self.__history_cache_loaded = False
         self.__database = sqlite3.connect(database_path)
+        SqlQueries.configure_connection(self.__database, journal_mode, synchronous)
         SqlQueries.apply_sql_schema(self.__database)
 
-        self.update_database()
+        if self.__comunio_session is not None:
+            self.update_database()
+
+    def get_database_path(self) -> str:
+        """
+        :return: the location of the database file
+        """
+        return self.__database_path
+
+    def close(self) -> None:
+        """
+        Closes the database connection. The database manager can't be used anymore afterwards
+
+        :return: None
+        """
+        self.__database.close()
+
+    def set_comunio_session(self, comunio_session: "ComunioSession") -> None:
+        """
+        Provides a comunio session to a database manager, enabling updates of an offline database.
+        The database is not updated automatically, update_database() has to be called explicitly
+
+        :param comunio_session: the established comunio session
+        :return:                None
+        """
+        self.__comunio_session = comunio_session
 
     # noinspection PyMethodMayBeStatic
     def __create_sqlite_date(self, day: int = 0) -> str:
@@ -86,12 +129,10 @@ class DatabaseManager(object):
         """
         Updates the 'players' table
 
-        :raises
         :return: None
         """
         players = self.__comunio_session.get_own_player_list()
-        for player in players:
-            SqlQueries.insert_player_into_players(self.__database, player, self.__date)
+        SqlQueries.insert_players_into_players(self.__database, players, self.__date)
 
     def __update_manager_stats_table(self) -> None:
         """
@@ -109,12 +150,16 @@ class DatabaseManager(object):
 
         :return: None
         """
-        transfers = self.__comunio_session.get_today_transfers()
-        for transfer in transfers:
+        bought = []
+        sold = []
+        for transfer in self.__comunio_session.get_today_transfers():
             if transfer["type"] == "bought":
-                SqlQueries.insert_player_info(self.__database, transfer["name"], transfer["amount"], None)
+                bought.append((transfer["name"], transfer["amount"], None))
             else:
-                SqlQueries.update_player_info(self.__database, transfer["name"], None, transfer["amount"])
+                sold.append((transfer["name"], transfer["amount"]))
+
+        SqlQueries.insert_player_infos(self.__database, bought)
+        SqlQueries.update_player_sell_values(self.__database, sold)
 
     def __update_transfers_from_unregistered_player(self) -> None:
         """
@@ -127,11 +172,16 @@ class DatabaseManager(object):
         :return: None
         """
 
-        player_infos = SqlQueries.get_player_names_with_null_sell_value(self.__database)
+        player_infos = set(SqlQueries.get_player_names_with_null_sell_value(self.__database))
+
+        # Today's entries were just written in the ongoing transaction, so they are read from the database
+        # instead of the history cache, which only gets reloaded after the update
+        unregistered = []
+        for name, _, value, _, _ in SqlQueries.get_player_list_on_date(self.__database, self.__date):
+            if (name,) not in player_infos:
+                unregistered.append((name, value, None))
 
-        for player in self.get_players_on_day(0):
-            if (player["name"],) not in player_infos:
-                SqlQueries.insert_player_info(self.__database, player["name"], player["value"], None)
+        SqlQueries.insert_player_infos(self.__database, unregistered)
 
     def __update_transfers_from_missing_player(self) -> None:
         """
@@ -139,54 +189,154 @@ class DatabaseManager(object):
         but do not appear in today's list of players.
 
         This method is prone to loss of information, since the new sell_value is determined by using the last known
-        market value. If an appropriate previous market value was not found in the last 15 entries, the
+        market value. If an appropriate previous market value was not found in the last 15 days, the
         initial buy_value is used.
 
         :return: None
         """
-        player_infos = SqlQueries.get_player_names_with_null_sell_value(self.__database)
-
-        for player in player_infos:
-
-            is_still_in_team = False
-            for today_player in self.get_players_on_day(0):
-                if today_player["name"] == player[0]:
-                    is_still_in_team = True
-                    break
-
-            if not is_still_in_team:
-
-                market_value = None
-                day_counter = -1
-
-                while market_value is None:
-                    for older_player in self.get_players_on_day(day_counter):
-                        if older_player["name"] == player:
-                            market_value = older_player["value"]
-                            break
+        today_players = set(player[0] for player in SqlQueries.get_player_list_on_date(self.__database, self.__date))
+        buy_values = dict(SqlQueries.get_unsold_player_buy_values(self.__database))
+        missing_players = [name for name in buy_values if name not in today_players]
 
-                    day_counter -= 1
+        if len(missing_players) == 0:
+            return
 
-                    if day_counter < 15:
-                        market_value = SqlQueries.get_buy_value_of_player(self.__database, player[0])
+        last_known_values = dict(SqlQueries.get_last_known_values_of_unsold_players(self.__database,
+                                                                                    self.__date,
+                                                                                    self.__create_sqlite_date(-15)))
 
-                SqlQueries.update_player_info(self.__database, player[0], None, market_value[0])
+        sell_values = [(name, last_known_values.get(name, buy_values[name])) for name in missing_players]
+        SqlQueries.update_player_sell_values(self.__database, sell_values)
 
-    def update_database(self) -> None:
+    def update_database(self) -> bool:
         """
-        Updates the local database with current information from comunio
+        Updates the local database with current information from comunio.
+        All changes are written in a single transaction, so a failed update never leaves a half-written day behind.
+        The current date is determined anew on every call, so long-running processes always update the right day
 
-        :return: None
+        :raises ConnectionError: if the database was opened in offline mode
+        :return:                 True if the database was updated, False if today's data had already been entered
         """
+        if self.__comunio_session is None:
+            raise ConnectionError("No comunio session available, can not update the database in offline mode")
+
+        self.__date = self.__create_sqlite_date(0)
         today_results = SqlQueries.get_player_list_on_date(self.__database, self.__date)
-        if len(today_results) == 0:  # Check if today's data has already been entered
+        if len(today_results) > 0:  # Check if today's data has already been entered
+            return False
 
+        with SqlQueries.transaction(self.__database):
             self.__update_players_table()
             self.__update_manager_stats_table()
             self.__update_transfers_from_news()
             self.__update_transfers_from_missing_player()
             self.__update_transfers_from_unregistered_player()
-            self.__database.commit()
+            SqlQueries.refresh_aggregates(self.__database, [self.__date])
+
+        self.invalidate_history_cache()
+        return True
+
+    def update_market(self, requests_per_second: float = 2.0, max_workers: int = 4) -> int:
+        """
+        Crawls the market values and points of all players in the league and stores them in the
+        'market_players' table under today's date. Crawling again on the same day replaces the day's entries
+
+        :param requests_per_second: the maximum average amount of requests sent to comunio per second
+        :param max_workers:         the maximum amount of pages downloaded at the same time
+        :raises ConnectionError:    if the database was opened in offline mode, the network connection failed or
+                                    the crawl did not find any players. Nothing is stored in that case
+        :return:                    the amount of stored players
+        """
+        if self.__comunio_session is None:
+            raise ConnectionError("No comunio session available, can not crawl the market in offline mode")
+
+        players = self.__comunio_session.get_market_players(TokenBucket(requests_per_second, max_workers),
+                                                            max_workers)
+        if len(players) == 0:
+            raise ConnectionError("The market crawl did not find any players")
+
+        with SqlQueries.transaction(self.__database):
+            SqlQueries.insert_market_players(self.__database, players, self.__create_sqlite_date(0))
+        return len(players)
+
+    def get_market_players_on_day(self, day: int = 0) -> List[Dict[str, str or int]]:
+        """
+        Fetches the market players recorded on the given day relative to today
+
+        :param day: the day, 0 is today, -1 is yesterday
+        :return:    the players as dictionaries with the keys name, club, position, value, points and date,
+                    sorted by name and club
+        """
+        return [{"name": name, "club": club, "position": position, "value": value, "points": points, "date": date}
+                for name, club, position, value, points, date
+                in SqlQueries.get_market_players_on_date(self.__database, self.__create_sqlite_date(day))]
+
+    def import_history(self, path: str, batch_size: int = 10000) -> Dict[str, int]:
+        """
+        Imports historic player values, points, transfers, manager stats and market players from a CSV or
+        JSON lines file.
+        Entries that already exist in the database are skipped. See HistoryImporter for the supported formats
+
+        :param path:        the path to the file
+        :param batch_size:  the amount of records written per transaction
+        :raises ValueError: if a record in the file is malformed
+        :return:            the amount of records read ('records') and the amount of new entries
+                            per table ('players', 'market_players', 'manager_stats', 'player_info')
+        """
+        try:
+            return HistoryImporter(self.__database, batch_size).import_file(path)
+        finally:
+            self.invalidate_history_cache()
+
+    def export_history(self, path: str, table: str = "players", export_format: str = None, start_date: str = None,
+                       end_date: str = None, players: List[str] = None) -> int:
+        """
+        Streams a table of the local database into a CSV, JSON lines or Parquet file.
+        See HistoryExporter for the available tables and formats
+
+        :param path:          the path of the file, or '-' to write CSV or JSON lines to the standard output
+        :param table:         the table to export
+        :param export_format: the format. Determined using the file extension if not provided
+        :param start_date:    the oldest date to export (inclusive) in the format YYYY-MM-DD, may be None
+        :param end_date:      the newest date to export (inclusive) in the format YYYY-MM-DD, may be None
+        :param players:       the names of the players to export, may be None to export all players
+        :raises ValueError:   if the table or format is not supported
+        :raises ImportError:  if a Parquet export is requested, but pyarrow is not installed
+        :return:              the amount of exported rows
+        """
+        return HistoryExporter(self.__database).export(path, table, export_format, start_date, end_date, players)
+
+    def get_history_cache(self) -> HistoryCache:
+        """
+        Provides the in-memory copy of the player history, loading it from the database if necessary.
+        If the history cache is disabled, a freshly loaded copy is returned, which is not kept
+
+        :return: the history cache
+        """
+        if self.__history_cache is None:
+            history_cache = HistoryCache()
+            history_cache.load(self.__database)
+            return history_cache
+
+        if not self.__history_cache_loaded:
+            self.__history_cache.load(self.__database)
+            self.__history_cache_loaded = True
+        return self.__history_cache
+
+    def __get_enabled_history_cache(self) -> HistoryCache or None:
+        """
+        :return: the loaded history cache, or None if the history cache is disabled
+        """
+        return self.get_history_cache() if self.__history_cache is not None else None
+
+    def invalidate_history_cache(self) -> None:
+        """
+        Marks the history cache as outdated, it is loaded again on the next read.
+        Must be called if the database was modified using a different connection
+
+        :return: None
+        """
+        self.__history_cache_loaded = False
 
     def get_players_on_day(self, day: int = 0) -> List[Dict[str, str or int]]:
         """
@@ -209,9 +359,34 @@ class DatabaseManager(object):
         if day > 0:
             raise ValueError("Day must be 0 or negative")
 
-        date = self.__create_sqlite_date(day)
+        return self.__get_players_on_date(self.__create_sqlite_date(day))
+
+    def get_latest_players(self) -> List[Dict[str, str or int]]:
+        """
+        Fetches the players of the most recent day that was recorded, which is today after a refresh.
+        This allows showing the last known squad in offline mode or on days without a refresh.
+        The dictionaries have the same format as the ones of get_players_on_day()
+
+        :return: The list of player dictionaries, empty if nothing was recorded yet
+        """
+        latest_date = SqlQueries.get_latest_recorded_dates(self.__database)[0]
+        return [] if latest_date is None else self.__get_players_on_date(latest_date)
+
+    def __get_players_on_date(self, date: str) -> List[Dict[str, str or int]]:
+        """
+        Fetches the players recorded on a date, using the history cache if it is enabled
+
+        :param date: the date in the format YYYY-MM-DD
+        :return:     The list of player dictionaries
+        """
         players = []
-        database_results = SqlQueries.get_player_list_on_date(self.__database, date)
+        history_cache = self.__get_enabled_history_cache()
+
+        if history_cache is not None:
+            database_results = [result + (date,)
+                                for result in history_cache.get_players_on_date(HistoryCache.to_ordinal(date))]
+        else:
+            database_results = SqlQueries.get_player_list_on_date(self.__database, date)
 
         for result in database_results:
             player = {
@@ -241,6 +416,20 @@ class DatabaseManager(object):
         :return:     Dictionary containing the player's information, if no entry was found however, return None
         """
         date = self.__create_sqlite_date(day)
+        history_cache = self.__get_enabled_history_cache()
+
+        if history_cache is not None:
+            entry = history_cache.get_entry(name, HistoryCache.to_ordinal(date))
+            if entry is None:
+                return None
+            return {
+                "name": name,
+                "position": entry[0],
+                "value": entry[1],
+                "points": entry[2],
+                "date": date
+            }
+
         try:
             player_info = SqlQueries.get_player_on_date(self.__database, date, name)
             return {
@@ -253,6 +442,41 @@ class DatabaseManager(object):
         except IndexError:
             return None
 
+    def get_squad_snapshot(self) -> List[Dict[str, str or int]]:
+        """
+        Fetches all players of the most recently recorded day together with their value of the day recorded
+        before it and their buy value. After a daily refresh, these are today's players and their values of
+        yesterday, in offline mode or on days without a refresh the last known squad is used.
+        The format of the player dictionaries is:
+
+        name:            The player's name
+        position:        The player's position
+        value:           The player's current value
+        points:          The player's currently accumulated performance points
+        yesterday_value: The player's value on the previously recorded day, or None if there is no such entry
+        buy_value:       The price for which the player was bought, or None if it is unknown
+
+        :return: The list of player dictionaries, empty if nothing was recorded yet
+        """
+        players = []
+        latest_date, previous_date = SqlQueries.get_latest_recorded_dates(self.__database)
+        if latest_date is None:
+            return players
+
+        database_results = SqlQueries.get_squad_snapshot(self.__database, latest_date, previous_date)
+
+        for result in database_results:
+            players.append({
+                "name": result[0],
+                "position": result[1],
+                "value": result[2],
+                "points": result[3],
+                "yesterday_value": result[4],
+                "buy_value": result[5]
+            })
+
+        return players
+
     def get_player_buy_values(self) -> Dict[str, int]:
         """
         Fetches all player's buy values, i.e. the price for which they were bought
@@ -260,54 +484,134 @@ class DatabaseManager(object):
 
         :return: the player buy values as a dictionary with the player names as key and the values as content
         """
-        buy_values = {}
-        players = SqlQueries.get_player_names_with_null_sell_value(self.__database)
-
-        for player in players:
-            buy_values[player[0]] = player[1]
-        return buy_values
+        return dict(SqlQueries.get_unsold_player_buy_values(self.__database))
 
-    def get_player_buy_value(self, name: str) -> int:
+    def get_player_buy_value(self, name: str) -> int or None:
         """
         Fetches a single player's buy value
 
         :param name: the name of the player
-        :return: the buy value
+        :return: the buy value, or None if it is unknown, for example for imported players without transfers
         """
         return SqlQueries.get_buy_value_of_player(self.__database, name)
 
-    def get_last_cash_amount(self) -> int:
+    def get_latest_assets(self) -> Dict[str, str or int] or None:
+        """
+        Fetches the most recently recorded manager stats with a single lookup in the materialized
+        'manager_stats_latest' table. The dictionary has the following format:
+
+        date:       The date of the entry
+        cash:       The recorded cash amount
+        team_value: The recorded team value
+
+        :return: the most recent manager stats, or None if nothing was recorded yet
+        """
+        assets = SqlQueries.get_latest_assets(self.__database)
+        return None if assets is None else {"date": assets[0], "cash": assets[1], "team_value": assets[2]}
+
+    def get_last_cash_amount(self) -> int or None:
         """
         :return: The last recorded cash amount
         """
-        return SqlQueries.get_last_known_assets_values(self.__database)[0]
+        assets = self.get_latest_assets()
+        return None if assets is None else assets["cash"]
 
-    def get_last_team_value_amount(self) -> int:
+    def get_last_team_value_amount(self) -> int or None:
         """
         :return: The last recorded team value
         """
-        return SqlQueries.get_last_known_assets_values(self.__database)[1]
+        assets = self.get_latest_assets()
+        return None if assets is None else assets["team_value"]
+
+    def get_team_daily_totals(self, oldest_day: int = None) -> List[Dict[str, str or int]]:
+        """
+        Retrieves the daily rollups of the squad as chronologically sorted dictionaries in this format:
 
-    def get_historic_data_for_player(self, player: str) -> List[Dict[str, str or int]]:
+        date:         The date of the rollup
+        player_count: The amount of players recorded on that day
+        total_value:  The combined value of these players
+        total_points: The combined points of these players
+
+        :param oldest_day: The oldest day to consider, relative to the current date.
+                           If None, all rollups are retrieved
+        :return:           The list of rollups
+        """
+        start_date = None if oldest_day is None else self.__create_sqlite_date(oldest_day)
+        return [{"date": result[0], "player_count": result[1], "total_value": result[2], "total_points": result[3]}
+                for result in SqlQueries.get_team_daily_totals(self.__database, start_date)]
+
+    def get_player_time_series(self, player: str) -> Tuple[List[datetime.date], List[int], List[int]]:
         """
-        Retrieves the data of a player over time as a list of reversely-chronologically sorted values
+        Retrieves the complete history of a player as chronologically sorted columns, without creating
+        a dictionary for every entry. Reads from the history cache if it is enabled
 
         :param player: The player for which the history should be retrieved
-        :return:       The list of values, reversely chronologically sorted, as dictionaries with player information
+        :return:       The dates, the values and the points of the player's entries
         """
-        values = []
+        history_cache = self.__get_enabled_history_cache()
 
-        day = 0
-        while True:
-            player_on_day = self.get_player_on_day(player, day)
-            if player_on_day is not None:
-                values.append(player_on_day)
-            else:
-                date = self.__create_sqlite_date(day)
-                lowest_date = SqlQueries.get_first_recorded_date_of_player(self.__database, player)
-                if date < lowest_date:
-                    break
+        if history_cache is not None:
+            dates, _, values, points = history_cache.get_columns(player)
+            return [datetime.date.fromordinal(date) for date in dates], list(values), list(points)
+
+        results = SqlQueries.get_player_history(self.__database, player)
+        results.reverse()
+        return ([datetime.datetime.strptime(result[4], "%Y-%m-%d").date() for result in results],
+                [result[2] for result in results],
+                [result[3] for result in results])
 
-            day -= 1
+    def get_manager_stats_history(self) -> List[Dict[str, str or int]]:
+        """
+        Retrieves all recorded manager stats as chronologically sorted dictionaries in this format:
+
+        date:       The date of the entry
+        cash:       The manager's cash on that date
+        team_value: The manager's team value on that date
+
+        :return: The list of manager stats
+        """
+        return [{"date": result[0], "cash": result[1], "team_value": result[2]}
+                for result in SqlQueries.get_manager_stats_history(self.__database)]
+
+    def get_historic_data_for_player(self, player: str, oldest_day: int = None, newest_day: int = 0) \
+            -> List[Dict[str, str or int]]:
+        """
+        Retrieves the data of a player over time as a list of reversely-chronologically sorted values.
+        The whole history is fetched with a single query, days without an entry are simply skipped.
+
+        :param player:     The player for which the history should be retrieved
+        :param oldest_day: The oldest day to consider, relative to the current date.
+                           If None, the history starts at the first recorded entry
+        :param newest_day: The newest day to consider, relative to the current date. Defaults to today
+        :return:           The list of values, reversely chronologically sorted, as dictionaries with player information
+        """
+        start_date = None if oldest_day is None else self.__create_sqlite_date(oldest_day)
+        end_date = self.__create_sqlite_date(newest_day)
+        history_cache = self.__get_enabled_history_cache()
+
+        values = []
+        if history_cache is not None:
+            start_ordinal = None if start_date is None else HistoryCache.to_ordinal(start_date)
+            end_ordinal = HistoryCache.to_ordinal(end_date)
+            dates, positions, player_values, points = history_cache.get_columns(player, start_ordinal, end_ordinal)
+
+            for i in reversed(range(len(dates))):
+                values.append({
+                    "name": player,
+                    "position": positions[i],
+                    "value": player_values[i],
+                    "points": points[i],
+                    "date": HistoryCache.to_date_string(dates[i])
+                })
+            return values
+
+        for result in SqlQueries.get_player_history(self.__database, player, start_date, end_date):
+            values.append({
+                "name": result[0],
+                "position": result[1],
+                "value": result[2],
+                "points": result[3],
+                "date": result[4]
+            })
 
         return values
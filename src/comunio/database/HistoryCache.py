@@ -0,0 +1,203 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import sys
+import sqlite3
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Tuple
+from comunio.database.SqlQueries import SqlQueries
+
+
+class HistoryCache(object):
+    """
+    Columnar in-memory copy of the 'players' table.
+
+    Every player's history is stored as parallel columns of dates (as proleptic Gregorian ordinals),
+    positions, values and points, sorted chronologically. Player names and positions are interned, so each
+    distinct string is only stored once. Lookups don't allocate dictionaries, and the columns can be
+    viewed as NumPy arrays without copying them.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty cache. Use load() to fill it with the contents of a database
+        """
+        self.__dates = {}
+        self.__positions = {}
+        self.__values = {}
+        self.__points = {}
+
+    def load(self, database: sqlite3) -> None:
+        """
+        Replaces the cache's content with the complete player history stored in a database
+
+        :param database: the database to load (obtained by using sqlite3.connect())
+        :return:         None
+        """
+        dates = {}
+        positions = {}
+        values = {}
+        points = {}
+
+        for name, position, value, point, date in SqlQueries.get_all_player_entries(database):
+            if name not in dates:
+                name = sys.intern(name)
+                dates[name] = array("l")
+                positions[name] = []
+                values[name] = array("q")
+                points[name] = array("l")
+            dates[name].append(HistoryCache.to_ordinal(date))
+            positions[name].append(sys.intern(position))
+            values[name].append(value)
+            points[name].append(point)
+
+        self.__dates = dates
+        self.__positions = positions
+        self.__values = values
+        self.__points = points
+
+    @staticmethod
+    def to_ordinal(date: str) -> int:
+        """
+        Converts a date string as stored in the database into an ordinal
+
+        :param date: the date in the format YYYY-MM-DD
+        :return:     the date's proleptic Gregorian ordinal
+        """
+        return datetime.date(int(date[0:4]), int(date[5:7]), int(date[8:10])).toordinal()
+
+    @staticmethod
+    def to_date_string(ordinal: int) -> str:
+        """
+        Converts an ordinal back into a date string as stored in the database
+
+        :param ordinal: the date's proleptic Gregorian ordinal
+        :return:        the date in the format YYYY-MM-DD
+        """
+        return datetime.date.fromordinal(ordinal).strftime("%Y-%m-%d")
+
+    def get_player_names(self) -> List[str]:
+        """
+        :return: the names of all players that were ever recorded
+        """
+        return list(self.__dates.keys())
+
+    def get_position(self, name: str) -> str or None:
+        """
+        :param name: the name of the player
+        :return:     the most recently recorded position of the player, or None if the player is unknown
+        """
+        positions = self.__positions.get(name)
+        return None if positions is None else positions[-1]
+
+    def get_columns(self, name: str, start_ordinal: int = None, end_ordinal: int = None) \
+            -> Tuple[array, List[str], array, array]:
+        """
+        Fetches a player's chronologically sorted history as columns
+
+        :param name:          the name of the player
+        :param start_ordinal: the oldest date to consider as an ordinal. If None, starts at the first entry
+        :param end_ordinal:   the newest date to consider as an ordinal. If None, ends at the last entry
+        :return:              the dates as ordinals, the positions, the values and the points.
+                              These are copies, modifying them does not affect the cache.
+                              Empty if the player is unknown
+        """
+        if name not in self.__dates:
+            return array("l"), [], array("q"), array("l")
+
+        dates = self.__dates[name]
+        start = 0 if start_ordinal is None else bisect_left(dates, start_ordinal)
+        end = len(dates) if end_ordinal is None else bisect_right(dates, end_ordinal)
+
+        return (dates[start:end], self.__positions[name][start:end],
+                self.__values[name][start:end], self.__points[name][start:end])
+
+    def get_index(self, name: str, ordinal: int) -> int or None:
+        """
+        Finds a player's entry on a given date
+
+        :param name:    the name of the player
+        :param ordinal: the date as an ordinal
+        :return:        the index of the entry in the player's columns, or None if there is no such entry
+        """
+        dates = self.__dates.get(name)
+        if dates is None:
+            return None
+
+        index = bisect_left(dates, ordinal)
+        return index if index < len(dates) and dates[index] == ordinal else None
+
+    def get_entry(self, name: str, ordinal: int) -> Tuple[str, int, int] or None:
+        """
+        Fetches a single entry of a player without copying the player's columns
+
+        :param name:    the name of the player
+        :param ordinal: the date as an ordinal
+        :return:        the player's position, value and points on that date, or None if there is no such entry
+        """
+        index = self.get_index(name, ordinal)
+        if index is None:
+            return None
+        return self.__positions[name][index], self.__values[name][index], self.__points[name][index]
+
+    def get_players_on_date(self, ordinal: int) -> List[Tuple[str, str, int, int]]:
+        """
+        Fetches all players recorded on a given date
+
+        :param ordinal: the date as an ordinal
+        :return:        the players' names, positions, values and points
+        """
+        players = []
+        for name in self.__dates:
+            index = self.get_index(name, ordinal)
+            if index is not None:
+                players.append((name, self.__positions[name][index],
+                                self.__values[name][index], self.__points[name][index]))
+        return players
+
+    def get_numpy_columns(self, name: str) -> Dict[str, object]:
+        """
+        Provides a player's columns as read-only NumPy arrays sharing the cache's memory.
+        Requires NumPy to be installed
+
+        :param name:         the name of the player
+        :raises ImportError: if NumPy is not installed
+        :return:             a dictionary with the NumPy arrays 'dates', 'values' and 'points'
+        """
+        import numpy
+
+        if name in self.__dates:
+            columns = {"dates": self.__dates[name], "values": self.__values[name], "points": self.__points[name]}
+        else:
+            columns = {"dates": array("l"), "values": array("q"), "points": array("l")}
+
+        numpy_columns = {}
+        for column, values in columns.items():
+            numpy_columns[column] = numpy.frombuffer(values, dtype=numpy.dtype(values.typecode))
+            numpy_columns[column].setflags(write=False)  # Changes would silently corrupt the cache
+        return numpy_columns
@@ -0,0 +1,229 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import os
+import sys
+import csv
+import json
+import sqlite3
+from typing import Dict, Iterator, List, Tuple
+from comunio.database.SqlQueries import SqlQueries
+
+
+class HistoryExporter(object):
+    """
+    Class that exports the local database to CSV, JSON lines or Parquet files.
+
+    The rows are streamed from a database cursor in batches, so even complete histories are exported without
+    loading them into memory. CSV and JSON lines exports use the same fields as the HistoryImporter, which means
+    that exported files can be imported into another database. JSON lines records of the 'players', 'player_info',
+    'manager_stats' and 'market_players' tables additionally name their kind in a 'type' field.
+    Parquet exports require pyarrow to be installed.
+    """
+
+    tables = ["players", "player_info", "manager_stats", "market_players", "joined"]
+    """
+    The tables that can be exported. 'joined' contains the entries of the 'players' table
+    together with the last recorded buy and sell values of each player
+    """
+
+    formats = ["csv", "jsonl", "parquet"]
+    """
+    The supported export formats
+    """
+
+    record_types = {"players": "player", "player_info": "transfer", "manager_stats": "manager_stats",
+                    "market_players": "market_player"}
+    """
+    The kinds of records written into JSON lines exports, as understood by the HistoryImporter
+    """
+
+    def __init__(self, database: sqlite3, batch_size: int = 10000) -> None:
+        """
+        Initializes the exporter
+
+        :param database:   the database to export (obtained by using sqlite3.connect())
+        :param batch_size: the amount of rows fetched from the database at once
+        """
+        self.__database = database
+        self.__batch_size = batch_size
+
+    @staticmethod
+    def get_format(path: str) -> str:
+        """
+        Determines the export format using a file's extension. Exports to the standard output use JSON lines
+
+        :param path:        the path of the file
+        :raises ValueError: if the extension does not belong to a supported format
+        :return:            the format, either 'csv', 'jsonl' or 'parquet'
+        """
+        if path == "-":
+            return "jsonl"
+
+        extension = os.path.splitext(path)[1].lower()
+        extensions = {".csv": "csv", ".jsonl": "jsonl", ".json": "jsonl", ".parquet": "parquet"}
+        if extension not in extensions:
+            raise ValueError("Can not determine the export format of " + path + ", use .csv, .jsonl or .parquet")
+        return extensions[extension]
+
+    def iterate_records(self, table: str, start_date: str = None, end_date: str = None,
+                        players: List[str] = None) -> Iterator[Dict[str, str or int]]:
+        """
+        Streams the entries of a table as dictionaries
+
+        :param table:       the table to export
+        :param start_date:  the oldest date to export (inclusive), may be None
+        :param end_date:    the newest date to export (inclusive), may be None
+        :param players:     the names of the players to export, may be None to export all players
+        :raises ValueError: if the table is not supported
+        :return:            the entries, with the column names as keys
+        """
+        columns, batches = self.__iterate_batches(table, start_date, end_date, players)
+        for batch in batches:
+            for row in batch:
+                yield dict(zip(columns, row))
+
+    def export(self, path: str, table: str = "players", export_format: str = None, start_date: str = None,
+               end_date: str = None, players: List[str] = None) -> int:
+        """
+        Exports a table into a file
+
+        :param path:          the path of the file. If the path is '-', CSV and JSON lines exports are written to
+                              the standard output
+        :param table:         the table to export
+        :param export_format: the format, either 'csv', 'jsonl' or 'parquet'.
+                              Determined using the file extension if not provided
+        :param start_date:    the oldest date to export (inclusive), may be None
+        :param end_date:      the newest date to export (inclusive), may be None
+        :param players:       the names of the players to export, may be None to export all players
+        :raises ValueError:   if the table or format is not supported
+        :raises ImportError:  if a Parquet export is requested, but pyarrow is not installed
+        :return:              the amount of exported rows
+        """
+        export_format = self.get_format(path) if export_format is None else export_format
+        if export_format not in self.formats:
+            raise ValueError("Unsupported export format " + export_format)
+
+        columns, batches = self.__iterate_batches(table, start_date, end_date, players)
+
+        if export_format == "parquet":
+            if path == "-":
+                raise ValueError("Parquet exports can not be written to the standard output")
+            return self.__write_parquet(path, columns, batches)
+
+        if path == "-":
+            return self.__write_text(sys.stdout, export_format, table, columns, batches)
+        with open(path, "w", encoding="utf-8", newline="") as export_file:
+            return self.__write_text(export_file, export_format, table, columns, batches)
+
+    def __iterate_batches(self, table: str, start_date: str or None, end_date: str or None,
+                          players: List[str] or None) -> Tuple[List[str], Iterator[List[tuple]]]:
+        """
+        Executes the export query of a table
+
+        :param table:       the table to export
+        :param start_date:  the oldest date to export (inclusive), may be None
+        :param end_date:    the newest date to export (inclusive), may be None
+        :param players:     the names of the players to export, may be None to export all players
+        :raises ValueError: if the table is not supported
+        :return:            the column names and a generator yielding the rows in batches
+        """
+        cursor = SqlQueries.get_export_rows(self.__database, table, start_date, end_date, players)
+        columns = [column[0] for column in cursor.description]
+
+        def batches() -> Iterator[List[tuple]]:
+            batch = cursor.fetchmany(self.__batch_size)
+            while len(batch) > 0:
+                yield batch
+                batch = cursor.fetchmany(self.__batch_size)
+
+        return columns, batches()
+
+    def __write_text(self, export_file: object, export_format: str, table: str, columns: List[str],
+                     batches: Iterator[List[tuple]]) -> int:
+        """
+        Writes a CSV or JSON lines export
+
+        :param export_file:   the opened file
+        :param export_format: the format, either 'csv' or 'jsonl'
+        :param table:         the exported table
+        :param columns:       the column names
+        :param batches:       the rows in batches
+        :return:              the amount of written rows
+        """
+        rows = 0
+
+        if export_format == "csv":
+            writer = csv.writer(export_file)
+            writer.writerow(columns)
+            for batch in batches:
+                writer.writerows(batch)
+                rows += len(batch)
+
+        else:
+            record_type = self.record_types.get(table)
+            for batch in batches:
+                lines = []
+                for row in batch:
+                    record = dict(zip(columns, row))
+                    if record_type is not None:
+                        record["type"] = record_type
+                    lines.append(json.dumps(record) + "\n")
+                export_file.writelines(lines)
+                rows += len(batch)
+
+        return rows
+
+    @staticmethod
+    def __write_parquet(path: str, columns: List[str], batches: Iterator[List[tuple]]) -> int:
+        """
+        Writes a Parquet export, one row group per batch
+
+        :param path:         the path of the file
+        :param columns:      the column names
+        :param batches:      the rows in batches
+        :raises ImportError: if pyarrow is not installed
+        :return:             the amount of written rows
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet exports require pyarrow, install it using 'pip install pyarrow'")
+
+        text_columns = ["name", "club", "position", "date"]
+        schema = pyarrow.schema([(column, pyarrow.string() if column in text_columns else pyarrow.int64())
+                                 for column in columns])
+        rows = 0
+
+        with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+            for batch in batches:
+                arrays = [pyarrow.array([row[index] for row in batch], type=schema.field(index).type)
+                          for index in range(len(columns))]
+                writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+                rows += len(batch)
+
+        return rows
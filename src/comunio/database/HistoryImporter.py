@@ -0,0 +1,217 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import os
+import csv
+import json
+import sqlite3
+import datetime
+from typing import Dict, Iterator, List, Tuple
+from comunio.database.SqlQueries import SqlQueries
+
+
+class HistoryImporter(object):
+    """
+    Class that imports historic data from CSV or JSON lines files into the database.
+
+    Every record is one of the following kinds, which is determined by an optional 'type' field or by the
+    fields the record contains:
+
+        player:        name, position, value, points, date
+        market_player: name, club, position, value, points, date
+        manager_stats: date, cash, team_value
+        transfer:      name, buy_value, sell_value (sell_value may be empty for players that were not sold yet)
+
+    If a record contains the fields of more than one kind, the kind with the most fields is chosen,
+    so market players with their 'club' field are not mistaken for player entries.
+
+    CSV files contain a single kind of record and start with a header row, JSON lines files may mix kinds.
+    The files are streamed and written in batches, each batch in its own transaction. Records that already exist
+    in the database are skipped, so importing the same file twice does not create duplicates.
+    """
+
+    kinds = {"player": ["name", "position", "value", "points", "date"],
+             "market_player": ["name", "club", "position", "value", "points", "date"],
+             "manager_stats": ["date", "cash", "team_value"],
+             "transfer": ["name", "buy_value", "sell_value"]}
+    """
+    The supported kinds of records and their fields
+    """
+
+    def __init__(self, database: sqlite3, batch_size: int = 10000) -> None:
+        """
+        Initializes the importer
+
+        :param database:   the database to import into (obtained by using sqlite3.connect())
+        :param batch_size: the amount of records written per transaction
+        """
+        self.__database = database
+        self.__batch_size = batch_size
+        self.__dates = {}  # Exports contain the same dates many times, so every date is only validated once
+        self.__detected_kinds = {}  # Records with the same fields are of the same kind
+
+    def import_file(self, path: str) -> Dict[str, int]:
+        """
+        Imports a CSV or JSON lines file. The format is determined by the file extension,
+        files ending in .csv are read as CSV files, all others as JSON lines files
+
+        :param path:        the path to the file
+        :raises ValueError: if a record is malformed. Batches imported before the malformed record are kept
+        :return:            the amount of records read ('records') and the amount of new entries
+                            per table ('players', 'market_players', 'manager_stats', 'player_info')
+        """
+        with open(path, "r", encoding="utf-8", newline="") as import_file:
+            if os.path.splitext(path)[1].lower() == ".csv":
+                records = self.__read_csv(import_file)
+            else:
+                records = self.__read_json_lines(import_file)
+            return self.import_records(records)
+
+    def import_records(self, records: Iterator[Tuple[int, Dict[str, object]]]) -> Dict[str, int]:
+        """
+        Imports records in batches. The aggregate tables are refreshed together with every batch,
+        so they stay consistent with the imported entries even if a later record turns out to be malformed
+
+        :param records:     the records as tuples of line number and record dictionary
+        :raises ValueError: if a record is malformed
+        :return:            the amount of records read and the amount of new entries per table
+        """
+        statistics = {"records": 0, "players": 0, "market_players": 0, "manager_stats": 0, "player_info": 0}
+        batch = {"player": [], "market_player": [], "manager_stats": [], "transfer": []}
+
+        for line, record in records:
+            kind, entry = self.__parse_record(line, record)
+            batch[kind].append(entry)
+            statistics["records"] += 1
+
+            if statistics["records"] % self.__batch_size == 0:
+                self.__write_batch(batch, statistics)
+
+        self.__write_batch(batch, statistics)
+        return statistics
+
+    def __write_batch(self, batch: Dict[str, List[tuple]], statistics: Dict[str, int]) -> None:
+        """
+        Writes a batch of records and refreshes the aggregates of the batch's dates in a single transaction,
+        then empties the batch
+
+        :param batch:      the parsed records, grouped by kind
+        :param statistics: the import statistics, the amounts of new entries are added to it
+        :return:           None
+        """
+        writers = [("player", "players", SqlQueries.import_player_entries),
+                   ("market_player", "market_players", SqlQueries.import_market_player_entries),
+                   ("manager_stats", "manager_stats", SqlQueries.import_manager_stats_entries),
+                   ("transfer", "player_info", SqlQueries.import_player_infos)]
+
+        dates = sorted(set(entry[4] for entry in batch["player"]))
+
+        with SqlQueries.transaction(self.__database):
+            for kind, table, writer in writers:
+                if len(batch[kind]) > 0:
+                    changes = self.__database.total_changes
+                    writer(self.__database, batch[kind])
+                    statistics[table] += self.__database.total_changes - changes
+                    batch[kind] = []
+            SqlQueries.refresh_aggregates(self.__database, dates)
+
+    @staticmethod
+    def __read_csv(import_file: object) -> Iterator[Tuple[int, Dict[str, object]]]:
+        """
+        :param import_file: the opened CSV file
+        :raises ValueError: if the file is not a valid CSV file
+        :return:            the records of the file with their line numbers
+        """
+        reader = csv.DictReader(import_file)
+        try:
+            for record in reader:
+                yield reader.line_num, record
+        except csv.Error as e:
+            raise ValueError("Line " + str(reader.line_num) + ": " + str(e))
+
+    @staticmethod
+    def __read_json_lines(import_file: object) -> Iterator[Tuple[int, Dict[str, object]]]:
+        """
+        :param import_file:  the opened JSON lines file
+        :raises ValueError:  if a line is not a JSON object
+        :return:             the records of the file with their line numbers
+        """
+        for line_number, line in enumerate(import_file, 1):
+            if line.strip():
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("Line " + str(line_number) + " is not a JSON object")
+                yield line_number, record
+
+    def __parse_record(self, line: int, record: Dict[str, object]) -> Tuple[str, tuple]:
+        """
+        Determines the kind of a record and converts it into a database entry
+
+        :param line:        the line of the record, used in error messages
+        :param record:      the record
+        :raises ValueError: if the kind of the record can't be determined or a field is malformed
+        :return:            the kind of the record and the entry in the column order of the import queries
+        """
+        kind = record.get("type")
+        if kind is None:
+            field_names = tuple(record.keys())
+            if field_names not in self.__detected_kinds:
+                matching_kinds = [(len(fields), kind) for kind, fields in HistoryImporter.kinds.items()
+                                  if all(field in record for field in fields if field != "sell_value")]
+                self.__detected_kinds[field_names] = max(matching_kinds)[1] if len(matching_kinds) > 0 else None
+            kind = self.__detected_kinds[field_names]
+        if kind not in HistoryImporter.kinds:
+            raise ValueError("Line " + str(line) + ": Unknown kind of record")
+
+        try:
+            if kind == "player":
+                return kind, (str(record["name"]), str(record["position"]), int(record["value"]),
+                              int(record["points"]), self.__parse_date(record["date"]))
+            elif kind == "market_player":
+                return kind, (str(record["name"]), str(record["club"]), str(record["position"]),
+                              int(record["value"]), int(record["points"]), self.__parse_date(record["date"]))
+            elif kind == "manager_stats":
+                return kind, (self.__parse_date(record["date"]), int(record["cash"]),
+                              int(record["team_value"]))
+            else:
+                sell_value = record.get("sell_value")
+                return kind, (str(record["name"]), int(record["buy_value"]),
+                              None if sell_value in (None, "") else int(sell_value))
+
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("Line " + str(line) + ": Malformed " + kind + " record (" + str(e) + ")")
+
+    def __parse_date(self, date: object) -> str:
+        """
+        :param date:        a date in the format YYYY-MM-DD
+        :raises ValueError: if the date is malformed
+        :return:            the date as stored in the database
+        """
+        parsed_date = self.__dates.get(date)
+        if parsed_date is None:
+            parsed_date = datetime.datetime.strptime(str(date), "%Y-%m-%d").strftime("%Y-%m-%d")
+            self.__dates[date] = parsed_date
+        return parsed_date
@@ -0,0 +1,181 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+# imports
+import sqlite3
+from typing import Callable, List
+
+
+class SchemaMigrator(object):
+    """
+    Class that keeps the database schema up to date.
+
+    The current schema version is stored in the database itself using PRAGMA user_version.
+    Every migration brings the schema up by exactly one version and is run inside its own transaction,
+    so an existing database can be upgraded in place without ever ending up half-migrated.
+    """
+
+    @staticmethod
+    def get_migrations() -> List[Callable]:
+        """
+        :return: the list of migrations, ordered by the schema version they produce.
+                 The first entry migrates to version 1, the second to version 2 and so on.
+        """
+        return [SchemaMigrator.migration_1_base_tables,
+                SchemaMigrator.migration_2_indexes,
+                SchemaMigrator.migration_3_aggregates,
+                SchemaMigrator.migration_4_market_players]
+
+    @staticmethod
+    def get_schema_version(database: sqlite3) -> int:
+        """
+        :param database: the database to check
+        :return:         the database's current schema version
+        """
+        return database.execute("PRAGMA user_version").fetchone()[0]
+
+    @staticmethod
+    def migrate(database: sqlite3) -> None:
+        """
+        Applies all migrations that have not yet been applied to the database
+
+        :param database: the database to migrate (obtained by using sqlite3.connect())
+        :return:         None
+        """
+        migrations = SchemaMigrator.get_migrations()
+        current_version = SchemaMigrator.get_schema_version(database)
+
+        for version in range(current_version + 1, len(migrations) + 1):
+            database.execute("BEGIN")
+            try:
+                migrations[version - 1](database)
+                # PRAGMA statements don't support parameter binding
+                database.execute("PRAGMA user_version = " + str(version))
+                database.commit()
+            except sqlite3.Error as e:
+                database.rollback()
+                raise e
+
+    @staticmethod
+    def migration_1_base_tables(database: sqlite3) -> None:
+        """
+        Creates the original 'players', 'player_info' and 'manager_stats' tables.
+        Databases created before the introduction of schema versions already contain these tables
+
+        :param database: the database to migrate
+        :return:         None
+        """
+        database.execute("CREATE TABLE IF NOT EXISTS players ("
+                         "name TEXT NOT NULL,"
+                         "position TEXT NOT NULL,"
+                         "value INTEGER NOT NULL,"
+                         "points INTEGER NOT NULL,"
+                         "date TEXT NOT NULL"
+                         ");")
+
+        database.execute("CREATE TABLE IF NOT EXISTS player_info ("
+                         "name TEXT NOT NULL,"
+                         "buy_value INTEGER NOT NULL,"
+                         "sell_value INTEGER"
+                         ");")
+
+        database.execute("CREATE TABLE IF NOT EXISTS manager_stats ("
+                         "date TEXT NOT NULL,"
+                         "cash INTEGER NOT NULL,"
+                         "team_value INTEGER NOT NULL"
+                         ");")
+
+    @staticmethod
+    def migration_2_indexes(database: sqlite3) -> None:
+        """
+        Adds indexes for the date and name lookups as well as unique constraints that make
+        entering a day's data more than once impossible. Duplicate entries that may exist in older
+        databases are removed beforehand, the most recently inserted entry is kept.
+
+        :param database: the database to migrate
+        :return:         None
+        """
+        database.execute("DELETE FROM players WHERE rowid NOT IN "
+                         "(SELECT MAX(rowid) FROM players GROUP BY date, name)")
+        database.execute("DELETE FROM manager_stats WHERE rowid NOT IN "
+                         "(SELECT MAX(rowid) FROM manager_stats GROUP BY date)")
+
+        database.execute("CREATE UNIQUE INDEX IF NOT EXISTS players_date_name ON players (date, name)")
+        database.execute("CREATE INDEX IF NOT EXISTS players_name_date ON players (name, date)")
+        database.execute("CREATE UNIQUE INDEX IF NOT EXISTS manager_stats_date ON manager_stats (date)")
+        database.execute("CREATE INDEX IF NOT EXISTS player_info_name ON player_info (name, sell_value)")
+
+    @staticmethod
+    def migration_3_aggregates(database: sqlite3) -> None:
+        """
+        Adds the materialized aggregate tables and fills them with the existing data:
+
+        manager_stats_latest: A single row containing the most recent manager_stats entry
+        team_daily_totals:    The amount of players and their combined value and points for every recorded day
+
+        :param database: the database to migrate
+        :return:         None
+        """
+        database.execute("CREATE TABLE IF NOT EXISTS manager_stats_latest ("
+                         "id INTEGER PRIMARY KEY CHECK (id = 1),"
+                         "date TEXT NOT NULL,"
+                         "cash INTEGER NOT NULL,"
+                         "team_value INTEGER NOT NULL"
+                         ");")
+
+        database.execute("CREATE TABLE IF NOT EXISTS team_daily_totals ("
+                         "date TEXT PRIMARY KEY,"
+                         "player_count INTEGER NOT NULL,"
+                         "total_value INTEGER NOT NULL,"
+                         "total_points INTEGER NOT NULL"
+                         ");")
+
+        database.execute("INSERT OR REPLACE INTO manager_stats_latest (id, date, cash, team_value) "
+                         "SELECT 1, date, cash, team_value FROM manager_stats ORDER BY date DESC LIMIT 1")
+        database.execute("INSERT OR REPLACE INTO team_daily_totals (date, player_count, total_value, total_points) "
+                         "SELECT date, COUNT(*), SUM(value), SUM(points) FROM players GROUP BY date")
+
+    @staticmethod
+    def migration_4_market_players(database: sqlite3) -> None:
+        """
+        Adds the 'market_players' table, which stores the daily market values and points of all players
+        in the league, using the same layout as the 'players' table plus the player's club.
+        Every player has one entry per day, identified by the player's name and club
+
+        :param database: the database to migrate
+        :return:         None
+        """
+        database.execute("CREATE TABLE IF NOT EXISTS market_players ("
+                         "name TEXT NOT NULL,"
+                         "club TEXT NOT NULL,"
+                         "position TEXT NOT NULL,"
+                         "value INTEGER NOT NULL,"
+                         "points INTEGER NOT NULL,"
+                         "date TEXT NOT NULL"
+                         ");")
+
+        # Different players may share a name, so players are identified by their name and club
+        database.execute("CREATE UNIQUE INDEX IF NOT EXISTS market_players_date_name_club "
+                         "ON market_players (date, name, club)")
+        database.execute("CREATE INDEX IF NOT EXISTS market_players_name_date ON market_players (name, date)")
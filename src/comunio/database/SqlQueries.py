@@ -24,7 +24,9 @@ LICENSE
 
 # imports
 import sqlite3
-from typing import Dict, List, Tuple
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Iterator
+from comunio.database.SchemaMigrator import SchemaMigrator
 
 
 class SqlQueries(object):
@@ -36,51 +38,64 @@ class SqlQueries(object):
     @staticmethod
     def apply_sql_schema(database: sqlite3) -> None:
         """
-        Applies the database schema to the database in case it is not present
+        Applies the database schema to the database in case it is not present.
+        Databases using an older version of the schema are upgraded in place
 
         :param database: the database object to use (obtained by using sqlite3.connect())
         :return:         None
         """
+        SchemaMigrator.migrate(database)
 
-        database.execute("CREATE TABLE IF NOT EXISTS players ("
-                         "name TEXT NOT NULL,"
-                         "position TEXT NOT NULL,"
-                         "value INTEGER NOT NULL,"
-                         "points INTEGER NOT NULL,"
-                         "date TEXT NOT NULL"
-                         ");")
+    # Connection Settings
+    @staticmethod
+    def configure_connection(database: sqlite3, journal_mode: str = "WAL", synchronous: str = "NORMAL") -> None:
+        """
+        Configures the journal mode and the synchronous setting of a database connection.
+        WAL journaling combined with NORMAL synchronisation keeps the database consistent on crashes
+        while only syncing to disk at checkpoints instead of on every commit
+
+        :param database:     the database to configure
+        :param journal_mode: the journal mode, one of DELETE, TRUNCATE, PERSIST, MEMORY, WAL or OFF
+        :param synchronous:  the synchronous setting, one of OFF, NORMAL, FULL or EXTRA
+        :raises ValueError:  if an unknown journal mode or synchronous setting was provided
+        :return:             None
+        """
+        journal_mode = journal_mode.upper()
+        synchronous = synchronous.upper()
 
-        database.execute("CREATE TABLE IF NOT EXISTS player_info ("
-                         "name TEXT NOT NULL,"
-                         "buy_value INTEGER NOT NULL,"
-                         "sell_value INTEGER"
-                         ");")
+        # PRAGMA statements don't support parameter binding, so the values are checked beforehand
+        if journal_mode not in ["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"]:
+            raise ValueError("Invalid journal mode: " + journal_mode)
+        if synchronous not in ["OFF", "NORMAL", "FULL", "EXTRA"]:
+            raise ValueError("Invalid synchronous setting: " + synchronous)
 
-        database.execute("CREATE TABLE IF NOT EXISTS manager_stats ("
-                         "date TEXT NOT NULL,"
-                         "cash INTEGER NOT NULL,"
-                         "team_value INTEGER NOT NULL"
-                         ");")
-        database.commit()
+        database.execute("PRAGMA journal_mode = " + journal_mode)
+        database.execute("PRAGMA synchronous = " + synchronous)
 
-    # Inserts
+    # Transactions
     @staticmethod
-    def insert_player_into_players(database: sqlite3, player: Dict[str, str], date: str) -> None:
+    @contextmanager
+    def transaction(database: sqlite3) -> Iterator[None]:
         """
-        Inserts a player into the 'players' table
+        Context manager that runs all statements executed inside of it in a single transaction.
+        The transaction is committed once the context is left and rolled back if an exception occurs.
 
-        :param database The database to be used
-        :param player:  A dictionary with the name, value, points and position keys
-        :param date:    The date on which this player should be inserted
-        :return:        None
+        :param database: the database to use
+        :return:         None
         """
-        sql = "INSERT INTO players (name, value, points, position, date) VALUES(?, ?, ?, ?, ?)"
-        database.execute(sql, (player["name"], player["value"], player["points"], player["position"], date))
+        database.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            database.commit()
+        except BaseException as e:
+            database.rollback()
+            raise e
 
+    # Inserts
     @staticmethod
     def insert_new_manager_stats_entry(database: sqlite3, date: str, cash: int, team_value: int) -> None:
         """
-        Inserts a manager stat entry into the manager_stats table
+        Inserts a manager stat entry into the manager_stats table, replacing an existing entry for the same date
 
         :param database:   the database into which the entry should be inserted into
         :param date:       the date on which the entry will be inserted
@@ -88,40 +103,114 @@ class SqlQueries(object):
         :param team_value: the team value amount to enter
         :return:           None
         """
-        sql = "INSERT INTO manager_stats (date, cash, team_value) VALUES(?, ?, ?)"
+        sql = "INSERT OR REPLACE INTO manager_stats (date, cash, team_value) VALUES(?, ?, ?)"
         database.execute(sql, (date, cash, team_value))
 
     @staticmethod
-    def insert_player_info(database: sqlite3, name: str, buy_value: int, sell_value: int or None):
+    def insert_players_into_players(database: sqlite3, players: List[Dict[str, str or int]], date: str) -> None:
         """
-        Inserts a new player into the 'player_info_table'
-        :param database:   the database to use
-        :param name:       the name of the player
-        :param buy_value:  the player's buy value
-        :param sell_value: the player's sell value, may be Null
-        :return:           None
+        Inserts multiple players into the 'players' table at once. Existing entries of the same players
+        on that date are replaced
+
+        :param database: the database to be used
+        :param players:  a list of dictionaries with the name, value, points and position keys
+        :param date:     the date on which the players should be inserted
+        :return:         None
+        """
+        sql = "INSERT OR REPLACE INTO players (name, value, points, position, date) VALUES(?, ?, ?, ?, ?)"
+        database.executemany(sql, [(player["name"], player["value"], player["points"], player["position"], date)
+                                   for player in players])
+
+    @staticmethod
+    def insert_player_infos(database: sqlite3, player_infos: List[Tuple[str, int, int or None]]) -> None:
+        """
+        Inserts multiple players into the 'player_info' table at once
+
+        :param database:     the database to be used
+        :param player_infos: the entries to insert as tuples of name, buy_value, sell_value. sell_value may be None
+        :return:             None
         """
+        database.executemany("INSERT INTO player_info (name, buy_value, sell_value) VALUES(?, ?, ?)", player_infos)
 
-        database.execute("INSERT INTO player_info (name, buy_value, sell_value) VALUES(?, ?, ?)",
-                         (name, buy_value, sell_value))
+    @staticmethod
+    def insert_market_players(database: sqlite3, players: List[Dict[str, str or int]], date: str) -> None:
+        """
+        Inserts the crawled market players into the 'market_players' table. Entries of the same player (name and
+        club) and date are replaced, so crawling the market more than once a day keeps the most recent values
+
+        :param database: the database to be used
+        :param players:  the players as dictionaries with the keys name, club, position, value and points
+        :param date:     the date of the entries
+        :return:         None
+        """
+        database.executemany("INSERT OR REPLACE INTO market_players (name, club, position, value, points, date) "
+                             "VALUES(?, ?, ?, ?, ?, ?)",
+                             [(player["name"], player["club"], player["position"], player["value"],
+                               player["points"], date) for player in players])
+
+    @staticmethod
+    def import_player_entries(database: sqlite3, entries: List[Tuple[str, str, int, int, str]]) -> None:
+        """
+        Inserts historic entries into the 'players' table. Entries for a player and date that already exist are kept,
+        the imported entries are ignored in that case
+
+        :param database: the database to be used
+        :param entries:  the entries as tuples of name, position, value, points, date
+        :return:         None
+        """
+        database.executemany("INSERT OR IGNORE INTO players (name, position, value, points, date) "
+                             "VALUES(?, ?, ?, ?, ?)", entries)
+
+    @staticmethod
+    def import_market_player_entries(database: sqlite3, entries: List[Tuple[str, str, str, int, int, str]]) -> None:
+        """
+        Inserts historic entries into the 'market_players' table. Existing entries of the same player
+        (name and club) and date are kept
+
+        :param database: the database to be used
+        :param entries:  the entries as tuples of name, club, position, value, points, date
+        :return:         None
+        """
+        database.executemany("INSERT OR IGNORE INTO market_players (name, club, position, value, points, date) "
+                             "VALUES(?, ?, ?, ?, ?, ?)", entries)
+
+    @staticmethod
+    def import_manager_stats_entries(database: sqlite3, entries: List[Tuple[str, int, int]]) -> None:
+        """
+        Inserts historic entries into the 'manager_stats' table. Existing entries of the same date are kept
+
+        :param database: the database to be used
+        :param entries:  the entries as tuples of date, cash, team_value
+        :return:         None
+        """
+        database.executemany("INSERT OR IGNORE INTO manager_stats (date, cash, team_value) VALUES(?, ?, ?)", entries)
+
+    @staticmethod
+    def import_player_infos(database: sqlite3, player_infos: List[Tuple[str, int, int or None]]) -> None:
+        """
+        Inserts historic transfers into the 'player_info' table. Transfers that already exist with the same
+        name, buy value and sell value are not inserted again
+
+        :param database:     the database to be used
+        :param player_infos: the entries as tuples of name, buy_value, sell_value. sell_value may be None
+        :return:             None
+        """
+        database.executemany("INSERT INTO player_info (name, buy_value, sell_value) "
+                             "SELECT ?1, ?2, ?3 WHERE NOT EXISTS (SELECT 1 FROM player_info "
+                             "WHERE name = ?1 AND buy_value = ?2 AND sell_value IS ?3)", player_infos)
 
     # Updates
     @staticmethod
-    def update_player_info(database: sqlite3, name: str, buy_value: int or None, sell_value: int or None):
+    def update_player_sell_values(database: sqlite3, sell_values: List[Tuple[str, int]]) -> None:
         """
-        Updates an entry in the 'player_info' database with a new ell value or buy value.
-        Both values may be given as a Null value, in which case they are skipped
+        Sets the sell value of multiple players that have not been sold yet at once
 
-        :param database:   The database to use
-        :param name:       The name of the player to update
-        :param buy_value:  The new buy value of the player, may be None
-        :param sell_value: The new sell value of the player, may be None
-        :return:           None
+        :param database:    the database to use
+        :param sell_values: the sell values as tuples of name, sell_value
+        :return:            None
         """
-        if buy_value is not None:
-            database.execute("UPDATE player_info SET buy_value = ? WHERE name = ?", (buy_value, name))
-        elif sell_value is not None:
-            database.execute("UPDATE player_info SET sell_value = ? WHERE name = ?", (sell_value, name))
+        database.executemany("UPDATE player_info SET sell_value = ? WHERE name = ? AND sell_value IS NULL",
+                             [(sell_value, name) for name, sell_value in sell_values])
 
     # Getters
     @staticmethod
@@ -135,15 +224,92 @@ class SqlQueries(object):
         return database.execute("SELECT name FROM player_info WHERE sell_value IS NULL").fetchall()
 
     @staticmethod
-    def get_buy_value_of_player(database: sqlite3, name: str) -> int:
+    def get_unsold_player_buy_values(database: sqlite3) -> List[Tuple[str, int]]:
+        """
+        Fetches the buy values of all players that were not sold yet, i.e. have a sell value of NULL
+
+        :param database: the database to use
+        :return:         the players' buy values, in this format: [(name1, buy_value1), (name2, buy_value2)]
+        """
+        return database.execute("SELECT name, buy_value FROM player_info WHERE sell_value IS NULL").fetchall()
+
+    @staticmethod
+    def get_last_known_values_of_unsold_players(database: sqlite3, before_date: str, oldest_date: str) \
+            -> List[Tuple[str, int]]:
+        """
+        Fetches the most recently recorded market value of every player that was not sold yet.
+        Only entries recorded before a given date and not older than a second date are considered,
+        players without such an entry are omitted.
+
+        :param database:    the database to use
+        :param before_date: entries on or after this date are ignored
+        :param oldest_date: entries older than this date are ignored
+        :return:            the last known market values, in this format: [(name1, value1), (name2, value2)]
+        """
+        return database.execute("SELECT players.name, players.value FROM players "
+                                "JOIN (SELECT name, MAX(date) AS date FROM players "
+                                "      WHERE date < ? AND date >= ? "
+                                "      AND name IN (SELECT name FROM player_info WHERE sell_value IS NULL) "
+                                "      GROUP BY name) AS latest "
+                                "ON players.name = latest.name AND players.date = latest.date",
+                                (before_date, oldest_date)).fetchall()
+
+    @staticmethod
+    def get_buy_value_of_player(database: sqlite3, name: str) -> int or None:
         """
         Fetches the buy value (initial value) of a player
 
         :param database: the database to use
         :param name:     the name of the player
-        :return:         the buy value of the player
+        :return:         the buy value of the player, or None if no buy value was recorded for the player
+        """
+        result = database.execute("SELECT buy_value FROM player_info WHERE name = ?", (name,)).fetchone()
+        return None if result is None else result[0]
+
+    @staticmethod
+    def get_latest_recorded_dates(database: sqlite3) -> Tuple[str or None, str or None]:
+        """
+        Fetches the two most recent dates with entries in the 'players' table using the date index
+
+        :param database: the database to use
+        :return:         the most recent date and the date recorded before it. Either may be None if the
+                         'players' table contains fewer dates
         """
-        return database.execute("SELECT buy_value FROM player_info WHERE name = ?", (name,)).fetchall()[0][0]
+        latest_date = database.execute("SELECT MAX(date) FROM players").fetchone()[0]
+        if latest_date is None:
+            return None, None
+        return latest_date, database.execute("SELECT MAX(date) FROM players WHERE date < ?",
+                                             (latest_date,)).fetchone()[0]
+
+    @staticmethod
+    def get_squad_snapshot(database: sqlite3, date: str, previous_date: str) \
+            -> List[Tuple[str, str, int, int, int or None, int or None]]:
+        """
+        Fetches every player recorded on a given date together with the player's value on a previous date
+        and the player's buy value, using a single query
+
+        :param database:      the database to use
+        :param date:          the date which is to consider
+        :param previous_date: the date to compare the players' values with
+        :return:              the results of the SELECT query, a list of tuples of player information
+                              the results are in this order:
+                                - name
+                                - position
+                                - value
+                                - points
+                                - value on the previous date, or None if there was no entry on that date
+                                - buy value, or None if the player's purchase is unknown
+        """
+        return database.execute("SELECT players.name, players.position, players.value, players.points, "
+                                "previous.value, info.buy_value "
+                                "FROM players "
+                                "LEFT JOIN players AS previous "
+                                "ON previous.name = players.name AND previous.date = ? "
+                                "LEFT JOIN (SELECT name, buy_value FROM player_info WHERE rowid IN "
+                                "           (SELECT MAX(rowid) FROM player_info "
+                                "            WHERE sell_value IS NULL GROUP BY name)) AS info "
+                                "ON info.name = players.name "
+                                "WHERE players.date = ?", (previous_date, date)).fetchall()
 
     @staticmethod
     def get_player_list_on_date(database: sqlite3, date: str) -> List[Tuple[str, str, int, int]]:
@@ -183,23 +349,163 @@ class SqlQueries(object):
                                 (date, name)).fetchall()[0]
 
     @staticmethod
-    def get_last_known_assets_values(database: sqlite3) -> Tuple[int, int]:
+    def get_manager_stats_history(database: sqlite3) -> List[Tuple[str, int, int]]:
+        """
+        Fetches all recorded manager stats
+
+        :param database: the database to use
+        :return:         the entries as tuples of date, cash and team value, chronologically sorted
+        """
+        return database.execute("SELECT date, cash, team_value FROM manager_stats ORDER BY date").fetchall()
+
+    @staticmethod
+    def get_all_player_entries(database: sqlite3) -> sqlite3.Cursor:
+        """
+        Fetches every entry of the players table, sorted by name and date. The rows are streamed from
+        the database while iterating the returned cursor instead of being loaded all at once
+
+        :param database: the database to use
+        :return:         a cursor yielding the entries in this order: name, position, value, points, date
+        """
+        return database.execute("SELECT name, position, value, points, date FROM players ORDER BY name, date")
+
+    @staticmethod
+    def get_export_rows(database: sqlite3, table: str, start_date: str = None, end_date: str = None,
+                        players: List[str] = None) -> sqlite3.Cursor:
+        """
+        Fetches the entries of a table for an export. The rows are streamed from the database while iterating
+        the returned cursor instead of being loaded all at once. Filters that don't apply to a table are ignored,
+        for example the date filters for the 'player_info' table.
+        The 'joined' table consists of the entries of the 'players' table together with the last recorded
+        buy and sell values of each player
+
+        :param database:    the database to use
+        :param table:       the table to export, either 'players', 'player_info', 'manager_stats', 'market_players'
+                            or 'joined'
+        :param start_date:  the oldest date to export (inclusive), may be None
+        :param end_date:    the newest date to export (inclusive), may be None
+        :param players:     the names of the players to export, may be None to export all players
+        :raises ValueError: if the table is not supported
+        :return:            a cursor yielding the entries. The column names are available via cursor.description
+        """
+        queries = {
+            "players": ("SELECT name, position, value, points, date FROM players", "date", "name", "name, date"),
+            "player_info": ("SELECT name, buy_value, sell_value FROM player_info", None, "name", "name, rowid"),
+            "manager_stats": ("SELECT date, cash, team_value FROM manager_stats", "date", None, "date"),
+            "market_players": ("SELECT name, club, position, value, points, date FROM market_players",
+                               "date", "name", "name, club, date"),
+            "joined": ("SELECT players.name, players.position, players.value, players.points, players.date, "
+                       "player_info.buy_value, player_info.sell_value FROM players "
+                       "LEFT JOIN (SELECT name, MAX(rowid) AS last_row FROM player_info GROUP BY name) AS last_info "
+                       "ON last_info.name = players.name "
+                       "LEFT JOIN player_info ON player_info.rowid = last_info.last_row",
+                       "players.date", "players.name", "players.name, players.date")
+        }
+        if table not in queries:
+            raise ValueError("Unsupported table " + table)
+        query, date_column, name_column, order = queries[table]
+
+        conditions = []
+        parameters = []
+        if date_column is not None and start_date is not None:
+            conditions.append(date_column + " >= ?")
+            parameters.append(start_date)
+        if date_column is not None and end_date is not None:
+            conditions.append(date_column + " <= ?")
+            parameters.append(end_date)
+        if name_column is not None and players is not None:
+            conditions.append(name_column + " IN (" + ", ".join("?" * len(players)) + ")")
+            parameters.extend(players)
+
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        return database.execute(query + " ORDER BY " + order, parameters)
+
+    @staticmethod
+    def get_market_players_on_date(database: sqlite3, date: str) -> List[Tuple[str, str, str, int, int, str]]:
+        """
+        Fetches the market players recorded on a date
+
+        :param database: the database to use
+        :param date:     the date
+        :return:         the entries in this order: name, club, position, value, points, date,
+                         sorted by name and club
+        """
+        return database.execute("SELECT name, club, position, value, points, date FROM market_players "
+                                "WHERE date = ? ORDER BY name, club", (date,)).fetchall()
+
+    @staticmethod
+    def get_player_history(database: sqlite3, name: str, start_date: str = None, end_date: str = None) \
+            -> List[Tuple[str, str, int, int, str]]:
         """
-        Fetches the last known cash and team value amounts entered in the database
+        Fetches the complete recorded history of a player in a single query, optionally limited to
+        a date window. Both window boundaries are inclusive.
+
+        :param database:   the database to use
+        :param name:       the name of the player
+        :param start_date: the oldest date to consider, may be None to start at the first recorded date
+        :param end_date:   the newest date to consider, may be None to include everything up to the last entry
+        :return:           the results of the SELECT query, reversely chronologically sorted.
+                           the results are in this order:
+                            - name
+                            - position
+                            - value
+                            - points
+                            - date
+        """
+        sql = "SELECT name, position, value, points, date FROM players WHERE name = ?"
+        parameters = [name]
+
+        if start_date is not None:
+            sql += " AND date >= ?"
+            parameters.append(start_date)
+        if end_date is not None:
+            sql += " AND date <= ?"
+            parameters.append(end_date)
+
+        return database.execute(sql + " ORDER BY date DESC", parameters).fetchall()
+
+    @staticmethod
+    def refresh_aggregates(database: sqlite3, dates: List[str]) -> None:
+        """
+        Brings the materialized aggregate tables up to date after entries were added to the 'players' or
+        'manager_stats' tables. Only the rollups of the given dates are recalculated, the latest manager stats
+        are looked up using the unique date index
+
+        :param database: the database to use
+        :param dates:    the dates whose entries in the 'players' table were modified
+        :return:         None
+        """
+        database.execute("INSERT OR REPLACE INTO manager_stats_latest (id, date, cash, team_value) "
+                         "SELECT 1, date, cash, team_value FROM manager_stats ORDER BY date DESC LIMIT 1")
+
+        database.executemany("DELETE FROM team_daily_totals WHERE date = ?", [(date,) for date in dates])
+        database.executemany("INSERT INTO team_daily_totals (date, player_count, total_value, total_points) "
+                             "SELECT date, COUNT(*), SUM(value), SUM(points) FROM players "
+                             "WHERE date = ? GROUP BY date", [(date,) for date in dates])
+
+    @staticmethod
+    def get_latest_assets(database: sqlite3) -> Tuple[str, int, int] or None:
+        """
+        Fetches the most recent manager stats from the materialized 'manager_stats_latest' table
 
         :param database: The database to be used
-        :return:         The last recorded cash amount, team_value amount
+        :return:         The date, cash and team value of the most recent entry, or None if there is no entry
         """
-        assets = database.execute("SELECT cash, team_value, MAX(date) FROM manager_stats").fetchall()[0]
-        return assets[0], assets[1]
+        return database.execute("SELECT date, cash, team_value FROM manager_stats_latest WHERE id = 1").fetchone()
 
     @staticmethod
-    def get_first_recorded_date_of_player(database: sqlite3, name: str) -> str:
+    def get_team_daily_totals(database: sqlite3, start_date: str = None) -> List[Tuple[str, int, int, int]]:
         """
-        Fetches the date on which the player has first been recorded in the database
+        Fetches the daily rollups of the 'players' table
 
-        :param database: the database to be used
-        :param name:     the name of the player
-        :return:         the first date that the player was recorded in the players table of the database
+        :param database:   The database to be used
+        :param start_date: The oldest date to consider, may be None to fetch all rollups
+        :return:           The rollups as tuples of date, player count, total value and total points,
+                           chronologically sorted
         """
-        return database.execute("SELECT MIN(date) FROM players WHERE NAME = ?", (name, )).fetchall()[0][0]
+        if start_date is None:
+            return database.execute("SELECT date, player_count, total_value, total_points "
+                                    "FROM team_daily_totals ORDER BY date").fetchall()
+        return database.execute("SELECT date, player_count, total_value, total_points FROM team_daily_totals "
+                                "WHERE date >= ? ORDER BY date", (start_date,)).fetchall()
@@ -22,29 +22,20 @@ This file is part of comunio-manager.
 LICENSE
 """
 
-# These imports are necessary to get PyInstaller to actually bundle all required modules
-# when creating a binary executable
-
-# noinspection PyUnresolvedReferences
-import tkinter
-# noinspection PyUnresolvedReferences
-import tkinter.filedialog
-# noinspection PyUnresolvedReferences
-import matplotlib.backends.backend_tkagg
-
 # Suppresses Matplotlib warnings
 import warnings
 warnings.filterwarnings("ignore", module="matplotlib")
 
 # imports
+# The GUI, plotting, scraping and sentry modules take a long time to load. They are only imported
+# once the code path that needs them is taken, which keeps headless runs, e.g. refreshes via cron, fast.
 import sys
+import math
+import time
 import argparse
 from typing import Dict, List
 from argparse import Namespace
 from comunio.metadata import SentryLogger
-from comunio.ui.LoginScreen import start as start_logi_gui
-from comunio.ui.StatisticsViewer import start as start_gui
-from comunio.scraper.ComunioSession import ComunioSession
 from comunio.database.DatabaseManager import DatabaseManager
 from comunio.calc.StatisticsCalculator import StatisticsCalculator
 from comunio.credentials.CredentialsManager import CredentialsManager
@@ -71,6 +62,43 @@ def parse_arguments() -> Namespace:
                         help="Lists the current state of the comunio account")
     parser.add_argument("-x", "--xkcd", action="store_true",
                         help="Displays graphs generated by Matplotlib in the style of XKCD webcomics")
+    parser.add_argument("-n", "--no-cache", action="store_true",
+                        help="Always logs in again instead of reusing a recently established session")
+    parser.add_argument("-o", "--offline", action="store_true",
+                        help="Starts the GUI without logging in, displaying only the local database")
+    parser.add_argument("-a", "--analytics", type=int, nargs="?", const=0, metavar="DAYS",
+                        help="Ranks all recorded players by points per million, profit, volatility and drawdown "
+                             "over the last DAYS days. Uses the whole history if DAYS is omitted")
+    parser.add_argument("-b", "--batch", action="store_true",
+                        help="Refreshes the databases of all account profiles in the config file, then quits")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="The maximum amount of accounts refreshed at the same time in batch mode, "
+                             "or of pages downloaded at the same time while crawling the market")
+    parser.add_argument("-m", "--market", action="store_true",
+                        help="Records the market values and points of all players in the league")
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="The maximum average amount of requests per second sent while crawling the market")
+    parser.add_argument("-d", "--daemon", action="store_true",
+                        help="Keeps running and refreshes the database once a day after comunio's market update")
+    parser.add_argument("-t", "--refresh-time", default="05:00", metavar="HH:MM",
+                        help="The time of day (UTC) after which the daemon refreshes the database")
+    parser.add_argument("--daemon-status", action="store_true",
+                        help="Prints the status of a running refresh daemon")
+    parser.add_argument("-i", "--import", nargs="+", metavar="FILE", dest="import_files",
+                        help="Imports historic player values, points, transfers and manager stats from CSV or "
+                             "JSON lines files into the local database, then quits")
+    parser.add_argument("-e", "--export", metavar="FILE",
+                        help="Exports the local database to a CSV (.csv), JSON lines (.jsonl) or Parquet (.parquet) "
+                             "file, then quits. Use - to write to the console")
+    parser.add_argument("--table", default="players",
+                        choices=["players", "player_info", "manager_stats", "market_players", "joined"],
+                        help="The table to export. 'joined' adds each player's buy and sell values to the players")
+    parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], dest="export_format",
+                        help="The export format, if it can't be determined from the file extension")
+    parser.add_argument("--start-date", metavar="YYYY-MM-DD", help="The oldest date to export")
+    parser.add_argument("--end-date", metavar="YYYY-MM-DD", help="The newest date to export")
+    parser.add_argument("--player", action="append", dest="export_players", metavar="NAME",
+                        help="Only exports the given player. May be passed multiple times")
     return parser.parse_args()
 
 
@@ -84,6 +112,10 @@ def main() -> None:
 
         args = parse_arguments()
 
+        if args.batch:  # Batch mode uses the account profiles, not the single-user credentials
+            handle_batch(vars(args))
+            return
+
         if args.username and args.password:
             credentials = CredentialsManager((args.username, args.password))
         else:
@@ -92,52 +124,80 @@ def main() -> None:
         handle_gui(vars(args), credentials) if args.gui else handle_cli(vars(args), credentials)
 
     except Exception as e:
-        SentryLogger.sentry.captureException()
+        SentryLogger.capture_exception()
         raise e
 
 
 def handle_cli(args: Dict[str, object], credentials: CredentialsManager) -> None:
     """
-    Handles the behavious of the CLI of the program
+    Handles the behavious of the CLI of the program.
+    A summary without a refresh is generated from the local database only, without logging in to comunio
 
     :param args:        the previously parsed console arguments
     :param credentials: the previously defined credential manager
     :return:            None
     """
-    if credentials.get_credentials() == ("", ""):
+    if args["daemon_status"]:
+        print_daemon_status()
+        return
+
+    if args["import_files"] is not None:
+        handle_import(args["import_files"])
+        return
+
+    if args["export"] is not None:
+        handle_export(args)
+        return
+
+    if not args["refresh"] and not args["summary"] and args["analytics"] is None and not args["daemon"] \
+            and not args["market"]:
+        print("No valid options passed. See the --help option for more information")
+        sys.exit(1)
+
+    if (args["refresh"] or args["daemon"] or args["market"]) and credentials.get_credentials() == ("", ""):
         print("Please supply a username and password:\n")
         print("    Either via the --password and the --username parameters")
         print("        OR")
         print("    The config file found in " + credentials.get_config_file_location())
         sys.exit(1)
 
-    if not args["refresh"] and not args["summary"]:
-        print("No valid options passed. See the --help option for more information")
-        sys.exit(1)
-
     if args["keep_creds"]:
         credentials.store_credentials()
 
-    try:
-        comunio = ComunioSession(credentials.get_credentials()[0], credentials.get_credentials()[1])
-        database = DatabaseManager(comunio)
-        calculator = StatisticsCalculator(comunio, database)
-
-        if args["refresh"]:
-            database.update_database()
-            print("Database Successfully Updated")
+    if args["daemon"]:
+        handle_daemon(args, credentials)
+        return
 
-        elif args["summary"]:
-            print("\nCash:       {:,}".format(database.get_last_cash_amount()))
-            print("Team value: {:,}".format(database.get_last_team_value_amount()))
-            print("Balance:    {:,}".format(calculator.calculate_total_assets_delta()))
-            print("\nPlayers:\n")
+    try:
+        if args["refresh"] or args["market"]:
+            from comunio.scraper.SessionCache import SessionCache
+            from comunio.scraper.ComunioSession import ComunioSession
+
+            session_cache = None if args["no_cache"] else SessionCache()
+            comunio = ComunioSession(credentials.get_credentials()[0], credentials.get_credentials()[1],
+                                     session_cache=session_cache)
+            database = DatabaseManager()
+            database.set_comunio_session(comunio)
+
+            if args["refresh"]:
+                if database.update_database():
+                    print("Database Successfully Updated")
+                else:
+                    print("Today's data was already entered, the database is up to date")
+
+            if args["market"]:
+                start = time.time()
+                player_count = database.update_market(args["rate"], args["workers"])
+                print("Recorded {:,} market players in {:.2f}s".format(player_count, time.time() - start))
+        else:
+            comunio = None
+            database = DatabaseManager()
 
-            players = database.get_players_on_day(0)
-            print_player_list(players)
+        if args["summary"]:
+            print_summary(database, StatisticsCalculator(comunio, database))
 
-        else:
-            print("No valid options passed. See the --help option for more information")
+        if args["analytics"] is not None:
+            print_analytics(database, args["analytics"])
 
     except ReferenceError:
         print("Player data unavailable due to having 5 players on the transfer list.")
@@ -149,6 +209,190 @@ def handle_cli(args: Dict[str, object], credentials: CredentialsManager) -> None
         print("The provided credentials are invalid")
 
 
+def handle_daemon(args: Dict[str, object], credentials: CredentialsManager) -> None:
+    """
+    Runs the refresh daemon until it is interrupted or terminated
+
+    :param args:        the previously parsed console arguments
+    :param credentials: the previously defined credential manager
+    :return:            None
+    """
+    import signal
+    import datetime
+    from comunio.scraper.SessionCache import SessionCache
+    from comunio.refresh.RefreshDaemon import RefreshDaemon
+
+    try:
+        refresh_time = datetime.datetime.strptime(args["refresh_time"], "%H:%M").time()
+    except ValueError:
+        print("Invalid refresh time " + args["refresh_time"] + ", use the format HH:MM")
+        sys.exit(1)
+
+    daemon = RefreshDaemon(credentials.get_credentials()[0], credentials.get_credentials()[1], refresh_time,
+                           session_cache=None if args["no_cache"] else SessionCache())
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: daemon.stop())
+
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+
+
+def print_daemon_status() -> None:
+    """
+    Prints the content of the refresh daemon's status file
+
+    :return: None
+    """
+    import os
+    import json
+
+    status_file = os.path.join(os.path.expanduser("~"), ".comunio", "daemon_status.json")
+    if not os.path.isfile(status_file):
+        print("The refresh daemon was never started")
+        sys.exit(1)
+
+    with open(status_file, "r") as status:
+        for key, value in json.load(status).items():
+            print((key + ":").ljust(15) + str(value))
+
+
+def handle_batch(args: Dict[str, object]) -> None:
+    """
+    Refreshes the databases of all account profiles defined in the config file and prints a report.
+    Exits with a non-zero exit code if any of the refreshes failed
+
+    :param args: the previously parsed console arguments
+    :return:     None
+    """
+    from comunio.refresh.BatchRefresher import BatchRefresher
+
+    credentials = CredentialsManager(("", ""))  # Only used to read the account profiles
+
+    try:
+        profiles = credentials.get_account_profiles()
+    except ValueError as e:
+        print(str(e))
+        sys.exit(1)
+
+    if len(profiles) == 0:
+        print("No account profiles found. Add a section like the following to "
+              + credentials.get_config_file_location() + ":\n")
+        print("    [account <name>]\n    username=<username>\n    password=<password>")
+        sys.exit(1)
+
+    start = time.time()
+    results = BatchRefresher(profiles, args["workers"], use_session_cache=not args["no_cache"]).run()
+    total_time = time.time() - start
+
+    name_length = max(len(result["name"]) for result in results + [{"name": "Account"}])
+    print(("{:<" + str(name_length) + "} | {:>7} | {:>8} | {:>8} | {}").format("Account", "Status", "Login", "Update",
+                                                                                "Error"))
+    for result in results:
+        print(("{:<" + str(name_length) + "} | {:>7} | {:>7.2f}s | {:>7.2f}s | {}")
+              .format(result["name"], "OK" if result["success"] else "FAILED",
+                      result["login_time"], result["update_time"], result["error"]))
+
+    failures = len([result for result in results if not result["success"]])
+    print("\nRefreshed {} of {} accounts in {:.2f}s".format(len(results) - failures, len(results), total_time))
+    if failures > 0:
+        sys.exit(1)
+
+
+def handle_import(import_files: List[str]) -> None:
+    """
+    Imports historic data from a list of files into the local database and prints the amount of imported entries.
+    Exits with a non-zero exit code if a file could not be imported
+
+    :param import_files: the paths to the CSV or JSON lines files
+    :return:             None
+    """
+    database = DatabaseManager()
+
+    for import_file in import_files:
+        start = time.time()
+        try:
+            result = database.import_history(import_file)
+        except (OSError, ValueError) as e:
+            print("Importing " + import_file + " failed: " + str(e))
+            sys.exit(1)
+
+        print("{}: {:,} records in {:.2f}s, {:,} new player entries, {:,} new market entries, "
+              "{:,} new manager stats, {:,} new transfers"
+              .format(import_file, result["records"], time.time() - start, result["players"],
+                      result["market_players"], result["manager_stats"], result["player_info"]))
+
+
+def handle_export(args: Dict[str, object]) -> None:
+    """
+    Exports the local database into a file. Exits with a non-zero exit code if the export failed
+
+    :param args: the previously parsed console arguments
+    :return:     None
+    """
+    start = time.time()
+    try:
+        rows = DatabaseManager().export_history(args["export"], args["table"], args["export_format"],
+                                                args["start_date"], args["end_date"], args["export_players"])
+    except (OSError, ValueError, ImportError) as e:
+        print("Exporting " + args["export"] + " failed: " + str(e), file=sys.stderr)
+        sys.exit(1)
+
+    # The summary is printed to stderr, so that it does not end up in exports written to the console
+    print("Exported {:,} rows in {:.2f}s".format(rows, time.time() - start), file=sys.stderr)
+
+
+def print_summary(database: DatabaseManager, calculator: StatisticsCalculator) -> None:
+    """
+    Prints a summary of the comunio account as recorded in the local database
+
+    :param database:   the database to read from
+    :param calculator: the statistics calculator to use
+    :return:           None
+    """
+    assets = database.get_latest_assets()
+    if assets is None:
+        print("The local database does not contain any data yet. Use the --refresh option to update it")
+        return
+
+    print("\nCash:       {:,}".format(assets["cash"]))
+    print("Team value: {:,}".format(assets["team_value"]))
+    print("Balance:    {:,}".format(calculator.calculate_total_assets_delta()))
+    print("\nPlayers:\n")
+
+    players = database.get_latest_players()
+    print_player_list(players)
+
+
+def print_analytics(database: DatabaseManager, days: int) -> None:
+    """
+    Prints a ranking of all recorded players by their points per million over a window of days
+
+    :param database: the database to read from
+    :param days:     the amount of days to consider, 0 to consider the whole history
+    :return:         None
+    """
+    from comunio.calc.PortfolioAnalytics import PortfolioAnalytics
+
+    analytics = PortfolioAnalytics(database, -days if days > 0 else None)
+    metrics = analytics.get_player_metrics()
+    ranking = analytics.rank_players("points_per_million")
+
+    if len(ranking) == 0:
+        print("The local database does not contain any data yet. Use the --refresh option to update it")
+        return
+
+    name_length = max(len(name) for name, _ in ranking)
+    print(("{:<" + str(name_length) + "} | {:>11} | {:>12} | {:>10} | {:>12}")
+          .format("Name", "Points/Mio.", "Profit", "Volatility", "Max Drawdown"))
+
+    for name, points_per_million in ranking:
+        player = metrics[name]
+        profit = "---" if math.isnan(player["profit"]) else "{:,.0f}".format(player["profit"])
+        print(("{:<" + str(name_length) + "} | {:>11.2f} | {:>12} | {:>9.2f}% | {:>11.2f}%")
+              .format(name, points_per_million, profit, player["volatility"] * 100, player["max_drawdown"] * 100))
+
+
 def print_player_list(players: List[Dict[str, str]]) -> None:
     """
     Prints the player list in a nicely viewable table on the console
@@ -188,10 +432,30 @@ def handle_gui(args: Dict[str, object], credentials: CredentialsManager) -> None
     :param credentials: the previously defined credential manager
     :return:            None
     """
-    comunio = start_logi_gui(credentials)
+    # These imports are also necessary to get PyInstaller to actually bundle all required modules
+    # when creating a binary executable
+
+    # noinspection PyUnresolvedReferences
+    import tkinter
+    # noinspection PyUnresolvedReferences
+    import tkinter.filedialog
+    # noinspection PyUnresolvedReferences
+    import matplotlib.backends.backend_tkagg
+    from comunio.ui.LoginScreen import start as start_login_gui
+    from comunio.ui.StatisticsViewer import start as start_gui
+    from comunio.calc.GraphCache import GraphCache
+
+    if args["offline"]:
+        database = DatabaseManager(use_history_cache=True)
+        calculator = StatisticsCalculator(None, database, bool(args["xkcd"]), GraphCache())
+        start_gui(None, database, calculator, credentials.get_credentials()[0])
+        return
+
+    comunio = start_login_gui(credentials)
     if comunio is not None:
-        database = DatabaseManager(comunio)
-        calculator = StatisticsCalculator(comunio, database, bool(args["xkcd"]))
+        # The viewer updates the database in the background, so the window opens right after logging in
+        database = DatabaseManager(use_history_cache=True)
+        calculator = StatisticsCalculator(comunio, database, bool(args["xkcd"]), GraphCache())
         start_gui(comunio, database, calculator)
 
 
@@ -126,12 +126,12 @@ class PypiVariables:
     The list trove classifiers applicable to this project
     """
 
-    install_requires = ["raven", "requests", "bs4", "matplotlib"]
+    install_requires = ["raven", "requests", "bs4", "matplotlib", "numpy"]
     """
     Python Packaging Index dependencies
     """
 
-    extras_require = {"gui": ["PyQt5"]}
+    extras_require = {"gui": ["PyQt5"], "lxml": ["lxml"], "parquet": ["pyarrow"]}
     """
     Optional dependencies for Pypi
     """
@@ -190,12 +190,21 @@ class SentryLogger:
 
     sentry = None
     """
-    The sentry client
+    The sentry client. Created on first use, since importing raven takes a comparatively long time
     """
 
-    # Create the Sentry client to log bugs
-    try:
-        from raven import Client
-        sentry = Client(dsn=sentry_dsn, release=General.version_number)
-    except ImportError:
-        Client = None
+    @staticmethod
+    def capture_exception() -> None:
+        """
+        Reports the exception that is currently being handled to sentry, if raven is installed
+
+        :return: None
+        """
+        if SentryLogger.sentry is None:
+            try:
+                from raven import Client
+                SentryLogger.sentry = Client(dsn=SentryLogger.sentry_dsn, release=General.version_number)
+            except ImportError:
+                return
+
+        SentryLogger.sentry.captureException()
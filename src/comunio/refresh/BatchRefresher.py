@@ -0,0 +1,119 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import os
+import time
+from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from comunio.scraper.ComunioFetcher import ComunioFetcher
+
+
+class BatchRefresher(object):
+    """
+    Class that refreshes the local databases of multiple comunio accounts at once.
+
+    Every account is refreshed in its own worker process with its own session and its own database, so the
+    accounts don't share any state. The amount of worker processes is bounded, so refreshing many accounts
+    takes about as long as the slowest account per worker instead of the sum of all refreshes.
+    """
+
+    def __init__(self, profiles: List[Dict[str, str]], max_workers: int = 4,
+                 base_url: str = ComunioFetcher.base_url, use_session_cache: bool = True) -> None:
+        """
+        Initializes the batch refresher
+
+        :param profiles:          the account profiles as provided by CredentialsManager.get_account_profiles()
+        :param max_workers:       the maximum amount of accounts refreshed at the same time
+        :param base_url:          the address of the comunio website. Can be overridden for testing purposes
+        :param use_session_cache: if set, recently established sessions are reused instead of logging in again
+        """
+        self.__profiles = profiles
+        self.__max_workers = max_workers
+        self.__base_url = base_url
+        self.__use_session_cache = use_session_cache
+
+    def run(self) -> List[Dict[str, object]]:
+        """
+        Refreshes all accounts. A failure of one account does not affect the other accounts
+
+        :return: the results of the refreshes in the order of the profiles, as provided by refresh_account()
+        """
+        if len(self.__profiles) == 0:
+            return []
+
+        jobs = [(profile, self.__base_url, self.__use_session_cache) for profile in self.__profiles]
+        with ProcessPoolExecutor(max_workers=min(self.__max_workers, len(jobs))) as executor:
+            return list(executor.map(BatchRefresher.refresh_account, *zip(*jobs)))
+
+    @staticmethod
+    def refresh_account(profile: Dict[str, str], base_url: str = ComunioFetcher.base_url,
+                        use_session_cache: bool = True) -> Dict[str, object]:
+        """
+        Logs in to a single account and updates its database. Runs in a worker process
+
+        :param profile:           the account profile
+        :param base_url:          the address of the comunio website
+        :param use_session_cache: if set, a recently established session is reused instead of logging in again
+        :return:                  the result of the refresh as a dictionary with the following keys:
+                                      name:        the name of the profile
+                                      success:     True if the database was updated, False otherwise
+                                      error:       a description of the error if the refresh failed
+                                      login_time:  the time spent logging in, in seconds
+                                      update_time: the time spent updating the database, in seconds
+        """
+        # These modules are only needed in the worker processes
+        from comunio.scraper.SessionCache import SessionCache
+        from comunio.scraper.ComunioSession import ComunioSession
+        from comunio.database.DatabaseManager import DatabaseManager
+
+        result = {"name": profile["name"], "success": False, "error": "", "login_time": 0.0, "update_time": 0.0}
+
+        try:
+            start = time.time()
+            session_cache = SessionCache() if use_session_cache else None
+            comunio_session = ComunioSession(profile["username"], profile["password"], base_url,
+                                             session_cache=session_cache)
+            result["login_time"] = time.time() - start
+
+            start = time.time()
+            database_directory = os.path.dirname(profile["database"])
+            if database_directory and not os.path.isdir(database_directory):
+                os.makedirs(database_directory, exist_ok=True)
+            DatabaseManager(comunio_session, profile["database"])
+            result["update_time"] = time.time() - start
+
+            result["success"] = True
+
+        except ReferenceError:
+            result["error"] = "5 players on the transfer list"
+        except ConnectionError:
+            result["error"] = "Network error"
+        except PermissionError:
+            result["error"] = "Invalid credentials"
+        except Exception as e:
+            result["error"] = type(e).__name__ + ": " + str(e)
+
+        return result
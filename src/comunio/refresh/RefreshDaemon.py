@@ -0,0 +1,238 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import os
+import json
+import time
+import random
+import datetime
+import threading
+from typing import Dict, TYPE_CHECKING
+from comunio.scraper.ComunioFetcher import ComunioFetcher
+from comunio.database.DatabaseManager import DatabaseManager
+
+if TYPE_CHECKING:
+    from comunio.scraper.SessionCache import SessionCache
+    from comunio.scraper.ComunioSession import ComunioSession
+
+
+class RefreshDaemon(object):
+    """
+    Class that keeps the local database up to date in a long-running process.
+
+    Comunio updates the market values once a day. The daemon refreshes the database once after each of these
+    updates, at a configurable time plus a random delay, so that many daemons don't all hit comunio at the
+    same moment. The logged in session and the database connection are kept open between refreshes, a new
+    login only happens once comunio rejects the session. The state of the daemon is written to a JSON status file
+    after every refresh.
+    """
+
+    def __init__(self, username: str, password: str, refresh_time: datetime.time = datetime.time(5, 0),
+                 jitter: int = 1800, retry_interval: int = 300, status_file: str = "",
+                 database_location_override: str = "", base_url: str = ComunioFetcher.base_url,
+                 session_cache: "SessionCache" = None) -> None:
+        """
+        Initializes the daemon. The daemon starts once run() is called
+
+        :param username:                   the user's user name for comunio.de
+        :param password:                   the user's password. Kept in memory to log in again once the session expires
+        :param refresh_time:               the time of day (UTC) after which the daily refresh is done
+        :param jitter:                     the maximum random delay after the refresh time, in seconds
+        :param retry_interval:             the delay before retrying a failed refresh, in seconds. Doubles with every
+                                           consecutive failure, up to one hour
+        :param status_file:                the location of the status file. Defaults to ~/.comunio/daemon_status.json
+        :param database_location_override: the location of the database, uses the default location if empty
+        :param base_url:                   the address of the comunio website. Can be overridden for testing purposes
+        :param session_cache:              if provided, a previously cached session is reused for the first login
+        """
+        if not status_file:
+            status_file = os.path.join(os.path.expanduser("~"), ".comunio", "daemon_status.json")
+
+        self.__username = username
+        self.__password = password
+        self.__refresh_time = refresh_time
+        self.__jitter = jitter
+        self.__retry_interval = retry_interval
+        self.__status_file = status_file
+        self.__base_url = base_url
+        self.__session_cache = session_cache
+
+        self.__comunio_session = None
+        self.__database_location_override = database_location_override
+        self.__database = None
+        self.__stop_event = threading.Event()
+        self.__status = {"pid": os.getpid(),
+                         "state": "starting",
+                         "refreshes": 0,
+                         "failures": 0,
+                         "logins": 0,
+                         "last_run": None,
+                         "last_success": None,
+                         "last_result": None,
+                         "last_duration": None,
+                         "next_run": None}
+
+    def run(self, max_refreshes: int = None) -> None:
+        """
+        Runs the daemon until stop() is called. The first refresh is done right away, afterwards the database is
+        refreshed once a day after the refresh time. The database connection is closed once the daemon stops
+
+        :param max_refreshes: if provided, the daemon stops after this amount of refresh attempts
+        :return:              None
+        """
+        attempts = 0
+        consecutive_failures = 0
+        next_run = datetime.datetime.utcnow()
+
+        while not self.__stop_event.is_set():
+
+            self.__set_status(state="waiting", next_run=next_run.isoformat())
+            if self.__stop_event.wait(max((next_run - datetime.datetime.utcnow()).total_seconds(), 0)):
+                break
+
+            success = self.refresh()
+            attempts += 1
+
+            if success:
+                consecutive_failures = 0
+                next_run = self.get_next_run_time(datetime.datetime.utcnow())
+            else:
+                consecutive_failures += 1
+                delay = min(self.__retry_interval * 2 ** (consecutive_failures - 1), 3600)
+                next_run = datetime.datetime.utcnow() + datetime.timedelta(seconds=delay)
+
+            if max_refreshes is not None and attempts >= max_refreshes:
+                break
+
+        if self.__database is not None:
+            self.__database.close()
+            self.__database = None
+        self.__set_status(state="stopped", next_run=None)
+
+    def stop(self) -> None:
+        """
+        Stops the daemon. May be called from any thread or a signal handler.
+        A refresh that is currently running is completed first
+
+        :return: None
+        """
+        self.__stop_event.set()
+
+    def get_next_run_time(self, now: datetime.datetime) -> datetime.datetime:
+        """
+        Calculates the time of the next refresh, which is the next occurrence of the refresh time
+        plus a random delay
+
+        :param now: the current time (UTC)
+        :return:    the time of the next refresh (UTC)
+        """
+        next_run = datetime.datetime.combine(now.date(), self.__refresh_time)
+        if next_run <= now:
+            next_run += datetime.timedelta(days=1)
+        return next_run + datetime.timedelta(seconds=random.uniform(0, self.__jitter))
+
+    def refresh(self) -> bool:
+        """
+        Refreshes the database once. Reuses the existing session and only logs in again if comunio rejects it
+
+        :return: True if the refresh succeeded (or today's data was already entered), False otherwise
+        """
+        start = time.time()
+        self.__set_status(state="refreshing", last_run=datetime.datetime.utcnow().isoformat())
+
+        try:
+            if self.__comunio_session is None:
+                # A new session has just loaded the profile data, reloading it would fetch the same pages again
+                self.__comunio_session = self.__login(self.__session_cache)
+            else:
+                try:
+                    self.__comunio_session.reload_info()
+                except (PermissionError, ValueError):
+                    # The session expired or comunio served an incomplete page. A fresh login loads up-to-date data
+                    # by itself and retries incomplete pages
+                    self.__comunio_session = self.__login(None)
+
+            if self.__database is None:  # Opened by the thread that runs the refreshes
+                self.__database = DatabaseManager(None, self.__database_location_override)
+            self.__database.set_comunio_session(self.__comunio_session)
+            result = "updated" if self.__database.update_database() else "already up to date"
+
+            self.__set_status(state="idle", last_success=datetime.datetime.utcnow().isoformat(), last_result=result,
+                              last_duration=time.time() - start, refreshes=self.__status["refreshes"] + 1)
+            return True
+
+        except (ConnectionError, PermissionError, ReferenceError) as e:
+            if isinstance(e, PermissionError):
+                self.__comunio_session = None
+            self.__set_status(state="failed", last_result=type(e).__name__ + ": " + str(e),
+                              last_duration=time.time() - start, failures=self.__status["failures"] + 1)
+            return False
+
+        except Exception as e:
+            # Unexpected errors, like database errors or pages that can't be parsed anymore, must not end the
+            # daemon. The refresh is retried later and the error is recorded in the status file
+            self.__set_status(state="failed", last_result="Unexpected " + type(e).__name__ + ": " + str(e),
+                              last_duration=time.time() - start, failures=self.__status["failures"] + 1)
+            return False
+
+    def __login(self, session_cache: "SessionCache" = None) -> "ComunioSession":
+        """
+        Logs in to comunio
+
+        :param session_cache:    if provided, a cached session is reused if possible
+        :raises ConnectionError: When the connection failed due to network error
+        :raises PermissionError: When the provided credentials were rejected
+        :raises ReferenceError:  When the comunio account currently has 5 players for sale
+        :return:                 the logged in session
+        """
+        from comunio.scraper.ComunioSession import ComunioSession
+
+        self.__status["logins"] += 1
+        return ComunioSession(self.__username, self.__password, self.__base_url, session_cache=session_cache)
+
+    def get_status(self) -> Dict[str, object]:
+        """
+        :return: the current status of the daemon, as written to the status file
+        """
+        return dict(self.__status)
+
+    def __set_status(self, **changes: object) -> None:
+        """
+        Updates the status and writes it to the status file
+
+        :param changes: the status entries to change
+        :return:        None
+        """
+        self.__status.update(changes)
+
+        status_directory = os.path.dirname(self.__status_file)
+        if status_directory and not os.path.isdir(status_directory):
+            os.makedirs(status_directory)
+
+        temporary_path = self.__status_file + ".tmp"
+        with open(temporary_path, "w") as status_file:
+            json.dump(self.__status, status_file, indent=4)
+        os.replace(temporary_path, self.__status_file)
@@ -26,7 +26,8 @@ LICENSE
 import requests
 import datetime
 from typing import List, Dict
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from comunio.scraper.HtmlParser import HtmlParser
 
 
 class ComunioFetcher(object):
@@ -34,8 +35,49 @@ class ComunioFetcher(object):
     A class containing various methods for parsing information from comunio.de
     """
 
+    base_url = "http://www.comunio.de/"
+    """
+    The address of the comunio website. All other pages are relative to this address
+    """
+
+    login_page = "login.phtml"
+    """
+    The page used to log in
+    """
+
+    player_info_page = "playerInfo.phtml?pid="
+    """
+    The profile page of a comunio user, the user's comunio ID has to be appended
+    """
+
+    sell_page = "putOnExchangemarket.phtml"
+    """
+    The page listing the user's players that are not on the exchange market
+    """
+
+    on_sale_page = "exchangemarket.phtml?takeplayeroff_x=22"
+    """
+    The page listing the user's players that are currently on the exchange market
+    """
+
+    news_page = "team_news.phtml"
+    """
+    The page containing the user's news articles
+    """
+
+    exchange_market_page = "exchangemarket.phtml?viewoffers_x=22&page="
+    """
+    The exchange market listing of all players currently for sale. The listing is paginated,
+    the page number (starting at 1) has to be appended
+    """
+
+    club_page = "teamInfo.phtml?tid="
+    """
+    The page listing all players of a Bundesliga club, the club's ID has to be appended
+    """
+
     @staticmethod
-    def get_own_player_list(session: requests.session) -> List[Dict[str, str or int]]:
+    def get_own_player_list(session: requests.session, base_url: str = base_url) -> List[Dict[str, str or int]]:
         """
         Creates dictionaries modelling the user's current players and returns them
         in a list.
@@ -47,17 +89,30 @@ class ComunioFetcher(object):
         points:   The player's currently accumulated performance points
         position: The player's position
 
-        :param:   The requests session initialized by the ComunioSession
-        :return:  A list of the user's players as dictionaries
+        :param session:  The requests session initialized by the ComunioSession
+        :param base_url: The address of the comunio website
+        :return:         A list of the user's players as dictionaries
         """
-        player_list = []
+        sell_html = session.get(base_url + ComunioFetcher.sell_page).text
+        on_sale_html = session.get(base_url + ComunioFetcher.on_sale_page).text
+        return ComunioFetcher.parse_own_player_list(sell_html, on_sale_html)
 
-        sell_html = session.get("http://www.comunio.de/putOnExchangemarket.phtml")
-        on_sale_html = session.get("http://www.comunio.de/exchangemarket.phtml?takeplayeroff_x=22")
-        soups = (BeautifulSoup(sell_html.text, "html.parser"), BeautifulSoup(on_sale_html.text, "html.parser"))
+    @staticmethod
+    def parse_own_player_list(sell_html: str, on_sale_html: str) -> List[Dict[str, str or int]]:
+        """
+        Parses the user's current players from the already downloaded sell and on-sale pages.
+        The format of the player dictionaries is the same as in get_own_player_list()
+
+        :param sell_html:    the HTML of the page located at ComunioFetcher.sell_page
+        :param on_sale_html: the HTML of the page located at ComunioFetcher.on_sale_page
+        :return:             A list of the user's players as dictionaries
+        """
+        player_list = []
+        strainer = SoupStrainer("tr", {"class": ["tr1", "tr2"]})
+        soups = (HtmlParser.parse(sell_html, strainer), HtmlParser.parse(on_sale_html, strainer))
 
         for i, soup in enumerate(soups):
-            players = soup.select(".tr1") + soup.select(".tr2")
+            players = soup.select(".tr1, .tr2")
 
             for player in players:
 
@@ -78,6 +133,50 @@ class ComunioFetcher(object):
 
         return player_list
 
+    @staticmethod
+    def parse_market_page(html: str) -> List[Dict[str, str or int]]:
+        """
+        Parses a page of the exchange market listing. The rows use the same layout as the page listing
+        the user's own players that are on sale: the name, club, market value, points and position are
+        found in the second, third, fifth, sixth and eighth column
+
+        :param html: the HTML of a page located at ComunioFetcher.exchange_market_page
+        :return:     A list of player dictionaries with the keys name, club, position, value and points.
+                     Empty if the page is past the last page of the listing
+        """
+        soup = HtmlParser.parse(html, SoupStrainer("tr", {"class": ["tr1", "tr2"]}))
+
+        players = []
+        for player in soup.select(".tr1, .tr2"):
+            attrs = player.select("td")
+            players.append({"name": attrs[1].text.strip(),
+                            "club": attrs[2].text.strip(),
+                            "value": int(attrs[4].text.strip().replace(".", "")),
+                            "points": int(attrs[5].text.strip()),
+                            "position": attrs[7].text.strip()})
+        return players
+
+    @staticmethod
+    def parse_club_page(html: str) -> List[Dict[str, str or int]]:
+        """
+        Parses the player list of a Bundesliga club. The rows use the same layout as the page listing
+        the user's own players that are not on sale
+
+        :param html: the HTML of a page located at ComunioFetcher.club_page
+        :return:     A list of player dictionaries with the keys name, club, position, value and points
+        """
+        soup = HtmlParser.parse(html, SoupStrainer("tr", {"class": ["tr1", "tr2"]}))
+
+        players = []
+        for player in soup.select(".tr1, .tr2"):
+            attrs = player.select("td")
+            players.append({"name": attrs[0].text.strip(),
+                            "club": attrs[1].text.strip(),
+                            "value": int(attrs[2].text.strip().replace(".", "")),
+                            "points": int(attrs[3].text.strip()),
+                            "position": attrs[4].text.strip()})
+        return players
+
     @staticmethod
     def get_today_transfers(screen_name: str, recent_news: List[Dict[str, str]]) \
             -> List[Dict[str, str or int]]:
@@ -120,21 +219,35 @@ class ComunioFetcher(object):
         return transfers
 
     @staticmethod
-    def get_recent_news_articles(session: requests.session) -> List[Dict[str, str]]:
+    def get_recent_news_articles(session: requests.session, base_url: str = base_url) -> List[Dict[str, str]]:
         """
         Fetches the most recent news articles for the logged in player
 
-        :param:  The requests session initialized by the ComunioSession
-        :return: List of article dictionaries with the following attributes:
-                    - date:    The article's date
-                    - type:    The type of the article, e.g. 'transfers'
-                    - content: The article's content
+        :param session:  The requests session initialized by the ComunioSession
+        :param base_url: The address of the comunio website
+        :return:         List of article dictionaries with the following attributes:
+                            - date:    The article's date
+                            - type:    The type of the article, e.g. 'transfers'
+                            - content: The article's content
+        """
+        html = session.get(base_url + ComunioFetcher.news_page).text
+        return ComunioFetcher.parse_recent_news_articles(html)
+
+    @staticmethod
+    def parse_recent_news_articles(html: str) -> List[Dict[str, str]]:
+        """
+        Parses the most recent news articles from the already downloaded news page.
+        The format of the article dictionaries is the same as in get_recent_news_articles()
+
+        :param html: the HTML of the page located at ComunioFetcher.news_page
+        :return:     List of article dictionaries
         """
-        html = session.get("http://www.comunio.de/team_news.phtml").text
-        soup = BeautifulSoup(html, "html.parser")
+        strainer = SoupStrainer(attrs={"class": ["article_header1", "article_header2",
+                                                 "article_content1", "article_content2"]})
+        soup = HtmlParser.parse(html, strainer)
 
-        article_headers = soup.select(".article_header1") + soup.select(".article_header2")
-        article_content = soup.select(".article_content1") + soup.select(".article_content2")
+        article_headers = soup.select(".article_header1, .article_header2")
+        article_content = soup.select(".article_content1, .article_content2")
 
         articles = []
 
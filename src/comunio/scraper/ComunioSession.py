@@ -23,11 +23,17 @@ LICENSE
 """
 
 # imports
-import time
 import requests
-from bs4 import BeautifulSoup
+import threading
+from bs4 import SoupStrainer
+from comunio.scraper.HtmlParser import HtmlParser
+from comunio.scraper.FetchPlanner import FetchPlanner
+from comunio.scraper.TokenBucket import TokenBucket
+from comunio.scraper.MarketCrawler import MarketCrawler
 from comunio.scraper.ComunioFetcher import ComunioFetcher
-from typing import Dict, List
+from comunio.scraper.SessionCache import SessionCache
+from comunio.scraper.TransportPolicy import TransportPolicy
+from typing import Callable, Dict, List
 
 
 class ComunioSession:
@@ -35,17 +41,27 @@ class ComunioSession:
     The Comunio Web scraping class, which stores the authenticated comunio session
     """
 
-    def __init__(self, username: str, password: str) -> None:
+    def __init__(self, username: str, password: str, base_url: str = ComunioFetcher.base_url,
+                 transport_policy: TransportPolicy = None, session_cache: SessionCache = None,
+                 progress_callback: Callable[[str], None] = None, cancel_event: threading.Event = None) -> None:
         """
         Constructor that creates the logged in session. If any sort of network or authentication
         error occurs, the session switches into offline mode by unsetting the __connected flag
 
-        :raises ReferenceError:  When the comunio account currently as 5 players for sale, which makes it impossible
-                                 to fetch the market values of players not currently on sale. Thanks Comunio.
-        :raises PermissionError: When the provided credentials were rejected
-        :raises ConnectionError: When the connection failed due to network error
-        :param username:         the user's user name for comunio.de
-        :param password:         the user's password
+        :raises ReferenceError:   When the comunio account currently as 5 players for sale, which makes it impossible
+                                  to fetch the market values of players not currently on sale. Thanks Comunio.
+        :raises PermissionError:  When the provided credentials were rejected
+        :raises ConnectionError:  When the connection failed due to network error
+        :raises InterruptedError: When the cancel event was set before the session was established
+        :param username:          the user's user name for comunio.de
+        :param password:          the user's password
+        :param base_url:          the address of the comunio website. Can be overridden for testing purposes
+        :param transport_policy:  defines the connection pooling, timeouts and retries. Uses the defaults if omitted
+        :param session_cache:     if provided, a previously cached session of the same credentials is reused
+                                  instead of logging in again, once comunio confirmed that it is still logged in.
+                                  Newly established sessions are stored in the cache
+        :param progress_callback: if provided, called with a short description of every step of the login
+        :param cancel_event:      if provided, the login is aborted as soon as possible once this event is set
         """
         # We don't store the username and password to avoid having this stored in memory,
         # instead, we use a session to stay logged in
@@ -55,14 +71,34 @@ class ComunioSession:
         self.__comunio_id = ""
         self.__player_name = username
         self.__screen_name = username
+        self.__base_url = base_url
 
         self.__player_list = None
         self.__today_transfers = None
         self.__recent_news_articles = None
 
-        self.__session = requests.session()
+        self.__progress_callback = progress_callback
+        self.__cancel_event = cancel_event if cancel_event is not None else threading.Event()
+
+        self.__transport_policy = transport_policy if transport_policy is not None else TransportPolicy()
+        self.__session = self.__transport_policy.create_session()
 
-        self.__login(username, password)
+        cached_state = session_cache.load(username, password) if session_cache is not None else None
+        restored = False
+
+        if cached_state is not None and cached_state.get("base_url") == base_url:
+            self.__report_progress("Restoring session")
+            self.__restore_state(cached_state)
+            restored = self.__is_session_valid()
+            if not restored:
+                session_cache.invalidate(username)
+                self.__session.cookies.clear()
+
+        if not restored:
+            self.__login(username, password)
+            self.__check_cancelled()
+            if session_cache is not None:
+                session_cache.store(username, password, self.__export_state())
 
         if len(self.__player_list) <= 5:
             raise ReferenceError("5 players on transfer list, impossible to establish market values of other players")
@@ -71,7 +107,8 @@ class ComunioSession:
         """
         Logs in the user and creates a logged in session object for further queries
 
-        :raises ConnectionError: When the connection failed due to network error
+        :raises ConnectionError: When the connection failed due to network error or the profile data could not be
+                                 loaded within the retry budget
         :raises PermissionError: When the provided credentials were rejected
         :param username:         the user's user name for comunio.de
         :param password:         the user's password
@@ -81,31 +118,116 @@ class ComunioSession:
                    "pass": password,
                    "action": 'login'}
 
+        self.__report_progress("Logging in")
         try:
-            self.__session.post("http://www.comunio.de/login.phtml", data=payload)
+            self.__session.post(self.__base_url + ComunioFetcher.login_page, data=payload)
+        except requests.RequestException:
+            raise ConnectionError("Network Error")
 
-            data_fetched = False
-            while not data_fetched:
-                try:
-                    self.reload_info()
-                    data_fetched = True
-                except ValueError:
-                    time.sleep(1)
+        # Comunio sometimes serves incomplete pages directly after logging in, which results in ValueErrors
+        backoff_delays = self.__transport_policy.get_backoff_delays()
+        while True:
+            try:
+                self.reload_info()
+                break
+            except ValueError:
+                delay = next(backoff_delays, None)
+                if delay is None:
+                    raise ConnectionError("Profile data could not be loaded")
+                # Waiting on the cancel event instead of sleeping allows cancelling during the backoff
+                self.__cancel_event.wait(delay)
+
+    def __is_session_valid(self) -> bool:
+        """
+        Checks if the session's cookies are still accepted by comunio, using a single request of the news page,
+        which only contains the user's ID if the user is logged in
 
-        except requests.ConnectionError:
+        :raises ConnectionError: When the connection failed due to network error
+        :return:                 True if the session is still logged in, False otherwise
+        """
+        try:
+            html = self.__session.get(self.__base_url + ComunioFetcher.news_page).text
+        except requests.RequestException:
             raise ConnectionError("Network Error")
-  
+
+        soup = HtmlParser.parse(html, SoupStrainer("div", {"id": "userid"}))
+        return soup.find("div", {"id": "userid"}) is not None
+
+    def __report_progress(self, step: str) -> None:
+        """
+        Reports the current step of the login to the progress callback, after making sure that the login
+        was not cancelled in the meantime
+
+        :raises InterruptedError: When the login was cancelled
+        :param step:              a short description of the step
+        :return:                  None
+        """
+        self.__check_cancelled()
+        if self.__progress_callback is not None:
+            self.__progress_callback(step)
+
+    def __check_cancelled(self) -> None:
+        """
+        :raises InterruptedError: When the cancel event was set
+        :return:                  None
+        """
+        if self.__cancel_event.is_set():
+            raise InterruptedError("Login cancelled")
+
+    def __export_state(self) -> Dict[str, object]:
+        """
+        Exports the session's cookies and profile information
+
+        :return: the session state as a JSON serializable dictionary
+        """
+        cookies = [{"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path}
+                   for cookie in self.__session.cookies]
+
+        return {"base_url": self.__base_url,
+                "cookies": cookies,
+                "cash": self.__cash,
+                "team_value": self.__team_value,
+                "comunio_id": self.__comunio_id,
+                "player_name": self.__player_name,
+                "screen_name": self.__screen_name,
+                "player_list": self.__player_list,
+                "today_transfers": self.__today_transfers,
+                "recent_news_articles": self.__recent_news_articles}
+
+    def __restore_state(self, state: Dict[str, object]) -> None:
+        """
+        Restores a session state previously exported using __export_state()
+
+        :param state: the session state
+        :return:      None
+        """
+        for cookie in state["cookies"]:
+            self.__session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+
+        self.__cash = state["cash"]
+        self.__team_value = state["team_value"]
+        self.__comunio_id = state["comunio_id"]
+        self.__player_name = state["player_name"]
+        self.__screen_name = state["screen_name"]
+        self.__player_list = state["player_list"]
+        self.__today_transfers = state["today_transfers"]
+        self.__recent_news_articles = state["recent_news_articles"]
+
     def reload_info(self) -> None:
         """
         Loads the user's most important profile information
 
-        :raises ConnectionError: When the connection failed due to network error
-        :raises PermissionError: If incorrect credentials were provided
-        :return:                 None
+        :raises ConnectionError:  When the connection failed due to network error
+        :raises PermissionError:  If incorrect credentials were provided
+        :raises InterruptedError: If the session's cancel event was set
+        :return:                  None
         """
         try:
-            html = self.__session.get("http://www.comunio.de/team_news.phtml").text
-            soup = BeautifulSoup(html, "html.parser")
+            # The news page is downloaded only once, all pages depending on the user ID are downloaded concurrently
+            fetch_planner = FetchPlanner(self.__session)
+            self.__report_progress("Loading profile")
+            html = fetch_planner.get(self.__base_url + ComunioFetcher.news_page)
+            soup = HtmlParser.parse(html, SoupStrainer("div", {"id": ["userid", "manager_money", "teamvalue"]}))
 
             if soup.find("div", {"id": "userid"}) is not None:
 
@@ -113,20 +235,25 @@ class ComunioSession:
                 self.__team_value = int(soup.find("div", {"id": "teamvalue"}).p.text.strip().replace(".", "")[17:-2])
                 self.__comunio_id = soup.find("div", {"id": "userid"}).p.text.strip()[6:]
 
-                screen_name_html = self.__session.get("http://www.comunio.de/playerInfo.phtml?pid=" + self.__comunio_id)
-                screen_name_soup = BeautifulSoup(screen_name_html.text, "html.parser")
+                player_info_url = self.__base_url + ComunioFetcher.player_info_page + self.__comunio_id
+                sell_url = self.__base_url + ComunioFetcher.sell_page
+                on_sale_url = self.__base_url + ComunioFetcher.on_sale_page
+                self.__report_progress("Loading players")
+                pages = fetch_planner.fetch([player_info_url, sell_url, on_sale_url])
+
+                screen_name_soup = HtmlParser.parse(pages[player_info_url], SoupStrainer("div", {"id": "title"}))
                 self.__player_name = screen_name_soup.find("div", {"id": "title"}).h1.text
                 self.__screen_name = self.__player_name.split("\xa0")[0]
 
-                self.__player_list = ComunioFetcher.get_own_player_list(self.__session)
-                self.__recent_news_articles = ComunioFetcher.get_recent_news_articles(self.__session)
+                self.__player_list = ComunioFetcher.parse_own_player_list(pages[sell_url], pages[on_sale_url])
+                self.__recent_news_articles = ComunioFetcher.parse_recent_news_articles(html)
                 self.__today_transfers = ComunioFetcher.get_today_transfers(self.__screen_name,
                                                                             self.__recent_news_articles)
 
             else:
                 raise PermissionError("Log In failed, incorrect credentials")
 
-        except requests.ConnectionError:
+        except requests.RequestException:
             raise ConnectionError("Network Error")
 
     def get_cash(self) -> int:
@@ -171,3 +298,19 @@ class ComunioSession:
         """
 
         return self.__recent_news_articles
+
+    def get_market_players(self, rate_limiter: TokenBucket = None, max_workers: int = 4) \
+            -> List[Dict[str, str or int]]:
+        """
+        Crawls the market values and points of all players in the league using the logged in session.
+        See MarketCrawler for details
+
+        :raises ConnectionError:  When the connection failed due to network error
+        :raises InterruptedError: If the session's cancel event was set during the crawl
+        :param rate_limiter:      the token bucket limiting the amount of requests. Uses the
+                                  MarketCrawler's default if omitted
+        :param max_workers:       the maximum amount of pages downloaded at the same time
+        :return:                  A list of player dictionaries with the keys name, club, position, value and points
+        """
+        return MarketCrawler(self.__session, self.__base_url, rate_limiter, max_workers,
+                             cancel_event=self.__cancel_event).crawl()
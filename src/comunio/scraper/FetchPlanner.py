@@ -0,0 +1,83 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+# imports
+import requests
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FetchPlanner(object):
+    """
+    Class that fetches pages using a shared requests session.
+    Every URL is only downloaded once during the lifetime of a FetchPlanner, independent pages
+    are downloaded concurrently.
+    """
+
+    def __init__(self, session: requests.Session, max_workers: int = 4) -> None:
+        """
+        Initializes the FetchPlanner
+
+        :param session:     the (logged in) requests session used to download the pages
+        :param max_workers: the maximum amount of pages downloaded at the same time
+        """
+        self.__session = session
+        self.__max_workers = max_workers
+        self.__pages = {}
+
+    def fetch(self, urls: List[str]) -> Dict[str, str]:
+        """
+        Downloads a list of pages concurrently. Pages that were already downloaded by this FetchPlanner
+        and URLs that appear more than once are only downloaded once.
+
+        :param urls:                      the URLs of the pages to download
+        :raises requests.ConnectionError: if any of the downloads failed due to a network error
+        :return:                          a dictionary mapping the URLs to the HTML of the pages
+        """
+        missing = []
+        for url in urls:
+            if url not in self.__pages and url not in missing:
+                missing.append(url)
+
+        if len(missing) == 1:
+            self.__pages[missing[0]] = self.__session.get(missing[0]).text
+
+        elif len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.__max_workers, len(missing))) as executor:
+                responses = list(executor.map(self.__session.get, missing))
+
+            for url, response in zip(missing, responses):
+                self.__pages[url] = response.text
+
+        return {url: self.__pages[url] for url in urls}
+
+    def get(self, url: str) -> str:
+        """
+        Downloads a single page, unless it was already downloaded before
+
+        :param url:                       the URL of the page to download
+        :raises requests.ConnectionError: if the download failed due to a network error
+        :return:                          the HTML of the page
+        """
+        return self.fetch([url])[url]
@@ -0,0 +1,91 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+# imports
+from typing import List
+from bs4 import BeautifulSoup, SoupStrainer
+
+
+class HtmlParser(object):
+    """
+    Class that creates BeautifulSoup trees using a configurable parser backend.
+
+    By default, lxml is used if it is installed, otherwise python's built-in html.parser.
+    Callers may pass a SoupStrainer to only build the parts of the tree they actually need.
+    """
+
+    backend = None
+    """
+    The name of the parser backend. Determined automatically on first use if it was not set explicitly
+    """
+
+    use_strainers = True
+    """
+    Can be unset to always build the complete tree, ignoring any strainers. Mostly useful for benchmarking
+    """
+
+    @staticmethod
+    def get_available_backends() -> List[str]:
+        """
+        :return: the names of all parser backends that can be used on this system, fastest first
+        """
+        backends = []
+        try:
+            # noinspection PyUnresolvedReferences
+            import lxml
+            backends.append("lxml")
+        except ImportError:
+            pass
+        backends.append("html.parser")
+        return backends
+
+    @staticmethod
+    def set_backend(backend: str) -> None:
+        """
+        Sets the parser backend to use
+
+        :param backend:     the name of the backend, for example 'lxml' or 'html.parser'
+        :raises ValueError: if the backend is not available on this system
+        :return:            None
+        """
+        if backend not in HtmlParser.get_available_backends():
+            raise ValueError("Parser backend " + backend + " is not available")
+        HtmlParser.backend = backend
+
+    @staticmethod
+    def parse(html: str, parse_only: SoupStrainer = None) -> BeautifulSoup:
+        """
+        Parses an HTML document
+
+        :param html:       the HTML document to parse
+        :param parse_only: an optional SoupStrainer that restricts which elements are added to the tree
+        :return:           the parsed BeautifulSoup tree
+        """
+        if HtmlParser.backend is None:
+            HtmlParser.backend = HtmlParser.get_available_backends()[0]
+
+        if not HtmlParser.use_strainers:
+            parse_only = None
+
+        return BeautifulSoup(html, HtmlParser.backend, parse_only=parse_only)
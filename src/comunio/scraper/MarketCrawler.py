@@ -0,0 +1,137 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import requests
+import threading
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from comunio.scraper.TokenBucket import TokenBucket
+from comunio.scraper.ComunioFetcher import ComunioFetcher
+
+
+class MarketCrawler(object):
+    """
+    Class that collects the market values and points of all players in the league, not just the user's own squad.
+
+    The players are collected from the player lists of all Bundesliga clubs and from the paginated exchange market
+    listing. Pages are downloaded concurrently, but every request has to take a token from a shared token bucket
+    first, which limits the load put on comunio's servers independent of the amount of worker threads.
+    """
+
+    club_ids = list(range(1, 19))
+    """
+    The IDs of the club pages of the 18 Bundesliga clubs
+    """
+
+    def __init__(self, session: requests.Session, base_url: str = ComunioFetcher.base_url,
+                 rate_limiter: TokenBucket = None, max_workers: int = 4, max_pages: int = 100,
+                 cancel_event: threading.Event = None) -> None:
+        """
+        Initializes the market crawler
+
+        :param session:      the logged in requests session
+        :param base_url:     the address of the comunio website
+        :param rate_limiter: the token bucket every request takes a token from.
+                             Defaults to 2 requests per second with bursts of up to max_workers requests
+        :param max_workers:  the maximum amount of pages downloaded at the same time
+        :param max_pages:    the maximum amount of exchange market pages crawled
+        :param cancel_event: if provided, the crawl is aborted as soon as possible once this event is set
+        """
+        self.__session = session
+        self.__base_url = base_url
+        self.__rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket(2.0, max_workers)
+        self.__max_workers = max_workers
+        self.__max_pages = max_pages
+        self.__cancel_event = cancel_event if cancel_event is not None else threading.Event()
+
+    def crawl(self) -> List[Dict[str, str or int]]:
+        """
+        Collects the players of all clubs and of the exchange market
+
+        :raises ConnectionError:  When the connection failed due to network error
+        :raises InterruptedError: When the cancel event was set during the crawl
+        :return:                  A list of player dictionaries with the keys name, club, position, value and
+                                  points, sorted by name and club. Every player is only listed once
+        """
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as executor:
+            club_urls = [self.__base_url + ComunioFetcher.club_page + str(club_id) for club_id in self.club_ids]
+            players = []
+            for html in executor.map(self.__fetch, club_urls):
+                players += ComunioFetcher.parse_club_page(html)
+            players += self.__crawl_exchange_market(executor)
+
+        # Players on the exchange market are usually listed on their club's page as well.
+        # Different players may share a name, so players are identified by their name and club
+        unique_players = {}
+        for player in players:
+            unique_players.setdefault((player["name"], player["club"]), player)
+        return [unique_players[key] for key in sorted(unique_players)]
+
+    def __crawl_exchange_market(self, executor: ThreadPoolExecutor) -> List[Dict[str, str or int]]:
+        """
+        Crawls the pages of the exchange market listing. Since the amount of pages is not known in advance,
+        the pages are downloaded in waves of max_workers pages until an empty page is encountered
+
+        :param executor: the thread pool used to download the pages
+        :return:         the players on the exchange market
+        """
+        players = []
+        page = 1
+
+        while page <= self.__max_pages:
+            pages = range(page, min(page + self.__max_workers, self.__max_pages + 1))
+            urls = [self.__base_url + ComunioFetcher.exchange_market_page + str(number) for number in pages]
+
+            for html in executor.map(self.__fetch, urls):
+                page_players = ComunioFetcher.parse_market_page(html)
+                if len(page_players) == 0:
+                    return players
+                players += page_players
+
+            page += len(pages)
+
+        return players
+
+    def __fetch(self, url: str) -> str:
+        """
+        Downloads a page after taking a token from the rate limiter
+
+        :param url:               the URL of the page
+        :raises ConnectionError:  When the connection failed due to network error or comunio responded with an
+                                  error status, for example when the rate limit was exceeded
+        :raises InterruptedError: When the cancel event was set
+        :return:                  the HTML of the page
+        """
+        self.__rate_limiter.acquire(self.__cancel_event)
+        if self.__cancel_event.is_set():
+            raise InterruptedError("Market crawl cancelled")
+
+        try:
+            response = self.__session.get(url)
+            response.raise_for_status()
+            return response.text
+        except requests.RequestException:
+            raise ConnectionError("Network Error")
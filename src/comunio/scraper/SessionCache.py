@@ -0,0 +1,154 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import os
+import hmac
+import json
+import time
+import hashlib
+import datetime
+from typing import Dict
+
+
+class SessionCache(object):
+    """
+    Class that stores the state of logged in comunio sessions on disk, so that they can be reused
+    by later program invocations without logging in again.
+
+    Cached sessions expire after a configurable time to live and at the end of the (UTC) day,
+    since the cached profile data contains the day's transfers.
+    Every cached session is tied to a salted hash of the credentials it was established with,
+    so it is only handed out again to a caller that knows the same password.
+    """
+
+    def __init__(self, cache_directory: str = "", ttl: int = 3600) -> None:
+        """
+        Initializes the session cache
+
+        :param cache_directory: the directory in which the sessions are stored. Defaults to ~/.comunio/sessions
+        :param ttl:             the time in seconds after which a cached session expires
+        """
+        if not cache_directory:
+            cache_directory = os.path.join(os.path.expanduser("~"), ".comunio", "sessions")
+
+        self.__cache_directory = cache_directory
+        self.__ttl = ttl
+
+    def __get_cache_file(self, username: str) -> str:
+        """
+        :param username: the username of the session
+        :return:         the path to the file in which the user's session is stored
+        """
+        file_name = hashlib.sha256(username.encode("utf-8")).hexdigest()[0:32] + ".json"
+        return os.path.join(self.__cache_directory, file_name)
+
+    @staticmethod
+    def __hash_credentials(username: str, password: str, salt: bytes) -> str:
+        """
+        :param username: the username
+        :param password: the password
+        :param salt:     the random salt stored alongside the hash
+        :return:         the salted hash of the credentials as a hex string
+        """
+        credentials = (username + "\0" + password).encode("utf-8")
+        return hashlib.pbkdf2_hmac("sha256", credentials, salt, 50000).hex()
+
+    @staticmethod
+    def __get_today() -> str:
+        """
+        :return: the current UTC date as a string
+        """
+        return datetime.datetime.utcnow().strftime("%Y-%m-%d")
+
+    def load(self, username: str, password: str) -> Dict[str, object] or None:
+        """
+        Loads a cached session state
+
+        :param username: the username of the session
+        :param password: the password of the session. Must match the password the session was stored with
+        :return:         the cached session state, or None if no valid session state is cached
+        """
+        try:
+            with open(self.__get_cache_file(username), "r", encoding="utf-8") as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+        if cached.get("username") != username \
+                or cached.get("date") != self.__get_today() \
+                or cached.get("timestamp", 0) + self.__ttl < time.time():
+            return None
+
+        try:
+            credentials_hash = self.__hash_credentials(username, password, bytes.fromhex(cached.get("salt", "")))
+        except (TypeError, ValueError):
+            return None
+        if not hmac.compare_digest(credentials_hash, str(cached.get("credentials_hash", ""))):
+            return None
+
+        return cached.get("state")
+
+    def store(self, username: str, password: str, state: Dict[str, object]) -> None:
+        """
+        Stores a session state. The file is only readable by the current user, since it contains
+        the session cookies. The password itself is not stored, only a salted hash of the credentials
+
+        :param username: the username of the session
+        :param password: the password of the session
+        :param state:    the session state, has to be JSON serializable
+        :return:         None
+        """
+        if not os.path.isdir(self.__cache_directory):
+            os.makedirs(self.__cache_directory)
+
+        cache_file_path = self.__get_cache_file(username)
+        temporary_path = cache_file_path + ".tmp"
+
+        salt = os.urandom(16)
+        cached = {"username": username,
+                  "salt": salt.hex(),
+                  "credentials_hash": self.__hash_credentials(username, password, salt),
+                  "date": self.__get_today(),
+                  "timestamp": time.time(),
+                  "state": state}
+
+        file_descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(file_descriptor, "w", encoding="utf-8") as cache_file:
+            json.dump(cached, cache_file)
+
+        os.replace(temporary_path, cache_file_path)
+
+    def invalidate(self, username: str) -> None:
+        """
+        Removes a cached session state
+
+        :param username: the username of the session
+        :return:         None
+        """
+        try:
+            os.remove(self.__get_cache_file(username))
+        except OSError:
+            pass
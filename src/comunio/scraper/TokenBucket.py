@@ -0,0 +1,80 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import time
+import threading
+
+
+class TokenBucket(object):
+    """
+    A thread-safe token bucket rate limiter.
+
+    The bucket holds up to 'capacity' tokens and is refilled with 'rate' tokens per second. Every request takes
+    one token, so short bursts of up to 'capacity' requests are possible, while the long-term average never
+    exceeds 'rate' requests per second, no matter how many threads share the bucket
+    """
+
+    def __init__(self, rate: float, capacity: int = 1) -> None:
+        """
+        Initializes the token bucket. The bucket starts out full
+
+        :param rate:        the amount of tokens added per second
+        :param capacity:    the maximum amount of tokens in the bucket
+        :raises ValueError: if the rate or the capacity are not positive
+        """
+        if rate <= 0 or capacity < 1:
+            raise ValueError("The rate and capacity of a token bucket must be positive")
+
+        self.__rate = rate
+        self.__capacity = capacity
+        self.__tokens = float(capacity)
+        self.__last_refill = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self, cancel_event: threading.Event = None) -> None:
+        """
+        Takes a token from the bucket, waiting until one is available
+
+        :param cancel_event:      if provided, waiting is aborted once this event is set
+        :raises InterruptedError: if the cancel event was set while waiting
+        :return:                  None
+        """
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(self.__capacity, self.__tokens + (now - self.__last_refill) * self.__rate)
+                self.__last_refill = now
+
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+                delay = (1 - self.__tokens) / self.__rate
+
+            # Waiting happens outside of the lock, so that other threads can check the bucket in the meantime
+            if cancel_event is None:
+                time.sleep(delay)
+            elif cancel_event.wait(delay):
+                raise InterruptedError("Cancelled while waiting for the rate limiter")
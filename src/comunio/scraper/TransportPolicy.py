@@ -0,0 +1,113 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import random
+import requests
+from typing import Iterator, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class TransportPolicy(object):
+    """
+    Class that defines how the HTTP connections to comunio.de are established and retried
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: Tuple[float, float] = (5.0, 30.0), retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, retry_budget: int = 5) -> None:
+        """
+        Initializes the transport policy
+
+        :param pool_size:    the amount of keep-alive connections kept open per host
+        :param timeout:      the connect and read timeouts of every request in seconds
+        :param retries:      how often a request is retried on connection errors or server errors
+        :param backoff_base: the delay in seconds before the first retry. Doubles with every further retry
+        :param backoff_max:  the maximum delay between two retries in seconds
+        :param retry_budget: how often loading the profile data is retried when comunio serves incomplete pages
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget
+
+    def create_session(self) -> requests.Session:
+        """
+        Creates a requests session that keeps connections alive in a connection pool, negotiates gzip compression,
+        applies the timeouts to every request and retries failed requests with an exponential backoff
+
+        :return: the session
+        """
+        session = _TimeoutSession(self.timeout)
+        adapter = HTTPAdapter(pool_connections=self.pool_size,
+                              pool_maxsize=self.pool_size,
+                              max_retries=Retry(total=self.retries,
+                                                backoff_factor=self.backoff_base,
+                                                status_forcelist=[500, 502, 503, 504]))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+        return session
+
+    def get_backoff_delays(self) -> Iterator[float]:
+        """
+        Generates the delays between retries, limited by the retry budget.
+        The delays grow exponentially and are randomized by up to half of their length,
+        to avoid hitting the servers in lockstep with other clients
+
+        :return: an iterator over the delays in seconds
+        """
+        for attempt in range(0, self.retry_budget):
+            delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            yield delay / 2 + random.uniform(0, delay / 2)
+
+
+class _TimeoutSession(requests.Session):
+    """
+    A requests session that applies a default timeout to every request
+    """
+
+    def __init__(self, timeout: Tuple[float, float]) -> None:
+        """
+        Initializes the session
+
+        :param timeout: the default connect and read timeouts in seconds
+        """
+        super().__init__()
+        self.__timeout = timeout
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a request, using the default timeout unless a timeout was provided explicitly
+
+        :param method: the HTTP method
+        :param url:    the URL
+        :param kwargs: the remaining arguments of requests.Session.request
+        :return:       the response
+        """
+        kwargs.setdefault("timeout", self.__timeout)
+        return super().request(method, url, **kwargs)
@@ -0,0 +1,79 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from comunio.database.DatabaseManager import DatabaseManager
+from comunio.scraper.ComunioSession import ComunioSession
+
+
+class DatabaseUpdateWorker(QThread):
+    """
+    Thread that updates the local database with the data of a logged in comunio session in the background.
+
+    The worker uses its own database connection, since sqlite connections may not be shared between threads.
+    The database uses write-ahead logging, so the GUI can keep reading from its own connection while
+    the update is running.
+    """
+
+    updated = pyqtSignal()
+    """
+    Emitted once the database was updated successfully
+    """
+
+    failed = pyqtSignal(object)
+    """
+    Emitted with the raised exception if the update failed
+    """
+
+    def __init__(self, comunio_session: ComunioSession, database_location_override: str = "",
+                 parent: QObject = None) -> None:
+        """
+        Initializes the worker. The update starts once start() is called
+
+        :param comunio_session:            the logged in comunio session
+        :param database_location_override: the location of the database, uses the default location if empty
+        :param parent:                     the parent object
+        """
+        super().__init__(parent)
+        self.__comunio_session = comunio_session
+        self.__database_location_override = database_location_override
+
+    def run(self) -> None:
+        """
+        Updates the database. Called in the background thread
+
+        :return: None
+        """
+        try:
+            database = DatabaseManager(None, self.__database_location_override)
+            try:
+                database.set_comunio_session(self.__comunio_session)
+                database.update_database()
+            finally:
+                database.close()
+            self.updated.emit()
+        except Exception as e:
+            self.failed.emit(e)
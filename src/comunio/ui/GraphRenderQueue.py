@@ -0,0 +1,207 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+# imports
+import traceback
+from collections import deque
+from typing import List
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from comunio.calc.StatisticsCalculator import StatisticsCalculator
+
+
+class GraphRenderQueue(QObject):
+    """
+    Renders the value and points graphs of players in a background thread pool.
+
+    The graph data is collected from the database on the GUI thread right before a player's graphs are rendered,
+    only the rendering happens in the background. Finished graphs are announced using the graph_ready signal
+    as PNG image data, since QPixmaps may only be created on the GUI thread.
+    """
+
+    graph_ready = pyqtSignal(str, bytes, bytes)
+    """
+    Emitted once both graphs of a player were rendered, with the player's name, the value graph and the points graph
+    """
+
+    job_done = pyqtSignal(str, bytes, bytes, int)
+    """
+    Emitted from the thread pool whenever a job is done, with the player's name, the rendered graphs
+    (empty if rendering failed) and the generation of the job. Handled on the GUI thread
+    """
+
+    def __init__(self, calculator: StatisticsCalculator, parent: QObject = None) -> None:
+        """
+        Initializes the render queue
+
+        :param calculator: the statistics calculator used to collect the data and render the graphs
+        :param parent:     the parent object
+        """
+        super().__init__(parent)
+        self.__calculator = calculator
+        self.__pending = deque()
+        self.__running = False
+        self.__finished = set()
+        self.__generation = 0
+
+        # Rendering is serialized by the GraphRenderer, so additional threads would not speed anything up
+        self.__thread_pool = QThreadPool(self)
+        self.__thread_pool.setMaxThreadCount(1)
+        self.job_done.connect(self.__on_job_done)
+
+    def enqueue(self, players: List[str]) -> None:
+        """
+        Queues the graphs of a list of players for rendering, in the order of the list
+
+        :param players: the names of the players
+        :return:        None
+        """
+        self.__pending.extend(players)
+        self.__start_next_job()
+
+    def prioritize(self, player: str) -> None:
+        """
+        Renders a player's graphs before all graphs that are still queued. Does nothing if they were already rendered
+
+        :param player: the name of the player
+        :return:       None
+        """
+        if player not in self.__finished:
+            self.__pending.appendleft(player)
+            self.__start_next_job()
+
+    def invalidate(self) -> None:
+        """
+        Discards all queued and previously rendered graphs, for example after the database was updated.
+        The graph that is currently rendered is discarded once it is done
+
+        :return: None
+        """
+        self.__generation += 1
+        self.__pending.clear()
+        self.__finished.clear()
+
+    def stop(self) -> None:
+        """
+        Removes all queued graphs and waits for the graph that is currently rendered
+
+        :return: None
+        """
+        self.__pending.clear()
+        self.__thread_pool.clear()
+        self.__thread_pool.waitForDone()
+
+    def __on_job_done(self, player: str, value_graph: bytes, points_graph: bytes, generation: int) -> None:
+        """
+        Announces the rendered graphs, unless they were invalidated in the meantime, and starts the next job
+
+        :param player:       the name of the player
+        :param value_graph:  the value graph as PNG image data
+        :param points_graph: the points graph as PNG image data
+        :param generation:   the generation of the job
+        :return:             None
+        """
+        self.__running = False
+
+        if generation == self.__generation and len(value_graph) > 0 and len(points_graph) > 0:
+            self.__finished.add(player)
+            self.graph_ready.emit(player, value_graph, points_graph)
+
+        self.__start_next_job()
+
+    def __start_next_job(self) -> None:
+        """
+        Collects the graph data of the next queued player whose graphs were not rendered yet
+        and starts the rendering job, unless a job is still running
+
+        :return: None
+        """
+        if self.__running:
+            return
+
+        while len(self.__pending) > 0:
+            player = self.__pending.popleft()
+            if player in self.__finished:
+                continue
+
+            value_data = self.__calculator.get_time_graph_data(player, "value")
+            points_data = self.__calculator.get_time_graph_data(player, "points")
+            self.__running = True
+            self.__thread_pool.start(_GraphRenderJob(self, player, value_data, points_data, self.__generation))
+            return
+
+    def render(self, player: str, value_data: tuple, points_data: tuple, generation: int) -> None:
+        """
+        Renders a player's graphs and emits the job_done signal. Called from the thread pool.
+        If rendering fails, the error is printed and job_done is emitted with empty graphs
+
+        :param player:      the name of the player
+        :param value_data:  the x and y values of the value graph
+        :param points_data: the x and y values of the points graph
+        :param generation:  the generation of the job
+        :return:            None
+        """
+        try:
+            value_graph = self.__calculator.render_graph(player, "value", *value_data)
+            points_graph = self.__calculator.render_graph(player, "points", *points_data)
+        except Exception:
+            # Exceptions escaping a QRunnable abort the whole application. The failed graphs are left out
+            # and the queue moves on to the next player
+            traceback.print_exc()
+            value_graph = b""
+            points_graph = b""
+
+        self.job_done.emit(player, value_graph, points_graph, generation)
+
+
+class _GraphRenderJob(QRunnable):
+    """
+    A job in the GraphRenderQueue's thread pool
+    """
+
+    def __init__(self, queue: GraphRenderQueue, player: str, value_data: tuple, points_data: tuple,
+                 generation: int) -> None:
+        """
+        Initializes the job
+
+        :param queue:       the render queue that created the job
+        :param player:      the name of the player
+        :param value_data:  the x and y values of the value graph
+        :param points_data: the x and y values of the points graph
+        :param generation:  the generation of the render queue at the time the job was created
+        """
+        super().__init__()
+        self.__queue = queue
+        self.__player = player
+        self.__value_data = value_data
+        self.__points_data = points_data
+        self.__generation = generation
+
+    def run(self) -> None:
+        """
+        Renders the graphs
+
+        :return: None
+        """
+        self.__queue.render(self.__player, self.__value_data, self.__points_data, self.__generation)
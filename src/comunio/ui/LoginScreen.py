@@ -25,6 +25,7 @@ LICENSE
 
 # imports
 import sys
+from comunio.ui.LoginWorker import LoginWorker
 from comunio.ui.dialogs.login import Ui_LoginDialog
 from comunio.scraper.ComunioSession import ComunioSession
 from PyQt5.QtWidgets import QDialog, QApplication, QMessageBox
@@ -34,6 +35,7 @@ from comunio.credentials.CredentialsManager import CredentialsManager
 class LoginScreen(QDialog, Ui_LoginDialog):
     """
     The Login Dialogue that allows the user to log in.
+    The login itself runs in a LoginWorker thread, so the dialog stays responsive and the login can be cancelled
     """
 
     def __init__(self, credentials: CredentialsManager) -> None:
@@ -47,10 +49,11 @@ class LoginScreen(QDialog, Ui_LoginDialog):
 
         self.comunio_session = None
         self.credentials = credentials
+        self.login_worker = None
 
         self.username_field.setText(credentials.get_credentials()[0])
         self.password_field.setText(credentials.get_credentials()[1])
-        self.cancel_button.clicked.connect(self.close)
+        self.cancel_button.clicked.connect(self.cancel)
         self.login_button.clicked.connect(self.login)
 
     def get_comunio_session(self) -> ComunioSession:
@@ -59,36 +62,99 @@ class LoginScreen(QDialog, Ui_LoginDialog):
         """
         return self.comunio_session
 
-    def login(self):
+    def login(self) -> None:
         """
-        Tries to Log in the user, and handles failures by showing message dialogs
+        Starts logging in the user in the background. The dialog is closed once the login succeeds,
+        failures are handled by on_login_failed()
 
         :return: None
         """
-        try:
-            username = self.username_field.text()
-            password = self.password_field.text()
+        self.set_input_enabled(False)
+        self.status_label.setText("Connecting")
 
-            self.comunio_session = ComunioSession(username, password)
-            if self.remember_check.checkState():
-                self.credentials.set_credentials((username, password))
-                self.credentials.store_credentials()
-            self.accept()
-        except ConnectionError:
+        self.login_worker = LoginWorker(self.username_field.text(), self.password_field.text(), self)
+        self.login_worker.progress.connect(self.status_label.setText)
+        self.login_worker.logged_in.connect(self.on_logged_in)
+        self.login_worker.failed.connect(self.on_login_failed)
+        self.login_worker.start()
+
+    def cancel(self) -> None:
+        """
+        Cancels a running login, or closes the dialog if no login is running
+
+        :return: None
+        """
+        if self.login_worker is not None and self.login_worker.isRunning():
+            self.status_label.setText("Cancelling")
+            self.login_worker.cancel()
+        else:
+            self.close()
+
+    def reject(self) -> None:
+        """
+        Cancels a running login when the dialog is closed and waits for the login thread to stop
+
+        :return: None
+        """
+        if self.login_worker is not None:
+            self.login_worker.cancel()
+            self.login_worker.wait()
+        super().reject()
+
+    def set_input_enabled(self, enabled: bool) -> None:
+        """
+        Enables or disables the input fields and the login button while a login is running
+
+        :param enabled: True to enable the input, False to disable it
+        :return:        None
+        """
+        self.username_field.setEnabled(enabled)
+        self.password_field.setEnabled(enabled)
+        self.remember_check.setEnabled(enabled)
+        self.login_button.setEnabled(enabled)
+
+    def on_logged_in(self, comunio_session: ComunioSession) -> None:
+        """
+        Called once the login worker logged in successfully. Stores the credentials if requested and
+        closes the dialog
+
+        :param comunio_session: the logged in comunio session
+        :return:                None
+        """
+        self.comunio_session = comunio_session
+        if self.remember_check.checkState():
+            self.credentials.set_credentials((self.username_field.text(), self.password_field.text()))
+            self.credentials.store_credentials()
+        self.accept()
+
+    def on_login_failed(self, error: Exception) -> None:
+        """
+        Called if the login worker failed to log in. Handles failures by showing message dialogs
+
+        :param error: the exception raised during the login
+        :return:      None
+        """
+        self.set_input_enabled(True)
+        self.status_label.setText("")
+
+        if isinstance(error, ConnectionError):
             self.show_error_dialog("Login Failed", "Network Error", "The Comunio Servers could not be reached. "
                                                                     "Check if your internet connection is working.")
-        except PermissionError:
+        elif isinstance(error, PermissionError):
             self.show_error_dialog("Login Failed", "Authentication Error", "Your credentials were not accepted by the "
                                                                            "Comunio servers. This may be due to a bad "
                                                                            "username/password combination, or due to "
                                                                            "the Comunio servers currently only "
                                                                            "allowing logins from Pro players")
-        except ReferenceError:
+        elif isinstance(error, ReferenceError):
             self.show_error_dialog("Login Failed", "5 players on transfer list", "Your comunio information could not "
                                                                                  "be loaded due to 5 players being on "
                                                                                  "the transfer list currently. Remove "
                                                                                  "a player from the transfer list to "
                                                                                  "log in.")
+        elif not isinstance(error, InterruptedError):  # Interrupted logins were cancelled by the user
+            self.show_error_dialog("Login Failed", "Unexpected Error", "An unexpected error occurred while logging "
+                                                                       "in: " + str(error))
 
     @staticmethod
     def show_error_dialog(title: str, message: str, secondary_text: str) -> None:
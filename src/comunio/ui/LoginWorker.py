@@ -0,0 +1,91 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+
+# imports
+import threading
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from comunio.scraper.ComunioSession import ComunioSession
+
+
+class LoginWorker(QThread):
+    """
+    Thread that logs in to comunio and loads the user's profile in the background, so that the
+    login dialog stays responsive. The progress is reported using the progress signal, the login can be
+    cancelled at any time using cancel().
+    """
+
+    progress = pyqtSignal(str)
+    """
+    Emitted with a short description whenever the login reaches a new step
+    """
+
+    logged_in = pyqtSignal(object)
+    """
+    Emitted with the logged in ComunioSession once the login succeeded
+    """
+
+    failed = pyqtSignal(object)
+    """
+    Emitted with the raised exception if the login failed or was cancelled
+    """
+
+    def __init__(self, username: str, password: str, parent: QObject = None) -> None:
+        """
+        Initializes the worker. The login starts once start() is called
+
+        :param username: the user's user name for comunio.de
+        :param password: the user's password
+        :param parent:   the parent object
+        """
+        super().__init__(parent)
+        self.__username = username
+        self.__password = password
+        self.__cancel_event = threading.Event()
+
+    def run(self) -> None:
+        """
+        Logs in the user. Called in the background thread
+
+        :return: None
+        """
+        try:
+            comunio_session = ComunioSession(self.__username, self.__password,
+                                             progress_callback=self.progress.emit,
+                                             cancel_event=self.__cancel_event)
+            self.logged_in.emit(comunio_session)
+        except Exception as e:
+            # For example errors parsing pages whose layout changed. The login screen has to be notified anyway,
+            # it would stay disabled otherwise
+            self.failed.emit(e)
+
+    def cancel(self) -> None:
+        """
+        Cancels the login. The worker stops after the currently running request, the failed signal
+        is emitted with an InterruptedError
+
+        :return: None
+        """
+        self.__cancel_event.set()
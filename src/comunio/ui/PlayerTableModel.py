@@ -0,0 +1,245 @@
+"""
+LICENSE:
+Copyright 2016 Hermann Krumrey
+
+This file is part of comunio-manager.
+
+    comunio-manager is a program that allows a user to track his/her comunio.de
+    profile
+
+    comunio-manager is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    comunio-manager is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with comunio-manager.  If not, see <http://www.gnu.org/licenses/>.
+LICENSE
+"""
+
+
+
+# imports
+from typing import Dict, List
+from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QVariant
+
+
+class PlayerTableModel(QAbstractTableModel):
+    """
+    Table model containing the players of the StatisticsViewer's player table.
+
+    The model stores the raw player data as provided by DatabaseManager.get_squad_snapshot(),
+    values are only formatted once the view actually displays them. Sorting uses the raw values,
+    so numbers are sorted numerically.
+    """
+
+    headers = ["Position", "Player", "Points", "Initial Value", "Yesterday's Value",
+               "Today's Value", "Total Value Change", "Value Tendency"]
+    """
+    The column headers of the table
+    """
+
+    position_order = ["Torhüter", "Abwehr", "Mittelfeld", "Sturm"]
+    """
+    The order in which the positions are sorted, from Goalkeeper to Striker
+    """
+
+    def __init__(self, parent: QObject = None) -> None:
+        """
+        Initializes an empty player table model
+
+        :param parent: the parent object
+        """
+        super().__init__(parent)
+        self.__players = []
+        self.__sort_column = None
+        self.__sort_order = Qt.AscendingOrder
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """
+        :param parent: the parent index, which is invalid for table models
+        :return:       the amount of players in the table
+        """
+        return 0 if parent.isValid() else len(self.__players)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """
+        :param parent: the parent index, which is invalid for table models
+        :return:       the amount of columns in the table
+        """
+        return 0 if parent.isValid() else len(PlayerTableModel.headers)
+
+    def headerData(self, section: int, orientation: int, role: int = Qt.DisplayRole) -> str or QVariant:
+        """
+        :param section:     the column or row of the header
+        :param orientation: whether the horizontal or vertical header is requested
+        :param role:        the requested data role
+        :return:            the column's header text
+        """
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return PlayerTableModel.headers[section]
+        return QVariant()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> str or QBrush or QVariant:
+        """
+        Formats a cell of the table for display
+
+        :param index: the index of the cell
+        :param role:  the requested data role
+        :return:      the formatted text for the display role, the background color for the background role
+        """
+        if not index.isValid():
+            return QVariant()
+
+        value = self.__get_value(self.__players[index.row()], index.column())
+
+        if role == Qt.DisplayRole:
+            if value is None:
+                return "---"
+            elif index.column() < 3:
+                return str(value)
+            elif index.column() < 5:
+                return "{:,}".format(value)
+            else:
+                return "{:,}€".format(value)
+
+        elif role == Qt.BackgroundRole and index.column() >= 6:
+            return self.__get_color_formatting(value)
+
+        elif role == Qt.TextAlignmentRole and index.column() >= 2:
+            return Qt.AlignRight | Qt.AlignVCenter
+
+        return QVariant()
+
+    @staticmethod
+    def __get_value(player: Dict[str, str or int], column: int) -> str or int or None:
+        """
+        Calculates the raw value of a player's cell
+
+        :param player: the player dictionary
+        :param column: the column of the cell
+        :return:       the raw value, None if it is unknown
+        """
+        if column == 0:
+            return player["position"]
+        elif column == 1:
+            return player["name"]
+        elif column == 2:
+            return player["points"]
+        elif column == 3:
+            return player["buy_value"]
+        elif column == 4:
+            return player["yesterday_value"]
+        elif column == 5:
+            return player["value"]
+        elif column == 6:
+            return None if player["buy_value"] is None else player["value"] - player["buy_value"]
+        else:
+            return None if player["yesterday_value"] is None else player["value"] - player["yesterday_value"]
+
+    @staticmethod
+    def __get_color_formatting(value: int or None) -> QBrush:
+        """
+        Evaluates a monetary value an defines a color for it. Red for negative numbers, yellow for 0 or
+        unknown values and green for positive colors
+
+        :param value: the value to be used
+        :return:      the QBrush appropriate for the value
+        """
+        if value is None or value == 0:
+            return QBrush(QColor(237, 212, 0))   # Yellow
+        elif value > 0:
+            return QBrush(QColor(115, 210, 22))  # Green
+        else:  # If value < 0
+            return QBrush(QColor(239, 41, 41))   # Red
+
+    def sort(self, column: int, order: int = Qt.AscendingOrder) -> None:
+        """
+        Sorts the table by the raw values of a column. Unknown values are always sorted to the end.
+        Positions are sorted from Goalkeeper to Striker
+
+        :param column: the column to sort by
+        :param order:  the sort order
+        :return:       None
+        """
+        self.__sort_column = column
+        self.__sort_order = order
+
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_players = [self.__players[index.row()] for index in old_indexes]
+
+        self.__sort_players()
+
+        rows = {id(player): row for row, player in enumerate(self.__players)}
+        new_indexes = [self.index(rows[id(player)], index.column()) for player, index in zip(old_players, old_indexes)]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def __sort_players(self) -> None:
+        """
+        Sorts the players by the current sort column, does nothing if the table was never sorted
+
+        :return: None
+        """
+        if self.__sort_column is None:
+            return
+
+        column = self.__sort_column
+
+        def key(player: Dict[str, str or int]) -> tuple:
+            value = self.__get_value(player, column)
+            if column == 0:
+                order = PlayerTableModel.position_order
+                value = order.index(value) if value in order else len(order)
+            return value is None, value
+
+        known = [player for player in self.__players if key(player)[0] is False]
+        unknown = [player for player in self.__players if key(player)[0] is True]
+        known.sort(key=key, reverse=self.__sort_order == Qt.DescendingOrder)
+        self.__players = known + unknown
+
+    def get_player(self, row: int) -> Dict[str, str or int]:
+        """
+        :param row: the row of the player in the table
+        :return:    the player's dictionary
+        """
+        return self.__players[row]
+
+    def set_players(self, players: List[Dict[str, str or int]]) -> None:
+        """
+        Updates the table with new player data. Only rows that actually changed are updated,
+        players that are no longer present are removed and new players are added, so that the
+        view keeps its selection and does not have to redraw the whole table.
+
+        :param players: the new player dictionaries, in the format of DatabaseManager.get_squad_snapshot()
+        :return:        None
+        """
+        new_players = {player["name"]: player for player in players}
+
+        for row in reversed(range(len(self.__players))):
+            if self.__players[row]["name"] not in new_players:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.__players[row]
+                self.endRemoveRows()
+
+        for row, player in enumerate(self.__players):
+            new_player = new_players.pop(player["name"])
+            if new_player != player:
+                self.__players[row] = new_player
+                self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+        added = [player for player in players if player["name"] in new_players]
+        if len(added) > 0:
+            self.beginInsertRows(QModelIndex(), len(self.__players), len(self.__players) + len(added) - 1)
+            self.__players += added
+            self.endInsertRows()
+
+        if self.__sort_column is not None:
+            self.sort(self.__sort_column, self.__sort_order)
@@ -24,11 +24,14 @@ LICENSE
 
 
 # imports
-import os
 import sys
-from PyQt5.QtGui import QPixmap, QBrush, QColor
-from PyQt5.QtWidgets import QMainWindow, QApplication, QHeaderView, QTreeWidgetItem
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QCloseEvent
+from PyQt5.QtWidgets import QMainWindow, QApplication, QHeaderView, QMessageBox
 from comunio.ui.windows.stats import Ui_StatisticsWindow
+from comunio.ui.PlayerTableModel import PlayerTableModel
+from comunio.ui.GraphRenderQueue import GraphRenderQueue
+from comunio.ui.DatabaseUpdateWorker import DatabaseUpdateWorker
 from comunio.scraper.ComunioSession import ComunioSession
 from comunio.database.DatabaseManager import DatabaseManager
 from comunio.calc.StatisticsCalculator import StatisticsCalculator
@@ -36,127 +39,133 @@ from comunio.calc.StatisticsCalculator import StatisticsCalculator
 
 class StatisticsViewer(QMainWindow, Ui_StatisticsWindow):
     """
-    Class that models the QT GUI for displaying Comunio statistics
+    Class that models the QT GUI for displaying Comunio statistics.
+    If a comunio session is provided, the local database is updated in the background while the window
+    already displays the previously recorded data
     """
 
-    def __init__(self, comunio_session: ComunioSession,
+    def __init__(self, comunio_session: ComunioSession or None,
                  database_manager: DatabaseManager,
                  calculator: StatisticsCalculator,
+                 display_name: str = "",
                  parent: QMainWindow = None) -> None:
         """
         Sets up the interactive UI elements
 
-        :param comunio_session:  An initialized comunio session
+        :param comunio_session:  An initialized comunio session, or None to only display the local database
         :param database_manager: An initialized Database Manager object
         :param calculator:       An initialized StatisticsCalculator object
+        :param display_name:     The name displayed if no comunio session was provided
         :param parent:           The parent window
         """
         super().__init__(parent)
         self.setupUi(self)
 
         self.__comunio_session = comunio_session
+        self.__display_name = display_name
         self.__database_manager = database_manager
         self.__statistics_calculator = calculator
 
-        for i in range(0, 8):  # Makes headers all the same size
-            self.player_table.header().setSectionResizeMode(i, QHeaderView.Stretch)
-        self.player_table.itemSelectionChanged.connect(self.__select_player)
+        self.__table_model = PlayerTableModel(self)
+        self.player_table.setModel(self.__table_model)
+        self.player_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)  # Same size for all headers
+        self.player_table.selectionModel().selectionChanged.connect(self.__select_player)
 
-        self.__players = []
-        self.__insert_sorted_players_into_players_list()
+        self.__graphs = {}
+        self.__selected_player = None
 
         self.__fill_initial_data()
         self.__fill_player_table()
+        self.player_table.sortByColumn(0, Qt.AscendingOrder)
 
-    def __fill_initial_data(self) -> None:
-        """
-        Fills the initial data, like the player's cash or team value information
+        # Starts rendering the graphs of the whole squad in the background
+        self.__render_queue = GraphRenderQueue(calculator, self)
+        self.__render_queue.graph_ready.connect(self.__store_graphs)
+        self.__enqueue_graphs()
 
-        :return: None
-        """
-        cash = self.__database_manager.get_last_cash_amount()
-        team_value = self.__database_manager.get_last_team_value_amount()
-        display_name = self.__comunio_session.get_screen_name()
+        self.__update_worker = None
+        if comunio_session is not None:
+            self.__update_worker = DatabaseUpdateWorker(comunio_session, database_manager.get_database_path(), self)
+            self.__update_worker.updated.connect(self.refresh)
+            self.__update_worker.failed.connect(self.__on_update_failed)
+            self.__update_worker.start()
 
-        self.greeting_label.setText(self.greeting_label.text().replace("<username>", display_name))
-        self.cash_display.setText("{:,}€".format(cash))
-        self.team_value_display.setText("{:,}€".format(team_value))
+    def closeEvent(self, event: QCloseEvent) -> None:
+        """
+        Stops rendering graphs in the background once the window is closed
 
-        self.total_assets_display.setText("{:,}".format(cash + team_value))
-        self.balance_display.setText("{:,}".format(self.__statistics_calculator.calculate_total_assets_delta()))
+        :param event: the close event
+        :return:      None
+        """
+        self.__render_queue.stop()
+        if self.__update_worker is not None:
+            self.__update_worker.wait()
+        super().closeEvent(event)
 
-    def __fill_player_table(self) -> None:
+    def refresh(self) -> None:
         """
-        Fills the player table with the current data in the local database
+        Reloads the displayed data from the local database, for example after it was updated.
+        The player table is updated in place, the graphs are rendered again
 
         :return: None
         """
-        for player in self.__players:
-
-            position = player["position"]
-            name = player["name"]
-            points = str(player["points"])
-            current_value = player["value"]
-            buy_value = self.__database_manager.get_player_buy_value(name)
-            total_player_delta = current_value - buy_value
-            total_player_delta_bg = self.__get_color_formatting(total_player_delta)
+        self.__database_manager.invalidate_history_cache()  # The update used a different database connection
+        self.__fill_initial_data()
+        self.__fill_player_table()
 
-            yesterday_value = self.__database_manager.get_player_on_day(name, -1)
-            try:
-                yesterday_value = yesterday_value["value"]
-                tendency = current_value - yesterday_value
-                yesterday_value = "{:,}".format(yesterday_value)
-                tendency_bg = self.__get_color_formatting(tendency)
-                tendency = "{:,}€".format(tendency)
+        self.__graphs = {}
+        self.__render_queue.invalidate()
+        self.__enqueue_graphs()
+        self.__select_player()
 
-            except TypeError:
-                yesterday_value = "---"
-                tendency = "---"
-                tendency_bg = QBrush(QColor(237, 212, 0))
+    def __enqueue_graphs(self) -> None:
+        """
+        Queues the graphs of all players in the table for rendering, in the order of the table
 
-            buy_value = "{:,}".format(buy_value)
-            current_value = "{:,}€".format(current_value)
-            total_player_delta = "{:,}€".format(total_player_delta)
+        :return: None
+        """
+        self.__render_queue.enqueue([self.__table_model.get_player(row)["name"]
+                                     for row in range(self.__table_model.rowCount())])
 
-            tree_widget_item = QTreeWidgetItem([position, name, points, buy_value, yesterday_value,
-                                                current_value, total_player_delta, tendency])
-            self.player_table.addTopLevelItem(tree_widget_item)
+    def __on_update_failed(self, error: Exception) -> None:
+        """
+        Called if the database could not be updated in the background. The previously recorded data stays visible
 
-            tree_widget_item.setBackground(6, total_player_delta_bg)
-            tree_widget_item.setBackground(7, tendency_bg)
+        :param error: the exception raised during the update
+        :return:      None
+        """
+        QMessageBox.warning(self, "Update Failed", "The local database could not be updated: " + str(error))
 
-    @staticmethod
-    def __get_color_formatting(value: int) -> QBrush:
+    def __fill_initial_data(self) -> None:
         """
-        Evaluates a monetary value an defines a color for it. Red for negative numbers, yellow for 0 and
-        green for positive colors
+        Fills the initial data, like the player's cash or team value information
 
-        :param value: the value to be used
-        :return:      the QBrush appropriate for the value
+        :return: None
         """
-        if value > 0:
-            return QBrush(QColor(115, 210, 22))  # Green
-        elif value == 0:
-            return QBrush(QColor(237, 212, 0))   # Yellow
-        else:  # If value < 0
-            return QBrush(QColor(239, 41, 41))   # Red
+        assets = self.__database_manager.get_latest_assets()
+        cash = 0 if assets is None else assets["cash"]
+        team_value = 0 if assets is None else assets["team_value"]
+
+        if self.__comunio_session is not None:
+            display_name = self.__comunio_session.get_screen_name()
+        else:
+            display_name = self.__display_name
 
-    def __insert_sorted_players_into_players_list(self) -> None:
+        self.greeting_label.setText(self.greeting_label.text().replace("<username>", display_name))
+        self.cash_display.setText("{:,}€".format(cash))
+        self.team_value_display.setText("{:,}€".format(team_value))
+
+        self.total_assets_display.setText("{:,}".format(cash + team_value))
+        self.balance_display.setText("{:,}".format(self.__statistics_calculator.calculate_total_assets_delta()))
+
+    def __fill_player_table(self) -> None:
         """
-        Sorts the list of current players in the comunio team by their position, from Goalkeeper to Striker and enters
-        them in that order into the self.__players list.
-        Furthermore, the players are given two new keys, which will eventually contain the paths to their graphs.
+        Fills the player table with the current data in the local database.
+        Rows that did not change since the table was last filled are left untouched
 
         :return: None
         """
-        players = self.__database_manager.get_players_on_day(0)
-        order = ["Torhüter", "Abwehr", "Mittelfeld", "Sturm"]
-        for position in order:
-            for player in players:
-                if player["position"] == position:
-                    player["points_graph"] = None
-                    player["value_graph"] = None
-                    self.__players.append(player)
+        self.__table_model.set_players(self.__database_manager.get_squad_snapshot())
 
     def __select_player(self) -> None:
         """
@@ -165,48 +174,70 @@ class StatisticsViewer(QMainWindow, Ui_StatisticsWindow):
 
         :return: None
         """
-        player_index = self.player_table.selectedIndexes()[0].row()
-        player = self.__players[player_index]
+        selected_rows = self.player_table.selectionModel().selectedRows()
+        if len(selected_rows) == 0:
+            return
+
+        player = self.__table_model.get_player(selected_rows[0].row())
 
         self.player_name_label.setText(player["name"])
         self.player_position_label.setText(player["position"])
         self.player_points_label.setText(str(player["points"]))
         self.player_value_label.setText("{:,}".format(player["value"]))
-        self.fill_graphs(player_index)
+        self.fill_graphs(player["name"])
 
-    def fill_graphs(self, player_index: int) -> None:
+    def fill_graphs(self, player_name: str) -> None:
         """
         Fills the player value graph widget with a graph displaying the player's previous values
-        over time as well as the player points graph with the player's points over time
+        over time as well as the player points graph with the player's points over time.
+        If the graphs were not rendered yet, they are rendered next and filled in by __store_graphs() once ready
 
-        :param player_index: The player index in the self.__players attribute
-        :return:             None
+        :param player_name: The name of the player
+        :return:            None
         """
-        if self.__players[player_index]["value_graph"] is None or self.__players[player_index]["points_graph"] is None:
-
-            player_name = self.__players[player_index]["name"]
+        self.__selected_player = player_name
+
+        if player_name not in self.__graphs:
+            self.value_graph.clear()
+            self.points_graph.clear()
+            self.__render_queue.prioritize(player_name)
+        else:
+            value_graph, points_graph = self.__graphs[player_name]
+            self.value_graph.setPixmap(value_graph)
+            self.points_graph.setPixmap(points_graph)
+
+    def __store_graphs(self, player_name: str, value_graph: bytes, points_graph: bytes) -> None:
+        """
+        Called whenever the graphs of a player were rendered in the background. Stores the graphs and
+        displays them if the player is currently selected
 
-            value_graph_image = self.__statistics_calculator.generate_time_graph(player_name, "value")
-            points_graph_image = self.__statistics_calculator.generate_time_graph(player_name, "points")
-            self.__players[player_index]["value_graph"] = QPixmap(value_graph_image)
-            self.__players[player_index]["points_graph"] = QPixmap(points_graph_image)
-            os.remove(value_graph_image)
-            os.remove(points_graph_image)
+        :param player_name:  the name of the player
+        :param value_graph:  the value graph as PNG image data
+        :param points_graph: the points graph as PNG image data
+        :return:             None
+        """
+        value_pixmap = QPixmap()
+        value_pixmap.loadFromData(value_graph, "PNG")
+        points_pixmap = QPixmap()
+        points_pixmap.loadFromData(points_graph, "PNG")
+        self.__graphs[player_name] = (value_pixmap, points_pixmap)
 
-        self.value_graph.setPixmap(self.__players[player_index]["value_graph"])
-        self.points_graph.setPixmap(self.__players[player_index]["points_graph"])
+        if self.__selected_player == player_name:
+            self.fill_graphs(player_name)
 
 
-def start(comunio_session: ComunioSession, database_manager: DatabaseManager, calculator: StatisticsCalculator) -> None:
+def start(comunio_session: ComunioSession or None, database_manager: DatabaseManager, calculator: StatisticsCalculator,
+          display_name: str = "") -> None:
     """
     Starts the Statistics Viewer GUI.
 
-    :param comunio_session:  An initialized comunio session
+    :param comunio_session:  An initialized comunio session, or None to only display the local database
     :param database_manager: An initialized Database Manager object
     :param calculator:       An initialized StatisticsCalculator object
+    :param display_name:     The name displayed if no comunio session was provided
     :return:                 None
     """
     app = QApplication(sys.argv)
-    form = StatisticsViewer(comunio_session, database_manager, calculator)
+    form = StatisticsViewer(comunio_session, database_manager, calculator, display_name)
     form.show()
     app.exec_()
@@ -32,6 +32,10 @@ class Ui_LoginDialog(object):
         self.label.setGeometry(QtCore.QRect(40, 90, 351, 31))
         self.label.setWordWrap(True)
         self.label.setObjectName("label")
+        self.status_label = QtWidgets.QLabel(LoginDialog)
+        self.status_label.setGeometry(QtCore.QRect(20, 130, 171, 24))
+        self.status_label.setText("")
+        self.status_label.setObjectName("status_label")
 
         self.retranslateUi(LoginDialog)
         QtCore.QMetaObject.connectSlotsByName(LoginDialog)
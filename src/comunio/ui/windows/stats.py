@@ -53,9 +53,13 @@ class Ui_StatisticsWindow(object):
         self.gridLayout.addWidget(self.label_4, 0, 11, 1, 1)
         spacerItem4 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Minimum)
         self.gridLayout.addItem(spacerItem4, 0, 4, 1, 1)
-        self.player_table = QtWidgets.QTreeWidget(self.centralwidget)
+        self.player_table = QtWidgets.QTableView(self.centralwidget)
         self.player_table.setMinimumSize(QtCore.QSize(878, 327))
+        self.player_table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.player_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.player_table.setSortingEnabled(True)
         self.player_table.setObjectName("player_table")
+        self.player_table.verticalHeader().setVisible(False)
         self.gridLayout.addWidget(self.player_table, 2, 0, 1, 13)
         self.points_graph = QtWidgets.QLabel(self.centralwidget)
         self.points_graph.setMinimumSize(QtCore.QSize(0, 192))
@@ -111,14 +115,6 @@ class Ui_StatisticsWindow(object):
         self.label.setText(_translate("StatisticsWindow", "Total Assets"))
         self.balance_display.setText(_translate("StatisticsWindow", "0€"))
         self.label_4.setText(_translate("StatisticsWindow", "Balance"))
-        self.player_table.headerItem().setText(0, _translate("StatisticsWindow", "Position"))
-        self.player_table.headerItem().setText(1, _translate("StatisticsWindow", "Player"))
-        self.player_table.headerItem().setText(2, _translate("StatisticsWindow", "Points"))
-        self.player_table.headerItem().setText(3, _translate("StatisticsWindow", "Initial Value"))
-        self.player_table.headerItem().setText(4, _translate("StatisticsWindow", "Yesterday\'s Value"))
-        self.player_table.headerItem().setText(5, _translate("StatisticsWindow", "Today\'s Value"))
-        self.player_table.headerItem().setText(6, _translate("StatisticsWindow", "Total Value Change"))
-        self.player_table.headerItem().setText(7, _translate("StatisticsWindow", "Value Tendency"))
         self.points_graph.setText(_translate("StatisticsWindow", "<html><head/><body><p align=\"center\">Points</p></body></html>"))
         self.value_graph.setText(_translate("StatisticsWindow", "<html><head/><body><p align=\"center\">Values</p></body></html>"))
         self.label_6.setText(_translate("StatisticsWindow", "Value"))